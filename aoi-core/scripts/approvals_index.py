@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Ensure workspace root is importable when running from aoi-core/scripts
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from aoi_core.acp.approval import DEFAULT_APPROVALS_DIR, DEFAULT_PROOFS_DIR
+from aoi_core.acp.approval_index import DEFAULT_INDEX, query_approvals, rebuild_index
+
+TABLE_COLUMNS = ["id", "created_at", "status", "risk_level", "signal", "score", "action", "provider", "commit_ref"]
+
+
+def cmd_query(args: argparse.Namespace) -> int:
+    index = Path(args.index).resolve()
+    if not index.exists():
+        print(f"No index at {index} (run: approvals_index.py rebuild)", file=sys.stderr)
+        return 2
+    try:
+        rows = query_approvals(
+            index,
+            status=args.status,
+            risk_level=args.risk_level,
+            signal=args.signal,
+            action=args.action,
+            provider=args.provider,
+            since=args.since,
+            until=args.until,
+            commit=args.commit,
+            sha256=args.sha256,
+            limit=args.limit,
+        )
+        if args.format == "jsonl":
+            for r in rows:
+                print(json.dumps(r, ensure_ascii=False))
+        elif args.format == "json":
+            print(json.dumps(list(rows), ensure_ascii=False, indent=2))
+        elif args.format == "ids":
+            for r in rows:
+                print(r["id"])
+        else:
+            print("\t".join(TABLE_COLUMNS))
+            for r in rows:
+                print("\t".join("" if r[c] is None else str(r[c]) for c in TABLE_COLUMNS))
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    return 0
+
+
+def cmd_rebuild(args: argparse.Namespace) -> int:
+    index = Path(args.index).resolve()
+    count, errors = rebuild_index(index, Path(args.approvals_dir).resolve(), Path(args.proofs_dir).resolve())
+    for e in errors:
+        print(f"⚠️ skipped {e}", file=sys.stderr)
+    print("✅ rebuilt approvals index")
+    print(f"- index: {index}")
+    print(f"- approvals: {count}")
+    return 0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Query or rebuild the SQLite index of approvals and proofs")
+    ap.add_argument("--index", default=DEFAULT_INDEX, help="index path")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    q = sub.add_parser("query", help="list approvals matching all given filters, newest first")
+    q.add_argument("--status", help="e.g. BLOCKED, PENDING_APPROVAL")
+    q.add_argument("--risk-level", help="LOW, MED or HIGH")
+    q.add_argument("--signal", help="green, yellow or red")
+    q.add_argument("--action", help="action label, e.g. git_push")
+    q.add_argument("--provider", help="provider label, e.g. pre_push_gate")
+    q.add_argument("--since", help="created at or after: 7d, 12h, 30m or an ISO date/datetime")
+    q.add_argument("--until", help="created before: same forms as --since")
+    q.add_argument("--commit", help="gated ref as given, or a prefix of the resolved commit sha")
+    q.add_argument("--sha256", help="sha256 of any proof file")
+    q.add_argument("--limit", type=int, help="at most this many rows")
+    q.add_argument("--format", choices=["table", "json", "jsonl", "ids"], default="table")
+    q.set_defaults(func=cmd_query)
+
+    r = sub.add_parser("rebuild", help="re-create the index from the approval and proof files")
+    r.add_argument("--approvals-dir", default=DEFAULT_APPROVALS_DIR, help="approvals dir")
+    r.add_argument("--proofs-dir", default=DEFAULT_PROOFS_DIR, help="proof bundle root dir")
+    r.set_defaults(func=cmd_rebuild)
+
+    args = ap.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
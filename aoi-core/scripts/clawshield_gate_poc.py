@@ -2,46 +2,70 @@
 from __future__ import annotations
 
 import argparse
-import json
-import subprocess
 import sys
 from pathlib import Path
 
 # Ensure workspace root is importable when running from aoi-core/scripts
 sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 
-from aoi_core.acp.clawshield_gate import make_report, scan_repo_snapshot
-
-
-def git_verify_commit(repo: Path, commit: str) -> None:
-    # local-only; no network. just verify the commit exists (quiet).
-    subprocess.check_output(["git", "-C", str(repo), "rev-parse", "--verify", commit], stderr=subprocess.STDOUT)
+from aoi_core.acp.clawshield_gate import DEFAULT_EXCLUDES
+from aoi_core.acp.pipeline import GateError, run_gate, write_report
 
 
 def main() -> int:
     ap = argparse.ArgumentParser(description="ClawShield-style commit gate (PoC)")
     ap.add_argument("--repo", required=True, help="path to git repo")
     ap.add_argument("--commit", required=True, help="commit sha (must exist locally)")
-    ap.add_argument("--out", required=True, help="output json path")
+    ap.add_argument("--out", help="output json path (required unless --stream)")
+    ap.add_argument("--exclude", action="append", help=f"file/dir name glob to skip (repeatable; default: {', '.join(DEFAULT_EXCLUDES)})")
+    ap.add_argument("--source", choices=["git", "worktree"], default="git", help="scan the commit's tree from the object database (default) or the working tree")
+    ap.add_argument("--cache", help="git source: findings cache path (default: <git dir>/clawshield/findings-cache.json)")
+    ap.add_argument("--no-cache", action="store_true", help="git source: rescan every blob")
+    ap.add_argument("--workers", type=int, default=1, help="scan files in this many worker processes (report is identical)")
+    ap.add_argument("--no-gitignore", action="store_true", help="worktree source: also scan files matched by .gitignore")
+    ap.add_argument("--fail-fast", action="store_true", help="stop scanning once the signal is red (report marks the scan incomplete)")
+    ap.add_argument("--stream", help="write findings as JSONL while scanning ('-' for stdout)")
     args = ap.parse_args()
+    if not args.out and not args.stream:
+        ap.error("one of --out or --stream is required")
 
-    repo = Path(args.repo).resolve()
-    if not (repo / ".git").exists():
-        raise SystemExit(f"Not a git repo: {repo}")
-
-    git_verify_commit(repo, args.commit)
-
-    # Safety note: we DO NOT checkout or modify working tree in this PoC.
-    findings = scan_repo_snapshot(repo)
-    report = make_report(repo=str(repo), commit=args.commit, findings=findings)
+    stream = None
+    if args.stream == "-":
+        stream = sys.stdout
+    elif args.stream:
+        Path(args.stream).resolve().parent.mkdir(parents=True, exist_ok=True)
+        stream = open(args.stream, "w", encoding="utf-8")
 
-    out = Path(args.out).resolve()
-    out.parent.mkdir(parents=True, exist_ok=True)
-    out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    try:
+        report = run_gate(
+            Path(args.repo),
+            args.commit,
+            source=args.source,
+            exclude=args.exclude or DEFAULT_EXCLUDES,
+            gitignore=not args.no_gitignore,
+            cache=not args.no_cache,
+            cache_path=Path(args.cache).resolve() if args.cache else None,
+            workers=args.workers,
+            fail_fast=args.fail_fast,
+            stream=stream,
+            keep_findings=bool(args.out),
+        )
+    except GateError as e:
+        raise SystemExit(str(e))
+    finally:
+        if stream is not None and stream is not sys.stdout:
+            stream.close()
 
-    print("✅ clawshield_gate_poc: wrote")
-    print(f"- out: {out}")
-    print(f"- signal: {report['result']['signal']} (score {report['result']['score']})")
+    # Keep stdout pure JSONL when streaming there
+    log = sys.stderr if stream is sys.stdout else sys.stdout
+    print("✅ clawshield_gate_poc: wrote", file=log)
+    if args.out:
+        print(f"- out: {write_report(report, Path(args.out))}", file=log)
+    if args.stream:
+        print(f"- stream: {args.stream}", file=log)
+    print(f"- signal: {report['result']['signal']} (score {report['result']['score']})", file=log)
+    if "scan" in report:
+        print(f"- stopped early (fail-fast) after {report['scan']['findings_seen']} findings", file=log)
     return 0
 
 
@@ -2,28 +2,21 @@
 from __future__ import annotations
 
 import argparse
-import os
-import subprocess
-from datetime import datetime, timezone
+import sys
 from pathlib import Path
 
+# Ensure workspace root is importable when running from aoi-core/scripts
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 
-def kst_timestamp() -> str:
-    # Asia/Seoul is UTC+9 (no DST)
-    return datetime.now(timezone.utc).astimezone(timezone.utc).isoformat()
-
-
-def new_approval_id() -> str:
-    # acp-YYYYMMDD-HHMMSS
-    now = datetime.now(timezone.utc).astimezone()
-    return now.strftime("acp-%Y%m%d-%H%M%S")
+from aoi_core.acp.pipeline import DEFAULT_POLICY, ApprovalError, GateError, new_approval_id, run_pre_push
 
 
 def main() -> int:
     ap = argparse.ArgumentParser(description="Pre-push security gate: Gate -> Approval -> Proof (fail-closed)")
     ap.add_argument("--repo", default=".", help="git repo path")
     ap.add_argument("--commit", default="HEAD", help="commit/ref to scan")
-    ap.add_argument("--policy", default="aoi-core/state/acp_automation_policy_v0_1.json", help="policy path")
+    ap.add_argument("--policy", default=DEFAULT_POLICY, help="policy path")
+    ap.add_argument("--fail-fast", action="store_true", help="stop scanning once the signal is red")
     args = ap.parse_args()
 
     repo = Path(args.repo).resolve()
@@ -31,58 +24,33 @@ def main() -> int:
         print(f"[pre-push] Not a git repo: {repo}")
         return 2
 
-    # Run gate
-    gate_out = Path("/tmp") / "clawshield_pre_push_gate_report.json"
-    cmd_gate = [
-        "python3",
-        str(repo / "aoi-core" / "scripts" / "clawshield_gate_poc.py"),
-        "--repo",
-        str(repo),
-        "--commit",
-        args.commit,
-        "--out",
-        str(gate_out),
-    ]
-    res = subprocess.run(cmd_gate, capture_output=True, text=True)
-    print(res.stdout.rstrip())
-    if res.returncode != 0:
-        print(res.stderr.rstrip())
+    # Gate -> Approval -> Proof in this process; any failure blocks the push.
+    approval_id = new_approval_id()
+    try:
+        result = run_pre_push(repo, args.commit, policy=args.policy, approval_id=approval_id, fail_fast=args.fail_fast)
+    except GateError as e:
+        print(e)
         print("[pre-push] Gate execution failed. Blocking push.")
         return 1
-
-    # Convert to approval+proof
-    approval_id = new_approval_id()
-    cmd_conv = [
-        "python3",
-        str(repo / "aoi-core" / "scripts" / "gate_to_approval_and_proof.py"),
-        "--gate",
-        str(gate_out),
-        "--policy",
-        str(repo / args.policy),
-        "--id",
-        approval_id,
-        "--action",
-        "git_push",
-        "--provider",
-        "pre_push_gate",
-    ]
-    res2 = subprocess.run(cmd_conv, capture_output=True, text=True, cwd=str(repo))
-    print(res2.stdout.rstrip())
-    if res2.returncode != 0:
-        print(res2.stderr.rstrip())
+    except ApprovalError as e:
+        print(e)
         print("[pre-push] Failed to write approval/proof. Blocking push.")
         return 1
+    except Exception as e:
+        print(f"{type(e).__name__}: {e}")
+        print("[pre-push] Gate execution failed. Blocking push.")
+        return 1
 
-    # Parse signal from gate report by grepping stdout line OR reading file quickly (no json dependency)
-    try:
-        import json
-
-        gate = json.loads(gate_out.read_text(encoding="utf-8"))
-        signal = (gate.get("result") or {}).get("signal")
-        score = (gate.get("result") or {}).get("score")
-    except Exception:
-        signal = None
-        score = None
+    signal, score = result.signal, result.score
+    print("✅ clawshield_gate_poc: wrote")
+    print(f"- out: {result.report_path}")
+    print(f"- signal: {signal} (score {score})")
+    print("✅ wrote approval + proof")
+    print("- approval:", result.approval.approval_path)
+    print("- proofs:", result.approval.proofs_dir)
+    print("- gate_signal:", signal)
+    if result.approval.index_error:
+        print(f"[pre-push] ⚠️ approvals index not updated ({result.approval.index_error}); run: approvals_index.py rebuild")
 
     if signal == "red":
         print(f"[pre-push] ❌ BLOCKED: gate signal=red (score={score}).")
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from aoi_core.acp.approval_index import index_approval
+
+DEFAULT_APPROVALS_DIR = "aoi-core/state/approvals"
+DEFAULT_PROOFS_DIR = "aoi-core/state/proofs"
+PROOF_FILES = ["gate_report.json", "policy_snapshot.json", "inputs.json"]
+
+
+def utc_now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def sha256_bytes(b: bytes) -> str:
+    return hashlib.sha256(b).hexdigest()
+
+
+def read_json(p: Path) -> Any:
+    return json.loads(p.read_text(encoding="utf-8"))
+
+
+def dump_json(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False, indent=2)
+
+
+@dataclass
+class ApprovalResult:
+    approval: dict[str, Any]
+    approval_path: Path
+    proofs_dir: Path
+    index_error: str | None = None  # files were written; only the index update failed
+
+    @property
+    def signal(self) -> str | None:
+        return self.approval["dry_run_result"]["gate"]["signal"]
+
+
+def write_approval_and_proof(
+    gate: dict[str, Any],
+    policy: dict[str, Any],
+    *,
+    approval_id: str,
+    gate_path: Path,
+    policy_path: Path,
+    approvals_dir: Path,
+    proofs_root: Path,
+    action: str = "skill_update",
+    provider: str = "local",
+    index: Path | None = None,
+) -> ApprovalResult:
+    """Write the proof bundle <proofs_root>/<approval_id>/ and the approval
+    request <approvals_dir>/<approval_id>.json for a gate report.
+
+    `gate_path` and `policy_path` are only recorded in inputs.json; the
+    report and policy themselves are passed in already parsed. With `index`,
+    the approval is also upserted into that SQLite index (approval_index).
+    The files are the source of truth, so an index failure does not raise:
+    it is returned as `index_error` and `approvals_index.py rebuild` recovers.
+    """
+
+    proofs_dir = proofs_root / approval_id
+
+    signal = (gate.get("result") or {}).get("signal")
+    score = (gate.get("result") or {}).get("score")
+    max_sev = (gate.get("result") or {}).get("max_severity")
+
+    risk_level = "LOW"
+    if signal == "yellow":
+        risk_level = "MED"
+    elif signal == "red":
+        risk_level = "HIGH"
+
+    status = "PENDING_APPROVAL"
+    if signal == "red":
+        status = "BLOCKED"
+
+    # Build approval request (simple, compatible with our template)
+    approval = {
+        "id": approval_id,
+        "created_at": datetime.now(timezone.utc).astimezone().isoformat(),
+        "status": status,
+        "action": action,
+        "provider": provider,
+        "action_mode": "queue_for_approval",
+        "why_now": "Gate report generated; approval required to proceed.",
+        "risk_level": risk_level,
+        "cost_estimate": {"usd": 0, "fees_usd": 0, "slippage_bps": None},
+        "required_inputs": {"account": "", "wallet": "", "params": {"gate_signal": signal, "gate_score": score}},
+        "proof_plan": {
+            "logs": "aoi-core/state/proofs/<id>/",
+            "txhash": None,
+            "screenshots": [],
+            "sha256": None,
+        },
+        "dry_run_result": {"gate": {"signal": signal, "score": score, "max_severity": max_sev}},
+        "operator_notes": "auto-generated from gate_report.json",
+    }
+
+    inputs = {
+        "created_at": utc_now_iso(),
+        "gate_path": str(gate_path),
+        "policy_path": str(policy_path),
+        "action": action,
+        "provider": provider,
+    }
+
+    # Hash the bytes as they are written instead of reading the files back
+    bundle = {
+        "gate_report.json": dump_json(gate).encode("utf-8"),
+        "policy_snapshot.json": dump_json(policy).encode("utf-8"),
+        "inputs.json": dump_json(inputs).encode("utf-8"),
+    }
+    proofs_dir.mkdir(parents=True, exist_ok=True)
+    hashes: dict[str, str] = {}
+    for name in PROOF_FILES:
+        (proofs_dir / name).write_bytes(bundle[name])
+        hashes[name] = sha256_bytes(bundle[name])
+    (proofs_dir / "sha256.json").write_text(dump_json(hashes), encoding="utf-8")
+
+    approval["proof_plan"]["sha256"] = hashes
+
+    approvals_dir.mkdir(parents=True, exist_ok=True)
+    out_approval = approvals_dir / f"{approval_id}.json"
+    out_approval.write_text(dump_json(approval), encoding="utf-8")
+
+    index_error = None
+    if index is not None:
+        try:
+            index_approval(index, approval, gate, approval_path=out_approval, proofs_dir=proofs_dir)
+        except (sqlite3.Error, OSError) as e:
+            index_error = f"{type(e).__name__}: {e}"
+
+    return ApprovalResult(approval=approval, approval_path=out_approval, proofs_dir=proofs_dir, index_error=index_error)
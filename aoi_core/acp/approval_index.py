@@ -0,0 +1,295 @@
+"""SQLite index over aoi-core/state/approvals and aoi-core/state/proofs.
+
+The JSON files stay the source of truth; the index is updated in the same
+call that writes them (one transaction per approval) and can always be
+rebuilt from them with rebuild_index().
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+DEFAULT_INDEX = "aoi-core/state/approvals_index.sqlite3"
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS approvals (
+    id TEXT PRIMARY KEY,
+    created_at TEXT,
+    created_at_utc TEXT,
+    status TEXT,
+    risk_level TEXT,
+    signal TEXT,
+    score INTEGER,
+    max_severity TEXT,
+    action TEXT,
+    provider TEXT,
+    repo TEXT,
+    commit_ref TEXT,
+    commit_sha TEXT,
+    approval_path TEXT,
+    proofs_dir TEXT
+);
+CREATE TABLE IF NOT EXISTS proof_files (
+    approval_id TEXT NOT NULL REFERENCES approvals(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    PRIMARY KEY (approval_id, name)
+);
+CREATE INDEX IF NOT EXISTS approvals_status ON approvals(status, created_at_utc);
+CREATE INDEX IF NOT EXISTS approvals_risk_level ON approvals(risk_level, created_at_utc);
+CREATE INDEX IF NOT EXISTS approvals_signal ON approvals(signal, created_at_utc);
+CREATE INDEX IF NOT EXISTS approvals_action ON approvals(action, created_at_utc);
+CREATE INDEX IF NOT EXISTS approvals_provider ON approvals(provider, created_at_utc);
+CREATE INDEX IF NOT EXISTS approvals_created_at ON approvals(created_at_utc);
+CREATE INDEX IF NOT EXISTS approvals_commit_ref ON approvals(commit_ref);
+CREATE INDEX IF NOT EXISTS approvals_commit_sha ON approvals(commit_sha);
+CREATE INDEX IF NOT EXISTS proof_files_sha256 ON proof_files(sha256);
+"""
+
+COLUMNS = [
+    "id",
+    "created_at",
+    "created_at_utc",
+    "status",
+    "risk_level",
+    "signal",
+    "score",
+    "max_severity",
+    "action",
+    "provider",
+    "repo",
+    "commit_ref",
+    "commit_sha",
+    "approval_path",
+    "proofs_dir",
+]
+
+
+def to_utc(ts: str | None) -> str | None:
+    """ISO timestamp normalised to UTC, so text order is time order."""
+
+    if not ts:
+        return None
+    try:
+        dt = datetime.fromisoformat(ts)
+    except ValueError:
+        return None
+    return dt.astimezone(timezone.utc).isoformat()
+
+
+def parse_since(value: str) -> str:
+    """'7d', '12h', '30m' (ago) or an ISO date/datetime -> UTC ISO bound."""
+
+    if m := re.fullmatch(r"(\d+)([dhm])", value):
+        unit = {"d": "days", "h": "hours", "m": "minutes"}[m.group(2)]
+        return (datetime.now(timezone.utc) - timedelta(**{unit: int(m.group(1))})).isoformat()
+    utc = to_utc(value)
+    if utc is None:
+        raise ValueError(f"not a duration (7d, 12h, 30m) or ISO date: {value!r}")
+    return utc
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=30)
+    conn.row_factory = sqlite3.Row
+    # WAL: readers never block the writer (pre-push hooks and CI share the file)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.executescript(_SCHEMA)
+    conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+    return conn
+
+
+def approval_row(
+    approval: dict[str, Any],
+    gate: dict[str, Any] | None,
+    *,
+    approval_path: Path | None = None,
+    proofs_dir: Path | None = None,
+) -> dict[str, Any]:
+    gate_result = (approval.get("dry_run_result") or {}).get("gate") or {}
+    gate_input = (gate or {}).get("input") or {}
+    return {
+        "id": approval["id"],
+        "created_at": approval.get("created_at"),
+        "created_at_utc": to_utc(approval.get("created_at")),
+        "status": approval.get("status"),
+        "risk_level": approval.get("risk_level"),
+        "signal": gate_result.get("signal"),
+        "score": gate_result.get("score"),
+        "max_severity": gate_result.get("max_severity"),
+        "action": approval.get("action"),
+        "provider": approval.get("provider"),
+        "repo": gate_input.get("repo"),
+        "commit_ref": gate_input.get("commit"),
+        "commit_sha": gate_input.get("commit_sha"),
+        "approval_path": str(approval_path) if approval_path else None,
+        "proofs_dir": str(proofs_dir) if proofs_dir else None,
+    }
+
+
+def _upsert(conn: sqlite3.Connection, row: dict[str, Any], hashes: dict[str, str]) -> None:
+    conn.execute(
+        f"INSERT OR REPLACE INTO approvals ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+        [row[c] for c in COLUMNS],
+    )
+    conn.execute("DELETE FROM proof_files WHERE approval_id = ?", (row["id"],))
+    conn.executemany(
+        "INSERT INTO proof_files (approval_id, name, sha256) VALUES (?, ?, ?)",
+        [(row["id"], name, digest) for name, digest in sorted(hashes.items())],
+    )
+
+
+def index_approval(
+    index_path: Path,
+    approval: dict[str, Any],
+    gate: dict[str, Any] | None,
+    *,
+    approval_path: Path | None = None,
+    proofs_dir: Path | None = None,
+) -> None:
+    """Insert or replace one approval and its proof hashes in one transaction."""
+
+    row = approval_row(approval, gate, approval_path=approval_path, proofs_dir=proofs_dir)
+    hashes = (approval.get("proof_plan") or {}).get("sha256") or {}
+    conn = connect(index_path)
+    try:
+        with conn:
+            _upsert(conn, row, hashes)
+    finally:
+        conn.close()
+
+
+def _read_json(p: Path) -> Any:
+    return json.loads(p.read_text(encoding="utf-8"))
+
+
+def _gate_input(p: Path) -> dict[str, Any] | None:
+    """Just the "input" section of a gate report. It comes before the
+    findings, so only the head of large reports is parsed."""
+
+    if not p.exists():
+        return None
+    with p.open("r", encoding="utf-8") as f:
+        head = f.read(4096)
+    if m := re.search(r'"input":\s*(\{[^{}]*\})', head):
+        try:
+            return {"input": json.loads(m.group(1))}
+        except ValueError:
+            pass
+    return _read_json(p)
+
+
+def rebuild_index(index_path: Path, approvals_dir: Path, proofs_root: Path) -> tuple[int, list[str]]:
+    """Re-create the index from the files: (rows indexed, unreadable files).
+
+    The live database is emptied and refilled in one write transaction.
+    BEGIN IMMEDIATE is taken before the files are listed, so an approval
+    indexed concurrently either lands before the rebuild (and its file is
+    read) or waits for it and is applied on top. Readers keep the old
+    rows until the commit.
+    """
+
+    try:
+        conn = connect(index_path)
+    except sqlite3.DatabaseError as e:
+        if isinstance(e, sqlite3.OperationalError):
+            raise
+        # Not a database at all: nothing to preserve, start from an empty file
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{index_path}{suffix}").unlink(missing_ok=True)
+        conn = connect(index_path)
+    count, errors = 0, []
+    try:
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM proof_files")
+            conn.execute("DELETE FROM approvals")
+            for p in sorted(approvals_dir.glob("*.json")) if approvals_dir.is_dir() else []:
+                try:
+                    approval = _read_json(p)
+                    proofs_dir = proofs_root / approval["id"]
+                    gate = _gate_input(proofs_dir / "gate_report.json")
+                    hashes = (approval.get("proof_plan") or {}).get("sha256") or {}
+                    if not hashes and (proofs_dir / "sha256.json").exists():
+                        hashes = _read_json(proofs_dir / "sha256.json")
+                except (OSError, ValueError, KeyError, TypeError) as e:
+                    errors.append(f"{p}: {type(e).__name__}: {e}")
+                    continue
+                row = approval_row(approval, gate, approval_path=p.resolve(), proofs_dir=proofs_dir.resolve() if proofs_dir.exists() else None)
+                _upsert(conn, row, hashes)
+                count += 1
+    finally:
+        conn.close()
+    return count, errors
+
+
+def query_approvals(
+    index_path: Path,
+    *,
+    status: str | None = None,
+    risk_level: str | None = None,
+    signal: str | None = None,
+    action: str | None = None,
+    provider: str | None = None,
+    since: str | None = None,
+    until: str | None = None,
+    commit: str | None = None,
+    sha256: str | None = None,
+    limit: int | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Approvals matching every given filter, newest first, each with its
+    proof hashes under "sha256". `since`/`until` take parse_since() values;
+    `commit` matches the ref as given to the gate or a prefix of its sha."""
+
+    where: list[str] = []
+    params: list[Any] = []
+    for column, value in (
+        ("status", status),
+        ("risk_level", risk_level),
+        ("signal", signal),
+        ("action", action),
+        ("provider", provider),
+    ):
+        if value is not None:
+            where.append(f"a.{column} = ?")
+            params.append(value)
+    if since is not None:
+        where.append("a.created_at_utc >= ?")
+        params.append(parse_since(since))
+    if until is not None:
+        where.append("a.created_at_utc < ?")
+        params.append(parse_since(until))
+    if commit is not None:
+        # sha prefix as a range so the commit_sha index is used (hex sorts below "g")
+        where.append("(a.commit_ref = ? OR (a.commit_sha >= ? AND a.commit_sha < ?))")
+        params += [commit, commit.lower(), commit.lower() + "g"]
+    if sha256 is not None:
+        where.append("a.id IN (SELECT approval_id FROM proof_files WHERE sha256 = ?)")
+        params.append(sha256.lower())
+    sql = "SELECT a.* FROM approvals a"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY a.created_at_utc DESC, a.id DESC"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+
+    return _query_rows(index_path, sql, params)
+
+
+def _query_rows(index_path: Path, sql: str, params: list[Any]) -> Iterator[dict[str, Any]]:
+    conn = connect(index_path)
+    try:
+        for r in conn.execute(sql, params).fetchall():
+            hashes = conn.execute("SELECT name, sha256 FROM proof_files WHERE approval_id = ? ORDER BY name", (r["id"],))
+            yield {**dict(r), "sha256": {name: digest for name, digest in hashes}}
+    finally:
+        conn.close()
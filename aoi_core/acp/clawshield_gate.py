@@ -1,12 +1,25 @@
 from __future__ import annotations
 
+import fnmatch
 import hashlib
 import json
+import os
 import re
+import subprocess
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable, Iterator
+
+# Private parser API, used for match widths and group references. Without it
+# SecretMatcher searches pattern by pattern with the UNBOUNDED_MATCH_BYTES overlap.
+try:
+    from re import _parser as _sre_parse  # 3.11+
+except ImportError:  # pragma: no cover
+    try:
+        import sre_parse as _sre_parse  # type: ignore[no-redef]
+    except ImportError:
+        _sre_parse = None  # type: ignore[assignment]
 
 
 def utc_now() -> str:
@@ -39,115 +52,905 @@ DEFAULT_SECRET_PATTERNS: list[tuple[str, re.Pattern[str]]] = [
     ("PRIVATE_KEY_HEX", re.compile(r"0x[a-fA-F0-9]{64}")),
 ]
 
+_REGEX_META = set(".^$*+?{}[]|()")
+_QUANTIFIERS = set("*+?{")
+_INLINE_FLAGS = [(re.IGNORECASE, "i"), (re.MULTILINE, "m"), (re.DOTALL, "s"), (re.VERBOSE, "x")]
+
+SCAN_BLOCK_BYTES = 1 << 20
+BINARY_SNIFF_BYTES = 8000  # same window git uses to call a blob binary
+# Streamed scans keep this much of the previous block for patterns that can
+# match arbitrarily long text (`{20,}`): a match is reported as long as its
+# shortest matching prefix fits.
+UNBOUNDED_MATCH_BYTES = 4096
+
+
+def match_width(rx: re.Pattern[bytes]) -> int:
+    """Longest match of `rx` in bytes, with unbounded patterns capped at
+    max(their minimum width, UNBOUNDED_MATCH_BYTES)."""
+
+    if _sre_parse is None:
+        return UNBOUNDED_MATCH_BYTES
+    lo, hi = _sre_parse.parse(rx.pattern, rx.flags & ~re.UNICODE).getwidth()
+    return hi if hi < _sre_parse.MAXREPEAT else max(lo, UNBOUNDED_MATCH_BYTES)
+
+
+def uses_group_names_or_refs(rx: re.Pattern) -> bool:
+    """True if `rx` has named groups or refers to a group (`\\1`, `(?P=name)`,
+    `(?(1)...)`): both break once the pattern is joined into an alternation,
+    which renumbers its groups."""
+
+    if rx.groupindex:
+        return True
+    if _sre_parse is None:
+        return True
+    refs = (_sre_parse.GROUPREF, _sre_parse.GROUPREF_EXISTS)
+
+    def walk(node: Any) -> bool:
+        if isinstance(node, _sre_parse.SubPattern):
+            return any(op in refs or walk(av) for op, av in node)
+        if isinstance(node, (tuple, list)):
+            return any(walk(x) for x in node)
+        return False
+
+    return walk(_sre_parse.parse(rx.pattern, rx.flags & ~re.UNICODE))
+
+
+@dataclass
+class StreamScan:
+    hits: list[tuple[str, int, int]]
+    scanned_bytes: int
+    binary: bool = False
+    truncated: bool = False
+
+
+def split_literal_prefix(pattern: str) -> tuple[str, str]:
+    """(literal text every match starts with, rest of the pattern source)."""
+
+    if "|" in pattern:
+        return "", pattern
+    out: list[str] = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            if i + 1 >= len(pattern) or pattern[i + 1].isalnum():
+                break
+            c, step = pattern[i + 1], 2
+        elif c in _REGEX_META:
+            break
+        else:
+            step = 1
+        if i + step < len(pattern) and pattern[i + step] in _QUANTIFIERS:
+            break  # the quantifier may repeat or drop this character
+        out.append(c)
+        i += step
+    return "".join(out), pattern[i:]
+
+
+class SecretMatcher:
+    """All secret patterns compiled into one regex for a single pass over bytes.
+
+    Patterns are wrapped in named groups (`p<index>`) and merged into one
+    alternation. Those with a literal prefix (`AKIA`, `sk-`, `0x`, ...) are
+    factored into a trie on that prefix, so the regex engine skips bytes that
+    cannot start a prefix and compares each candidate position against a
+    handful of trie branches instead of every pattern. Python only runs on
+    actual matches, where the other patterns are re-checked at that position.
+    Patterns with named groups or group references are searched on their own
+    (`isolated`), since joining them would renumber their groups.
+    """
+
+    def __init__(self, patterns: list[tuple[str, re.Pattern[str]]] = DEFAULT_SECRET_PATTERNS):
+        self.labels = [label for label, _ in patterns]
+        self.rule_pack = [(label, rx.pattern, int(rx.flags)) for label, rx in patterns]
+        self.compiled: list[re.Pattern[bytes]] = []
+        self.by_prefix: dict[bytes, list[int]] = {}
+        self.unprefixed: list[int] = []
+        self.isolated: list[int] = []
+        trie: dict = {}
+        alternatives: list[bytes] = []
+        for i, (_, pat) in enumerate(patterns):
+            flags = pat.flags & (re.IGNORECASE | re.MULTILINE | re.DOTALL | re.VERBOSE)
+            self.compiled.append(re.compile(pat.pattern.encode("utf-8"), flags))
+            if uses_group_names_or_refs(self.compiled[-1]):
+                self.isolated.append(i)
+                continue
+            inline = "".join(c for f, c in _INLINE_FLAGS if flags & f)
+            prefix, rest = ("", pat.pattern) if flags & (re.IGNORECASE | re.VERBOSE) else split_literal_prefix(pat.pattern)
+            body = rest.encode("utf-8")
+            group = b"(?P<p%d>%s)" % (i, b"(?%s:%s)" % (inline.encode(), body) if inline else body)
+            if prefix:
+                key = prefix.encode("utf-8")
+                self.by_prefix.setdefault(key, []).append(i)
+                node = trie
+                for byte in key:
+                    node = node.setdefault(byte, {})
+                node.setdefault(None, []).append(group)
+            else:
+                self.unprefixed.append(i)
+                alternatives.append(group)
+
+        self.prefix_lengths = sorted({len(p) for p in self.by_prefix})
+        self.overlap = max((match_width(rx) for rx in self.compiled), default=0)
+        if trie:
+            alternatives.insert(0, self._emit(trie))
+        try:
+            self.combined = re.compile(b"|".join(alternatives)) if alternatives else None
+        except re.error:
+            self.combined = None  # e.g. clashing group names: fall back to one search per pattern
+            self.fallback = True
+        else:
+            self.fallback = False
+            self.group_pattern = {idx: int(name[1:]) for name, idx in (self.combined.groupindex if self.combined else {}).items() if re.fullmatch(r"p\d+", name)}
+
+    @classmethod
+    def _emit(cls, node: dict) -> bytes:
+        branches = [re.escape(bytes([k])) + cls._emit(v) for k, v in sorted((k, v) for k, v in node.items() if k is not None)]
+        branches += node.get(None, [])
+        return branches[0] if len(branches) == 1 else b"(?:" + b"|".join(branches) + b")"
+
+    def _candidates(self, data: bytes, start: int) -> list[int]:
+        found = [i for n in self.prefix_lengths for i in self.by_prefix.get(data[start : start + n], ())]
+        return sorted(found + self.unprefixed)
+
+    def _window(self, buf: bytes, pos: int, limit: int, skip: dict[int, Any]) -> dict[int, int]:
+        """First match of each pattern not in `skip` that starts in buf[pos:limit].
+
+        The bytes before `pos` are only context (lookbehind, `\\b`); matches may
+        run past `limit` to the end of `buf`.
+        """
+
+        first: dict[int, int] = {}
+        solo = range(len(self.compiled)) if self.fallback else self.isolated
+        for i in solo:
+            if i not in skip and (m := self.compiled[i].search(buf, pos)) and m.start() < limit:
+                first[i] = m.start()
+        if not self.fallback and self.combined is not None:
+            # Isolated patterns were searched above; stop once every joined one has matched
+            pending = len(self.labels) - len(self.isolated) - sum(i not in self.isolated for i in skip)
+            while pending and (m := self.combined.search(buf, pos)) and m.start() < limit:
+                start = m.start()
+                i = self.group_pattern[m.lastindex]
+                if i not in skip and i not in first:
+                    first[i] = start
+                    pending -= 1
+                # The alternation reports one pattern per position; others may match there too
+                for i in self._candidates(buf, start):
+                    if i not in first and i not in skip and self.compiled[i].match(buf, start):
+                        first[i] = start
+                        pending -= 1
+                pos = start + 1
+        return first
+
+    def scan(self, data: bytes) -> list[tuple[str, int, int]]:
+        """(label, line, byte offset) of the first match of each pattern, in pattern order."""
+
+        first = self._window(data, 0, len(data), {})
+        return [(self.labels[i], data.count(b"\n", 0, first[i]) + 1, first[i]) for i in sorted(first)]
+
+    def scan_stream(self, blocks: Iterable[bytes], budget: int | None = None) -> StreamScan:
+        """scan() over a file delivered in blocks, in memory bounded by one
+        block plus twice `overlap`.
+
+        Each window only accepts matches starting at least `overlap` bytes
+        before its end, so no match is cut by a block boundary; the tail is
+        carried into the next window. A NUL byte in the first
+        BINARY_SNIFF_BYTES marks the file binary and stops the scan. At most
+        `budget` bytes are scanned; `truncated` says the file had more.
+        """
+
+        found: dict[int, tuple[int, int]] = {}  # pattern -> (line, offset)
+        buf = b""
+        base = lines = pos = total = 0
+        truncated = final = False
+        blocks = iter(blocks)
+        while not final:
+            block = next(blocks, None)
+            if block is None:
+                final = True
+            elif not block:
+                continue
+            else:
+                if total == 0 and b"\0" in block[:BINARY_SNIFF_BYTES]:
+                    return StreamScan([], len(block), binary=True)
+                if budget is not None and total + len(block) > budget:
+                    block = block[: budget - total]
+                    truncated = final = True
+                total += len(block)
+                buf = buf + block if buf else block
+
+            limit = len(buf) if final else len(buf) - self.overlap
+            if limit <= pos:
+                continue
+            for i, off in self._window(buf, pos, limit, found).items():
+                found[i] = (lines + buf.count(b"\n", 0, off) + 1, base + off)
+            if len(found) == len(self.labels):
+                break
+            drop = max(0, limit - self.overlap)
+            lines += buf.count(b"\n", 0, drop)
+            buf, base, pos = buf[drop:], base + drop, limit - drop
+
+        hits = [(self.labels[i], *found[i]) for i in sorted(found)]
+        return StreamScan(hits, total, truncated=truncated)
+
+
+DEFAULT_SECRET_MATCHER = SecretMatcher()
+
+
+DEFAULT_EXCLUDES = ("node_modules", ".git", ".venv", "venv")
+TEXT_EXT_ALLOW = frozenset({".py", ".ts", ".js", ".json", ".md", ".sh", ".yaml", ".yml", ".toml", ".env", ""})
+MAX_SCAN_BYTES = 64 << 20  # per-file budget; larger files get a "truncated" info finding
+
+
+def _suffix(name: str) -> str:
+    # Same rule as PurePath.suffix, without building a Path per entry
+    i = name.rfind(".")
+    return name[i:] if 0 < i < len(name) - 1 else ""
+
 
-def scan_repo_snapshot(repo_dir: Path) -> list[GateFinding]:
-    findings: list[GateFinding] = []
+def _gitignore_regex(pattern: str) -> str:
+    out, i = [], 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            out.append("/.*")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and (j := pattern.find("]", i + 2)) != -1:
+            body = pattern[i + 1 : j]
+            out.append("[" + ("^" + body[1:] if body[0] in "!^" else body).replace("\\", "\\\\") + "]")
+            i = j + 1
+        elif pattern[i] == "\\" and i + 1 < len(pattern):
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(out)
+
+
+@dataclass
+class IgnoreRule:
+    regex: re.Pattern[str]
+    base: str  # directory of the .gitignore, relative to the repo root ("" for the root)
+    anchored: bool  # pattern contains a "/": matched against the path below `base`
+    negate: bool
+    dir_only: bool
+
+    def matches(self, rel: str, name: str, is_dir: bool) -> bool:
+        if self.dir_only and not is_dir:
+            return False
+        if self.base and not rel.startswith(self.base + "/"):
+            return False
+        return bool(self.regex.fullmatch(rel[len(self.base) + 1 :] if self.base else rel) if self.anchored else self.regex.fullmatch(name))
+
+
+def parse_gitignore(text: str, base: str = "") -> list[IgnoreRule]:
+    """The common subset of gitignore(5): comments, `!` negation, trailing `/`
+    for directories, `/`-anchored patterns, and `*`, `?`, `[...]`, `**` globs."""
+
+    rules = []
+    for line in text.splitlines():
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        anchored = "/" in line
+        rules.append(IgnoreRule(re.compile(_gitignore_regex(line.lstrip("/"))), base, anchored, negate, dir_only))
+    return rules
+
+
+def _ignored(rules: list[IgnoreRule], rel: str, name: str, is_dir: bool) -> bool:
+    ignored = False
+    for rule in rules:
+        if rule.matches(rel, name, is_dir):
+            ignored = not rule.negate
+    return ignored
+
+
+def walk_repo_files(
+    repo_dir: Path,
+    *,
+    exclude: Iterable[str] = DEFAULT_EXCLUDES,
+    extensions: Iterable[str] | None = TEXT_EXT_ALLOW,
+    gitignore: bool = True,
+    follow_symlinks: bool = False,
+) -> Iterator[tuple[str, os.DirEntry[str]]]:
+    """Yield (posix path relative to repo_dir, DirEntry) for candidate files.
+
+    The order is deterministic: depth-first, a directory's files before its
+    subdirectories, each by name. Excluded names (fnmatch globs) and
+    gitignored directories are pruned before they are listed, and the
+    extension filter runs on names alone (no stat). With `follow_symlinks`,
+    every directory is visited at most once, so symlink loops terminate.
+    """
+
+    exclude = tuple(exclude)
+    exts = None if extensions is None else frozenset(extensions)
+    seen: set[tuple[int, int]] = set()
+    root_stat = os.stat(repo_dir)
+    seen.add((root_stat.st_dev, root_stat.st_ino))
+
+    def excluded(name: str) -> bool:
+        return any(name == pat or fnmatch.fnmatchcase(name, pat) for pat in exclude)
+
+    stack: list[tuple[str, str, list[IgnoreRule]]] = [(str(repo_dir), "", [])]
+    while stack:
+        path, rel_dir, rules = stack.pop()
+        try:
+            with os.scandir(path) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        if gitignore and any(e.name == ".gitignore" for e in entries):
+            try:
+                with open(os.path.join(path, ".gitignore"), encoding="utf-8", errors="ignore") as f:
+                    rules = rules + parse_gitignore(f.read(), rel_dir)
+            except OSError:
+                pass
+
+        subdirs = []
+        for entry in entries:
+            if excluded(entry.name):
+                continue
+            rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=follow_symlinks)
+            except OSError:
+                continue
+            if is_dir:
+                if rules and _ignored(rules, rel, entry.name, True):
+                    continue
+                if follow_symlinks:
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    if (st.st_dev, st.st_ino) in seen:
+                        continue  # symlink loop or a directory already walked
+                    seen.add((st.st_dev, st.st_ino))
+                subdirs.append((entry.path, rel, rules))
+                continue
+            if exts is not None and _suffix(entry.name) not in exts:
+                continue
+            if rules and _ignored(rules, rel, entry.name, False):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+            except OSError:
+                continue
+            yield rel, entry
+        stack.extend(reversed(subdirs))
+
+
+def _excluded_path(rel: str, exclude: tuple[str, ...]) -> bool:
+    return any(part == pat or fnmatch.fnmatchcase(part, pat) for part in rel.split("/") for pat in exclude)
+
+
+class WorktreeSource:
+    """Files as they are on disk, found with walk_repo_files()."""
+
+    def __init__(self, repo_dir: Path, *, exclude: Iterable[str] = DEFAULT_EXCLUDES, gitignore: bool = True):
+        self.repo_dir = repo_dir
+        self.exclude = tuple(exclude)
+        self.gitignore = gitignore
+
+    def __enter__(self) -> WorktreeSource:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        pass
+
+    def exists(self, rel: str) -> bool:
+        return (self.repo_dir / rel).exists()
+
+    def read_text(self, rel: str) -> str:
+        return (self.repo_dir / rel).read_text(encoding="utf-8")
+
+    def scan_blobs(self, matcher: SecretMatcher, workers: int = 1) -> Iterator[tuple[str, list[tuple[str, int, int]], bool]]:
+        """(path, hits, truncated) for every non-binary file to scan."""
+
+        files = ((rel, entry.path) for rel, entry in walk_repo_files(self.repo_dir, exclude=self.exclude, gitignore=self.gitignore))
+        if workers > 1:
+            listed = list(files)
+            scanned = zip((rel for rel, _ in listed), scan_parallel([path for _, path in listed], matcher, workers))
+        else:
+            scanned = ((rel, _scan_file(path, matcher)) for rel, path in files)
+        for rel, result in scanned:
+            if result is not None and not result.binary:
+                yield rel, result.hits, result.truncated
+
+
+def _scan_file(path: str, matcher: SecretMatcher) -> StreamScan | None:
+    try:
+        with open(path, "rb") as f:
+            return matcher.scan_stream(iter(lambda: f.read(SCAN_BLOCK_BYTES), b""), MAX_SCAN_BYTES)
+    except OSError:
+        return None
+
+
+class GitCatFile:
+    """One long-lived `git cat-file --batch` process for reading many objects."""
+
+    def __init__(self, repo_dir: Path):
+        self.proc = subprocess.Popen(
+            ["git", "-C", str(repo_dir), "cat-file", "--batch"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+
+    def close(self) -> None:
+        # Closing stdout first stops git if responses are still pending
+        self.proc.stdout.close()
+        try:
+            self.proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        self.proc.wait()
+
+    def _header(self, sha: str) -> int:
+        header = self.proc.stdout.readline().split()
+        if len(header) != 3:
+            raise LookupError(f"git object {sha} is missing ({b' '.join(header).decode(errors='replace')})")
+        return int(header[2])
+
+    def _read_exact(self, n: int) -> bytes:
+        data = self.proc.stdout.read(n)
+        if len(data) != n:
+            raise EOFError("git cat-file exited early")
+        return data
+
+    def read(self, sha: str) -> bytes:
+        self.proc.stdin.write(sha.encode("ascii") + b"\n")
+        self.proc.stdin.flush()
+        data = self._read_exact(self._header(sha))
+        self._read_exact(1)  # trailing LF
+        return data
+
+    def stream_many(self, shas: list[str], block_size: int = SCAN_BLOCK_BYTES) -> Iterator[tuple[str, int, Iterator[bytes]]]:
+        """(sha, size, blocks) per object, pipelined: requests are written by a
+        helper thread while the responses are consumed, so git never waits for
+        a round trip. Whatever the caller leaves of `blocks` is skipped before
+        the next object."""
+
+        import threading
+
+        def feed() -> None:
+            try:
+                self.proc.stdin.write(b"".join(sha.encode("ascii") + b"\n" for sha in shas))
+                self.proc.stdin.flush()
+            except (BrokenPipeError, ValueError):
+                pass  # reader gave up early; close() reaps the process
+
+        writer = threading.Thread(target=feed, daemon=True)
+        writer.start()
+        for sha in shas:
+            left = self._header(sha)
+
+            def blocks() -> Iterator[bytes]:
+                nonlocal left
+                while left:
+                    data = self._read_exact(min(block_size, left))
+                    left -= len(data)
+                    yield data
+
+            yield sha, left, blocks()
+            for _ in blocks():
+                pass
+            self._read_exact(1)  # trailing LF
+        writer.join()
+
+
+def rule_pack_version(matcher: SecretMatcher) -> str:
+    """Digest of everything that decides a blob's secret findings; cached
+    findings from a different rule pack are never reused."""
+
+    pack = {"patterns": matcher.rule_pack, "max_scan_bytes": MAX_SCAN_BYTES, "binary_sniff_bytes": BINARY_SNIFF_BYTES}
+    return sha256_text(json.dumps(pack, sort_keys=True))
+
+
+def default_cache_path(repo_dir: Path) -> Path:
+    """<git common dir>/clawshield/findings-cache.json, shared by worktrees."""
+
+    common = subprocess.check_output(["git", "-C", str(repo_dir), "rev-parse", "--git-common-dir"], text=True).strip()
+    return (repo_dir / common).resolve() / "clawshield" / "findings-cache.json"
+
+
+class FindingsCache:
+    """Per-blob secret findings keyed by git blob sha, plus the tree of the
+    last scanned commit so the next scan can diff against it.
+
+    `blobs` maps sha -> [[[label, line, offset], ...], truncated], or None
+    for binary blobs. Blob findings do not depend on the path, so a file that
+    is renamed or copied is not rescanned either.
+    """
+
+    SCHEMA = "aoi.acp.clawshield_gate.findings_cache.v0.2"
+
+    def __init__(self, path: Path, rule_pack: str):
+        self.path = path
+        self.rule_pack = rule_pack
+        self.commit: str | None = None
+        self.tree: dict[str, str] = {}
+        self.blobs: dict[str, list[Any] | None] = {}
+        try:
+            j = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if j.get("schema") != self.SCHEMA or j.get("rule_pack") != rule_pack:
+            return
+        self.commit = j.get("commit")
+        self.tree = j.get("tree") or {}
+        self.blobs = j.get("blobs") or {}
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        body = {"schema": self.SCHEMA, "rule_pack": self.rule_pack, "commit": self.commit, "tree": self.tree, "blobs": self.blobs}
+        tmp.write_text(json.dumps(body, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+class GitTreeSource:
+    """Files of one commit, read from the object database: no checkout, no
+    working-tree reads. Tracked files are scanned whether or not they are
+    gitignored; symlinks and submodules are skipped.
+
+    With a FindingsCache, the tree is derived by applying `git diff-tree`
+    from the cached commit, and only blobs the cache has not seen are read
+    and scanned.
+    """
+
+    def __init__(
+        self,
+        repo_dir: Path,
+        commit: str,
+        *,
+        exclude: Iterable[str] = DEFAULT_EXCLUDES,
+        cache: FindingsCache | None = None,
+    ):
+        self.repo_dir = repo_dir
+        self.commit = commit
+        self.exclude = tuple(exclude)
+        self.cache = cache
+        self.sha = self._git("rev-parse", "--verify", f"{commit}^{{commit}}").decode("ascii").strip()
+        self.tree: dict[str, str] = {}  # path -> blob sha, in git path order
+        if cache is None or not cache.commit or not self._apply_diff(cache):
+            self._list_tree()
+        self.cat = GitCatFile(repo_dir)
+
+    def _git(self, *args: str) -> bytes:
+        return subprocess.check_output(["git", "-C", str(self.repo_dir), *args], stderr=subprocess.PIPE)
+
+    def _list_tree(self) -> None:
+        listing = self._git("ls-tree", "-r", "-z", "--full-tree", self.sha)
+        for record in listing.split(b"\0"):
+            meta, _, path = record.partition(b"\t")
+            if not path:
+                continue
+            mode, kind, sha = meta.split()
+            if kind != b"blob" or mode == b"120000":
+                continue
+            self.tree[path.decode("utf-8", errors="replace")] = sha.decode("ascii")
+
+    def _apply_diff(self, cache: FindingsCache) -> bool:
+        """Rebuild the tree from the cached one plus the diff; False when the
+        cached commit is no longer available."""
+
+        try:
+            raw = self._git("diff-tree", "-r", "-z", "--no-renames", cache.commit, self.sha)
+        except subprocess.CalledProcessError:
+            return False
+        tree = dict(cache.tree)
+        fields = raw.split(b"\0")
+        for meta, path in zip(fields[0::2], fields[1::2]):
+            _, new_mode, _, new_sha, status = meta.lstrip(b":").split()
+            rel = path.decode("utf-8", errors="replace")
+            if status == b"D" or new_mode in (b"120000", b"160000"):
+                tree.pop(rel, None)
+            else:
+                tree[rel] = new_sha.decode("ascii")
+        # Same order as ls-tree -r: full paths compared as bytes
+        self.tree = dict(sorted(tree.items(), key=lambda kv: kv[0].encode("utf-8", errors="surrogateescape")))
+        return True
+
+    def __enter__(self) -> GitTreeSource:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.cat.close()
+
+    def exists(self, rel: str) -> bool:
+        return rel in self.tree
+
+    def read_text(self, rel: str) -> str:
+        return self.cat.read(self.tree[rel]).decode("utf-8")
+
+    def _picked(self) -> list[tuple[str, str]]:
+        return [
+            (rel, sha)
+            for rel, sha in self.tree.items()
+            if _suffix(rel.rpartition("/")[2]) in TEXT_EXT_ALLOW and not _excluded_path(rel, self.exclude)
+        ]
+
+    def scan_blobs(self, matcher: SecretMatcher, workers: int = 1) -> Iterator[tuple[str, list[tuple[str, int, int]], bool]]:
+        """(path, hits, truncated) for every non-binary blob to scan, in tree
+        order. Each distinct blob is streamed through the matcher once."""
+
+        picked = self._picked()
+        known = self.cache.blobs if self.cache is not None else {}
+        todo = [sha for sha in dict.fromkeys(sha for _, sha in picked) if sha not in known]
+        # todo is in first-use order, so the results line up with the walk below
+        if workers > 1 and len(todo) > 1:
+            stream: Iterator[StreamScan | None] = scan_parallel(todo, matcher, workers, self.repo_dir)
+        else:
+            stream = (matcher.scan_stream(blocks, MAX_SCAN_BYTES) for _, _, blocks in self.cat.stream_many(todo))
+        try:
+            for rel, sha in picked:
+                if sha not in known:
+                    result = next(stream)
+                    known[sha] = None if result.binary else [[list(hit) for hit in result.hits], result.truncated]
+                if (entry := known[sha]) is not None:
+                    yield rel, [tuple(hit) for hit in entry[0]], entry[1]
+            for _ in stream:
+                pass
+        except GeneratorExit:
+            # Stopped early (fail-fast): what was scanned is still valid
+            stream.close()
+            self._save_cache(picked, known)
+            raise
+        self._save_cache(picked, known)
+
+    def _save_cache(self, picked: list[tuple[str, str]], known: dict[str, list[Any] | None]) -> None:
+        if self.cache is None:
+            return
+        # Only keep what this tree still references, so the cache stays the
+        # size of one snapshot.
+        self.cache.blobs = {sha: known[sha] for _, sha in picked if sha in known}
+        self.cache.tree = dict(self.tree)
+        self.cache.commit = self.sha
+        self.cache.save()
+
+
+SCAN_BATCH_FILES = 64
+_SCAN_WORKER: dict[str, Any] = {}
+
+
+def _scan_worker_init(matcher: SecretMatcher, repo_dir: Path | None) -> None:
+    _SCAN_WORKER["matcher"] = matcher
+    # Each worker reads blobs through its own cat-file; git exits when the
+    # worker does and its stdin closes.
+    _SCAN_WORKER["cat"] = GitCatFile(repo_dir) if repo_dir is not None else None
+
+
+def _scan_batch(keys: list[str]) -> list[StreamScan | None]:
+    matcher, cat = _SCAN_WORKER["matcher"], _SCAN_WORKER["cat"]
+    if cat is None:
+        return [_scan_file(path, matcher) for path in keys]
+    return [matcher.scan_stream(blocks, MAX_SCAN_BYTES) for _, _, blocks in cat.stream_many(keys)]
+
+
+def scan_parallel(keys: list[str], matcher: SecretMatcher, workers: int, repo_dir: Path | None = None) -> Iterator[StreamScan | None]:
+    """One StreamScan per key, in key order, computed by a process pool.
+
+    Keys are file paths, or blob shas of `repo_dir` when it is given. They
+    are sent in batches of up to SCAN_BATCH_FILES (smaller when that would
+    leave workers idle); pool.map returns the batches in submission order,
+    so the merge is deterministic whatever order they finish in.
+    """
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    if not keys:
+        return
+    size = max(1, min(SCAN_BATCH_FILES, -(-len(keys) // (workers * 4))))
+    batches = [keys[i : i + size] for i in range(0, len(keys), size)]
+    pool = ProcessPoolExecutor(max_workers=min(workers, len(batches)), initializer=_scan_worker_init, initargs=(matcher, repo_dir))
+    try:
+        for results in pool.map(_scan_batch, batches):
+            yield from results
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def scan_repo_snapshot(
+    repo_dir: Path,
+    matcher: SecretMatcher = DEFAULT_SECRET_MATCHER,
+    *,
+    exclude: Iterable[str] = DEFAULT_EXCLUDES,
+    gitignore: bool = True,
+    commit: str | None = None,
+    cache_path: Path | None = None,
+    workers: int = 1,
+) -> list[GateFinding]:
+    """Scan the working tree, or with `commit`, that commit's tree from the
+    git object database (gitignore does not apply to tracked files).
+
+    `cache_path` (git source only) enables the incremental FindingsCache;
+    the findings are the same as a full scan. `workers` > 1 scans files in a
+    process pool; the findings and their order do not change.
+    """
+
+    return list(iter_repo_findings(repo_dir, matcher, exclude=exclude, gitignore=gitignore, commit=commit, cache_path=cache_path, workers=workers))
+
+
+def iter_repo_findings(
+    repo_dir: Path,
+    matcher: SecretMatcher = DEFAULT_SECRET_MATCHER,
+    *,
+    exclude: Iterable[str] = DEFAULT_EXCLUDES,
+    gitignore: bool = True,
+    commit: str | None = None,
+    cache_path: Path | None = None,
+    workers: int = 1,
+) -> Iterator[GateFinding]:
+    """scan_repo_snapshot() as a generator: nothing is accumulated, and
+    closing it early stops git, the worker pool and the file walk."""
+
+    if commit is None:
+        source: WorktreeSource | GitTreeSource = WorktreeSource(repo_dir, exclude=exclude, gitignore=gitignore)
+    else:
+        cache = FindingsCache(cache_path, rule_pack_version(matcher)) if cache_path is not None else None
+        source = GitTreeSource(repo_dir, commit, exclude=exclude, cache=cache)
+    with source:
+        yield from iter_findings(source, matcher, workers)
+
+
+def scan_source(
+    source: WorktreeSource | GitTreeSource,
+    matcher: SecretMatcher = DEFAULT_SECRET_MATCHER,
+    workers: int = 1,
+) -> list[GateFinding]:
+    return list(iter_findings(source, matcher, workers))
+
+
+def iter_findings(
+    source: WorktreeSource | GitTreeSource,
+    matcher: SecretMatcher = DEFAULT_SECRET_MATCHER,
+    workers: int = 1,
+) -> Iterator[GateFinding]:
+    """Findings in report order, yielded as soon as each is known. The cheap
+    repo-level checks come first; closing the generator stops the scan."""
 
     lockfiles = ["package-lock.json", "pnpm-lock.yaml", "yarn.lock", "poetry.lock", "uv.lock", "Cargo.lock"]
-    has_lock = any((repo_dir / lf).exists() for lf in lockfiles)
+    has_lock = any(source.exists(lf) for lf in lockfiles)
     if not has_lock:
-        findings.append(
-            GateFinding(
-                rule_id="repro.lockfile.missing",
-                severity="med",
-                message="No common lockfile detected (reproducibility risk).",
-                evidence={"checked": lockfiles},
-            )
+        yield GateFinding(
+            rule_id="repro.lockfile.missing",
+            severity="med",
+            message="No common lockfile detected (reproducibility risk).",
+            evidence={"checked": lockfiles},
         )
 
-    pkg = repo_dir / "package.json"
-    if pkg.exists():
+    if source.exists("package.json"):
         try:
-            j = json.loads(pkg.read_text(encoding="utf-8"))
+            j = json.loads(source.read_text("package.json"))
             scripts = (j.get("scripts") or {})
             suspicious = []
             for name, cmd in scripts.items():
                 if isinstance(cmd, str) and any(x in cmd.lower() for x in ["curl ", "wget ", "bash -c", "sh -c", "powershell", "nc "]):
                     suspicious.append({"name": name, "cmd": cmd})
             if suspicious:
-                findings.append(
-                    GateFinding(
-                        rule_id="pkg.scripts.suspicious",
-                        severity="high",
-                        message="Suspicious package.json scripts detected.",
-                        evidence={"scripts": suspicious},
-                    )
+                yield GateFinding(
+                    rule_id="pkg.scripts.suspicious",
+                    severity="high",
+                    message="Suspicious package.json scripts detected.",
+                    evidence={"scripts": suspicious},
                 )
         except Exception as e:
-            findings.append(
-                GateFinding(
-                    rule_id="pkg.json.parse_error",
-                    severity="low",
-                    message=f"package.json parse error: {e}",
-                )
+            yield GateFinding(
+                rule_id="pkg.json.parse_error",
+                severity="low",
+                message=f"package.json parse error: {e}",
             )
 
-    max_bytes = 200_000
-    text_ext_allow = {".py", ".ts", ".js", ".json", ".md", ".sh", ".yaml", ".yml", ".toml", ".env", ""}
+    for rel, hits, truncated in source.scan_blobs(matcher, workers):
+        for label, line, offset in hits:
+            yield GateFinding(
+                rule_id="secrets.pattern.match",
+                severity="high",
+                message=f"Potential secret detected ({label}) in file {rel}.",
+                evidence={"file": rel, "pattern": label, "line": line, "offset": offset},
+            )
+        if truncated:
+            yield GateFinding(
+                rule_id="secrets.scan.truncated",
+                severity="info",
+                message=f"Secret scan of file {rel} stopped at the {MAX_SCAN_BYTES}-byte budget.",
+                evidence={"file": rel, "scanned_bytes": MAX_SCAN_BYTES},
+            )
 
-    for p in repo_dir.rglob("*"):
-        if not p.is_file():
-            continue
-        if any(part in {"node_modules", ".git", ".venv", "venv"} for part in p.parts):
-            continue
-        try:
-            if p.stat().st_size > max_bytes:
-                continue
-        except FileNotFoundError:
-            continue
 
-        if p.suffix not in text_ext_allow and p.name not in {".env"}:
-            continue
+class ScoreTracker:
+    """score_findings() kept up to date one finding at a time."""
 
-        try:
-            content = p.read_text(encoding="utf-8", errors="ignore")
-        except Exception:
-            continue
+    WEIGHTS = {"info": 0, "low": 10, "med": 25, "high": 60}
 
-        for label, pat in DEFAULT_SECRET_PATTERNS:
-            if pat.search(content):
-                findings.append(
-                    GateFinding(
-                        rule_id="secrets.pattern.match",
-                        severity="high",
-                        message=f"Potential secret detected ({label}) in file {p.relative_to(repo_dir)}.",
-                        evidence={"file": str(p.relative_to(repo_dir)), "pattern": label},
-                    )
-                )
+    def __init__(self) -> None:
+        self.raw = 100
+        self.max_sev = "info"
+        self.count = 0
+
+    def add(self, f: GateFinding) -> None:
+        weights = self.WEIGHTS
+        self.count += 1
+        self.raw -= weights.get(f.severity, 10)
+        if weights.get(f.severity, 0) > weights.get(self.max_sev, 0):
+            self.max_sev = f.severity
+
+    def result(self) -> dict[str, Any]:
+        score = max(0, min(100, self.raw))
+
+        if self.max_sev == "high" or score < 60:
+            signal = "red"
+        elif score < 85:
+            signal = "yellow"
+        else:
+            signal = "green"
 
-    return findings
+        return {"score": score, "signal": signal, "max_severity": self.max_sev}
 
+    @property
+    def decided(self) -> bool:
+        """True once the signal is red. The score only goes down and the max
+        severity only up, so no further finding can change that verdict."""
 
-def score_findings(findings: list[GateFinding]) -> dict[str, Any]:
-    weights = {"info": 0, "low": 10, "med": 25, "high": 60}
-    score = 100
-    max_sev = "info"
+        return self.max_sev == "high" or max(0, self.raw) < 60
+
+
+def score_findings(findings: Iterable[GateFinding]) -> dict[str, Any]:
+    tracker = ScoreTracker()
     for f in findings:
-        score -= weights.get(f.severity, 10)
-        if weights.get(f.severity, 0) > weights.get(max_sev, 0):
-            max_sev = f.severity
-    score = max(0, min(100, score))
-
-    if max_sev == "high" or score < 60:
-        signal = "red"
-    elif score < 85:
-        signal = "yellow"
-    else:
-        signal = "green"
+        tracker.add(f)
+    return tracker.result()
+
+
+def finding_record(f: GateFinding) -> dict[str, Any]:
+    return {"rule_id": f.rule_id, "severity": f.severity, "message": f.message, "evidence": f.evidence}
 
-    return {"score": score, "signal": signal, "max_severity": max_sev}
 
+def make_report(
+    *,
+    repo: str,
+    commit: str,
+    findings: list[GateFinding],
+    result: dict[str, Any] | None = None,
+    scan: dict[str, Any] | None = None,
+    commit_sha: str | None = None,
+) -> dict[str, Any]:
+    """The gate report. `result` overrides score_findings(findings) (e.g. a
+    ScoreTracker's when findings were not kept); `scan` describes an
+    incomplete scan and is omitted for complete ones. `commit_sha` records
+    what `commit` resolved to."""
 
-def make_report(*, repo: str, commit: str, findings: list[GateFinding]) -> dict[str, Any]:
-    scored = score_findings(findings)
-    return {
+    scored = score_findings(findings) if result is None else result
+    report = {
         "schema": "aoi.acp.clawshield_gate.v0.1",
         "created_at": utc_now(),
         "input": {"repo": repo, "commit": commit, "input_digest": sha256_text(f"{repo}@{commit}")},
         "result": scored,
-        "findings": [
-            {"rule_id": f.rule_id, "severity": f.severity, "message": f.message, "evidence": f.evidence}
-            for f in findings
-        ],
+        "findings": [finding_record(f) for f in findings],
         "policy": {"green_only_attest": True, "fail_closed": True},
     }
+    if commit_sha is not None:
+        report["input"]["commit_sha"] = commit_sha
+    if scan is not None:
+        report["scan"] = scan
+    return report
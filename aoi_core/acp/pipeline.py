@@ -0,0 +1,203 @@
+"""Gate -> Approval -> Proof as one in-process call.
+
+The scripts in aoi-core/scripts are thin CLIs over these functions; the
+pre-push hook calls run_pre_push() directly so a push costs one interpreter
+start and no JSON files are re-read between stages.
+"""
+
+from __future__ import annotations
+
+import json
+import subprocess
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable, TextIO
+
+from aoi_core.acp.approval import (
+    DEFAULT_APPROVALS_DIR,
+    DEFAULT_PROOFS_DIR,
+    ApprovalResult,
+    dump_json,
+    read_json,
+    write_approval_and_proof,
+)
+from aoi_core.acp.approval_index import DEFAULT_INDEX
+from aoi_core.acp.clawshield_gate import (
+    DEFAULT_EXCLUDES,
+    GateFinding,
+    ScoreTracker,
+    default_cache_path,
+    finding_record,
+    iter_repo_findings,
+    make_report,
+    utc_now,
+)
+
+STREAM_SCHEMA = "aoi.acp.clawshield_gate.stream.v0.1"
+DEFAULT_POLICY = "aoi-core/state/acp_automation_policy_v0_1.json"
+PRE_PUSH_GATE_OUT = Path("/tmp") / "clawshield_pre_push_gate_report.json"
+
+
+class GateError(RuntimeError):
+    """The gate could not produce a report (not a repo, unknown commit, git failure)."""
+
+
+class ApprovalError(RuntimeError):
+    """The approval request or proof bundle could not be written."""
+
+
+def new_approval_id() -> str:
+    # acp-YYYYMMDD-HHMMSS
+    now = datetime.now(timezone.utc).astimezone()
+    return now.strftime("acp-%Y%m%d-%H%M%S")
+
+
+def git_verify_commit(repo: Path, commit: str) -> str:
+    # local-only; no network. just verify the commit exists (quiet) and return its sha.
+    out = subprocess.check_output(["git", "-C", str(repo), "rev-parse", "--verify", f"{commit}^{{commit}}"], stderr=subprocess.STDOUT)
+    return out.decode("ascii").strip()
+
+
+def _emit(stream: TextIO, record: dict[str, Any]) -> None:
+    stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+    stream.flush()
+
+
+def run_gate(
+    repo: Path,
+    commit: str = "HEAD",
+    *,
+    source: str = "git",
+    exclude: Iterable[str] = DEFAULT_EXCLUDES,
+    gitignore: bool = True,
+    cache: bool = True,
+    cache_path: Path | None = None,
+    workers: int = 1,
+    fail_fast: bool = False,
+    stream: TextIO | None = None,
+    keep_findings: bool = True,
+) -> dict[str, Any]:
+    """Scan `commit` of `repo` and return the gate report (make_report()).
+
+    `source` is "git" (the commit's tree from the object database) or
+    "worktree"; the findings cache only applies to the git source.
+
+    `fail_fast` stops the scan as soon as the signal is red, and the report
+    then carries a "scan" entry saying it is incomplete. `stream` receives
+    JSONL as the scan runs: a "start" record, one "finding" record per
+    finding with the running result, and a closing "result" record. With
+    `keep_findings=False` the report's findings list stays empty, so memory
+    does not grow with the number of matches.
+    """
+
+    repo = repo.resolve()
+    if not (repo / ".git").exists():
+        raise GateError(f"Not a git repo: {repo}")
+    kept: list[GateFinding] = []
+    tracker = ScoreTracker()
+    stopped = False
+    try:
+        commit_sha = git_verify_commit(repo, commit)
+        if source == "git" and cache and cache_path is None:
+            cache_path = default_cache_path(repo)
+        if stream is not None:
+            _emit(stream, {"type": "start", "schema": STREAM_SCHEMA, "created_at": utc_now(), "repo": str(repo), "commit": commit})
+        # Safety note: we DO NOT checkout or modify working tree.
+        # source="git" reads the commit's blobs via `git cat-file --batch`, so
+        # the result describes exactly the commit being gated.
+        findings = iter_repo_findings(
+            repo,
+            exclude=exclude,
+            gitignore=gitignore,
+            commit=commit if source == "git" else None,
+            cache_path=cache_path if source == "git" and cache else None,
+            workers=max(1, workers),
+        )
+        try:
+            for f in findings:
+                tracker.add(f)
+                if keep_findings:
+                    kept.append(f)
+                if stream is not None:
+                    _emit(stream, {"type": "finding", "seq": tracker.count, **finding_record(f), "running": tracker.result()})
+                if fail_fast and tracker.decided:
+                    stopped = True
+                    break
+        finally:
+            findings.close()
+    except subprocess.CalledProcessError as e:
+        detail = (e.stderr or e.output or b"").decode("utf-8", errors="replace").strip()
+        raise GateError(f"git {e.cmd[3]} failed: {detail}") from e
+
+    scan = {"complete": False, "stopped_by": "fail_fast", "findings_seen": tracker.count} if stopped else None
+    if stream is not None:
+        _emit(stream, {"type": "result", "result": tracker.result(), "complete": not stopped, "findings": tracker.count})
+    return make_report(repo=str(repo), commit=commit, findings=kept, result=tracker.result(), scan=scan, commit_sha=commit_sha)
+
+
+def write_report(report: dict[str, Any], out: Path) -> Path:
+    out = out.resolve()
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(dump_json(report), encoding="utf-8")
+    return out
+
+
+@dataclass
+class PipelineResult:
+    report: dict[str, Any]
+    report_path: Path
+    approval: ApprovalResult
+
+    @property
+    def signal(self) -> str | None:
+        return (self.report.get("result") or {}).get("signal")
+
+    @property
+    def score(self) -> int | None:
+        return (self.report.get("result") or {}).get("score")
+
+
+def run_pre_push(
+    repo: Path,
+    commit: str = "HEAD",
+    *,
+    policy: str | Path = DEFAULT_POLICY,
+    approval_id: str | None = None,
+    action: str = "git_push",
+    provider: str = "pre_push_gate",
+    report_path: Path = PRE_PUSH_GATE_OUT,
+    **gate_options: Any,
+) -> PipelineResult:
+    """Gate `commit`, then write its approval request and proof bundle under
+    `repo`. Relative `policy` paths are resolved against `repo`.
+
+    Raises GateError or ApprovalError; callers that guard a push must treat
+    either as a block (fail-closed). A failed index update is not an error:
+    it is reported in `approval.index_error`.
+    """
+
+    repo = repo.resolve()
+    report = run_gate(repo, commit, **gate_options)
+    try:
+        report_path = write_report(report, report_path)
+    except OSError as e:
+        raise GateError(f"cannot write gate report: {e}") from e
+
+    policy_path = (repo / policy).resolve()
+    try:
+        approval = write_approval_and_proof(
+            report,
+            read_json(policy_path),
+            approval_id=approval_id or new_approval_id(),
+            gate_path=report_path,
+            policy_path=policy_path,
+            approvals_dir=repo / DEFAULT_APPROVALS_DIR,
+            proofs_root=repo / DEFAULT_PROOFS_DIR,
+            action=action,
+            provider=provider,
+            index=repo / DEFAULT_INDEX,
+        )
+    except (OSError, json.JSONDecodeError) as e:
+        raise ApprovalError(f"{type(e).__name__}: {e}") from e
+    return PipelineResult(report=report, report_path=report_path, approval=approval)
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""Bundle generation throughput and latency benchmark for runner.py.
+
+Generates synthetic eigenproof.input.v0.1 jobs for each message size and
+measures, with and without --deterministic:
+
+- process: one `python -m runner` per job (the one-process-per-job deployment);
+  per-bundle latency p50/p99 and peak RSS of the runner process
+- batch: `python -m runner batch` over the whole job set; bundles/s and peak
+  RSS of the batch parent (the worker itself when --workers 1)
+
+Both report bytes written per bundle. The report is JSON; pass --baseline with
+an earlier report to add a per-scenario diff, and --max-regression to exit 1
+when a metric regresses by more than that many percent.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from _common import REPO, child_env, percentile, run_header
+
+# Mostly ASCII with some multi-byte characters, so the ensure_ascii=False
+# encode path is exercised the way real messages exercise it.
+ALPHABET = "abcdefghijklmnopqrstuvwxyz ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789.,é—ü"
+
+# metric -> True when higher is better
+METRICS = {"bundles_per_s": True, "latency_ms_p50": False, "latency_ms_p99": False, "peak_rss_kib": False, "bytes_per_bundle": False}
+
+
+def synthetic_job(i: int, message_bytes: int, rng: random.Random) -> dict:
+    message = "".join(rng.choices(ALPHABET, k=message_bytes))
+    message = message.encode("utf-8")[:message_bytes].decode("utf-8", "ignore")
+    return {"schema": "eigenproof.input.v0.1", "job_id": f"bench{i:06d}", "task": {"kind": "hash_demo", "message": message, "n": i}}
+
+
+def write_jobs(path: Path, jobs: int, message_bytes: int, seed: int) -> list[Path]:
+    """Write the job set as JSONL (for batch) and as one file per job (for process)."""
+
+    rng = random.Random(seed)
+    single = path.parent / (path.stem + ".d")
+    single.mkdir(parents=True, exist_ok=True)
+    files = []
+    with path.open("w", encoding="utf-8") as f:
+        for i in range(jobs):
+            job = synthetic_job(i, message_bytes, rng)
+            line = json.dumps(job, ensure_ascii=False)
+            f.write(line + "\n")
+            p = single / f"{job['job_id']}.json"
+            p.write_text(line, encoding="utf-8")
+            files.append(p)
+    return files
+
+
+def run_measured(cmd: list[str], env: dict[str, str]) -> tuple[float, int]:
+    """(wall ms, peak RSS KiB) of one child process."""
+
+    t = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=REPO, env=env, stdout=subprocess.DEVNULL)
+    _, status, usage = os.wait4(proc.pid, 0)
+    wall = (time.perf_counter() - t) * 1000
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    if proc.returncode != 0:
+        raise SystemExit(f"benchmark command failed ({proc.returncode}): {' '.join(cmd)}")
+    return wall, usage.ru_maxrss
+
+
+def bundle_bytes(root: Path) -> int:
+    return sum(p.stat().st_size for p in root.rglob("*") if p.is_file() and p.name != "metrics.json")
+
+
+def bench_process(files: list[Path], outroot: Path, flags: list[str], python: str, env: dict[str, str]) -> dict:
+    latencies, rss = [], []
+    t = time.perf_counter()
+    for p in files:
+        wall, maxrss = run_measured([python, "-m", "runner", "--input", str(p), "--outdir", str(outroot / p.stem), *flags], env)
+        latencies.append(wall)
+        rss.append(maxrss)
+    elapsed = time.perf_counter() - t
+    return {
+        "bundles_per_s": round(len(files) / elapsed, 3),
+        "latency_ms_p50": round(percentile(latencies, 50), 3),
+        "latency_ms_p99": round(percentile(latencies, 99), 3),
+        "peak_rss_kib": max(rss),
+        "bytes_per_bundle": bundle_bytes(outroot) // len(files),
+    }
+
+
+def bench_batch(jobs_file: Path, jobs: int, outroot: Path, flags: list[str], workers: int, python: str, env: dict[str, str]) -> dict:
+    cmd = [python, "-m", "runner", "batch", "--input", str(jobs_file), "--outdir", str(outroot), "--workers", str(workers), *flags]
+    wall, maxrss = run_measured(cmd, env)
+    return {
+        "bundles_per_s": round(jobs / (wall / 1000), 3),
+        "peak_rss_kib": maxrss,
+        "bytes_per_bundle": bundle_bytes(outroot) // jobs,
+    }
+
+
+def diff_against(report: dict, baseline: dict) -> tuple[dict, list[str]]:
+    """Per-scenario percentage change vs. the baseline, plus regressions."""
+
+    base = {s["name"]: s for s in baseline.get("scenarios", [])}
+    diff, regressions = {}, []
+    for s in report["scenarios"]:
+        b = base.get(s["name"])
+        if b is None:
+            continue
+        changes = {}
+        for metric, higher_is_better in METRICS.items():
+            if metric not in s or not b.get(metric):
+                continue
+            pct = (s[metric] - b[metric]) / b[metric] * 100
+            changes[metric] = {"baseline": b[metric], "current": s[metric], "change_pct": round(pct, 2)}
+            worse = -pct if higher_is_better else pct
+            changes[metric]["regression_pct"] = round(max(0.0, worse), 2)
+            if worse > 0:
+                regressions.append((s["name"], metric, worse))
+        diff[s["name"]] = changes
+    return diff, regressions
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="runner.py bundle throughput/latency benchmark")
+    ap.add_argument("--sizes", default="64,4096,262144,1048576", help="Comma-separated message sizes in bytes")
+    ap.add_argument("--jobs", default="200", help="Comma-separated job counts for the batch harness")
+    ap.add_argument("--process-jobs", type=int, default=30, help="Jobs per size for the one-process-per-job harness (0 to skip)")
+    ap.add_argument("--workers", type=int, default=1, help="Batch worker processes (1 keeps RSS and timings comparable)")
+    ap.add_argument("--seed", type=int, default=0, help="Seed for the synthetic messages")
+    ap.add_argument("--python", default=sys.executable, help="Interpreter to benchmark")
+    ap.add_argument("--out", type=Path, help="Write the JSON report here (default: stdout only)")
+    ap.add_argument("--baseline", type=Path, help="Earlier report to diff against")
+    ap.add_argument("--max-regression", type=float, help="With --baseline: exit 1 if any metric regresses by more than this percent")
+    args = ap.parse_args()
+
+    sizes = [int(x) for x in args.sizes.split(",") if x]
+    counts = [int(x) for x in args.jobs.split(",") if x]
+    modes = {"default": [], "deterministic": ["--deterministic"]}
+
+    scenarios = []
+    with tempfile.TemporaryDirectory(prefix="eigenproof-bench-") as tmp:
+        tmp = Path(tmp)
+        env = child_env(tmp / "pycache")
+        subprocess.run([args.python, "-m", "compileall", "-q", str(REPO / "runner.py")], env=env, check=True)
+
+        for size in sizes:
+            for jobs in sorted(set(counts + ([args.process_jobs] if args.process_jobs else []))):
+                files = write_jobs(tmp / f"jobs-{size}-{jobs}.jsonl", jobs, size, args.seed)
+                for mode, flags in modes.items():
+                    if jobs in counts:
+                        out = tmp / f"out-batch-{size}-{jobs}-{mode}"
+                        r = bench_batch(tmp / f"jobs-{size}-{jobs}.jsonl", jobs, out, flags, args.workers, args.python, env)
+                        scenarios.append({"name": f"batch/{mode}/msg{size}/jobs{jobs}", "harness": "batch", "mode": mode, "message_bytes": size, "jobs": jobs, **r})
+                    if jobs == args.process_jobs:
+                        out = tmp / f"out-process-{size}-{mode}"
+                        r = bench_process(files, out, flags, args.python, env)
+                        scenarios.append({"name": f"process/{mode}/msg{size}/jobs{jobs}", "harness": "process", "mode": mode, "message_bytes": size, "jobs": jobs, **r})
+                    print(f"msg{size} jobs{jobs} {mode}: done", file=sys.stderr)
+
+    report = {
+        **run_header("eigenproof.bench.bundle_throughput.v0.1"),
+        "params": {"sizes": sizes, "jobs": counts, "process_jobs": args.process_jobs, "workers": args.workers, "seed": args.seed},
+        "scenarios": scenarios,
+    }
+
+    regressions = []
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        report["baseline"] = {"path": str(args.baseline), "commit": baseline.get("commit")}
+        report["diff"], regressions = diff_against(report, baseline)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False) + "\n"
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(text, encoding="utf-8")
+    print(text, end="")
+
+    if args.max_regression is not None:
+        over = [(n, m, pct) for n, m, pct in regressions if pct > args.max_regression]
+        for n, m, pct in over:
+            print(f"❌ {n}: {m} regressed {pct:.1f}% (> {args.max_regression}%)", file=sys.stderr)
+        return 1 if over else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
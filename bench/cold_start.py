@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Cold-start benchmark for runner.py.
+
+Measures what a one-process-per-job deployment pays before any work is done:
+- `python -X importtime -c "import runner"`: total import time and the
+  modules that are imported eagerly
+- wall clock of complete single-job runs (`python -m runner ...`), minus the
+  wall clock of a bare interpreter start, over several runs
+
+Bytecode is precompiled into a private pycache prefix first, as in the Docker
+image. Results are compared against bench/cold_start_budget.json (exit 1 when
+over budget) and appended as one JSON line to --record for comparison across
+commits.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from _common import REPO, child_env, run_header
+
+
+def import_profile(python: str, env: dict[str, str]) -> tuple[float, list[str], list[tuple[str, float]]]:
+    """(runner import ms, eagerly imported modules, top modules by self time)."""
+
+    r = subprocess.run([python, "-X", "importtime", "-c", "import runner"], cwd=REPO, env=env, capture_output=True, text=True, check=True)
+    modules: list[str] = []
+    selfs: list[tuple[str, float]] = []
+    total_us = 0
+    for line in r.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = (x.strip() for x in line[len("import time:"):].split("|"))
+        modules.append(name.strip())
+        selfs.append((name.strip(), int(self_us) / 1000))
+        if name.strip() == "runner":
+            total_us = int(cum_us)
+    selfs.sort(key=lambda x: -x[1])
+    return total_us / 1000, modules, selfs[:10]
+
+
+def wall_ms(cmd: list[str], env: dict[str, str], runs: int) -> list[float]:
+    out = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        subprocess.run(cmd, cwd=REPO, env=env, stdout=subprocess.DEVNULL, check=True)
+        out.append((time.perf_counter() - t) * 1000)
+    return out
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="runner.py cold-start benchmark with a budget check")
+    ap.add_argument("--runs", type=int, default=15, help="Wall-clock samples per command")
+    ap.add_argument("--python", default=sys.executable, help="Interpreter to benchmark")
+    ap.add_argument("--budget", type=Path, default=REPO / "bench" / "cold_start_budget.json", help="Budget JSON")
+    ap.add_argument("--record", type=Path, default=REPO / "bench" / "results" / "cold_start.jsonl", help="Append results here")
+    ap.add_argument("--no-record", action="store_true", help="Do not append to --record")
+    args = ap.parse_args()
+
+    budget = json.loads(args.budget.read_text(encoding="utf-8"))
+
+    with tempfile.TemporaryDirectory(prefix="eigenproof-coldstart-") as tmp:
+        env = child_env(Path(tmp) / "pycache")
+        subprocess.run([args.python, "-m", "compileall", "-q", str(REPO / "runner.py")], env=env, check=True)
+
+        import_ms, modules, top = import_profile(args.python, env)
+        job = [args.python, "-m", "runner", "--input", str(REPO / "sample_input.json"), "--outdir", str(Path(tmp) / "out"), "--deterministic"]
+        bare = wall_ms([args.python, "-c", "pass"], env, args.runs)
+        runs = wall_ms(job, env, args.runs)
+
+    p50 = statistics.median(runs)
+    overhead = p50 - statistics.median(bare)
+    eager = sorted(m for m in budget.get("lazy_modules", []) if m in modules)
+
+    violations = []
+    if import_ms > budget["import_ms"]:
+        violations.append(f"import runner took {import_ms:.1f} ms > {budget['import_ms']} ms")
+    if overhead > budget["job_overhead_ms_p50"]:
+        violations.append(f"job p50 over bare interpreter {overhead:.1f} ms > {budget['job_overhead_ms_p50']} ms")
+    if eager:
+        violations.append(f"imported at module load but should be lazy: {', '.join(eager)}")
+
+    result = {
+        **run_header("eigenproof.bench.cold_start.v0.1"),
+        "runs": args.runs,
+        "import_ms": round(import_ms, 3),
+        "import_top_self_ms": [[name, round(ms, 3)] for name, ms in top],
+        "bare_interpreter_ms_p50": round(statistics.median(bare), 3),
+        "job_wall_ms": {"min": round(min(runs), 3), "p50": round(p50, 3), "max": round(max(runs), 3)},
+        "job_overhead_ms_p50": round(overhead, 3),
+        "budget": budget,
+        "within_budget": not violations,
+        "violations": violations,
+    }
+    print(json.dumps(result, indent=2))
+
+    if not args.no_record:
+        args.record.parent.mkdir(parents=True, exist_ok=True)
+        with args.record.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+    for v in violations:
+        print(f"❌ cold-start budget: {v}", file=sys.stderr)
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -16,15 +16,23 @@ Designed for container execution (EigenCompute) and local Docker demo.
 
 from __future__ import annotations
 
-import argparse
+# Cold start matters (one process per job on EigenCompute): only modules the
+# single-job hot path needs are imported here. argparse, subprocess, platform,
+# shutil and anything mode-specific are imported where they are used.
+import errno
 import hashlib
 import json
 import os
-from datetime import datetime, timezone
+from collections import namedtuple
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
-import platform
-import subprocess
-from typing import Optional
+import re
+import sys
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # annotations only; argparse stays off the import path
+    import argparse
 
 
 def sha256_bytes(b: bytes) -> str:
@@ -42,14 +50,16 @@ def sha256_file(p: Path) -> str:
 def utc_now_iso(deterministic: bool = False) -> str:
     if deterministic:
         return "1970-01-01T00:00:00Z"
-    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
 
 
-def git_commit_or_none() -> Optional[str]:
+def git_commit_or_none() -> str | None:
     env = os.environ.get("GIT_COMMIT")
     if env:
         return env
     try:
+        import subprocess
+
         r = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=2)
         if r.returncode == 0:
             return r.stdout.strip() or None
@@ -58,7 +68,7 @@ def git_commit_or_none() -> Optional[str]:
     return None
 
 
-def docker_image_digest_or_none() -> Optional[str]:
+def docker_image_digest_or_none() -> str | None:
     """Best-effort: allow injecting an image digest from the runtime.
 
     In EigenCompute, the platform may expose image identifiers via env.
@@ -76,13 +86,150 @@ def docker_image_digest_or_none() -> Optional[str]:
     return None
 
 
-def build_identity(outdir: Path, run_id: str, deterministic: bool = False) -> dict:
-    # Code fingerprint (no secrets): hash this file and Dockerfile if present
-    this_file = Path(__file__)
-    runner_sha = sha256_file(this_file) if this_file.exists() else None
+# ---------------------------------------------------------------------------
+# Provenance snapshot: facts that are fixed for the lifetime of a container
+# ---------------------------------------------------------------------------
+
+PROVENANCE_CACHE_SCHEMA = "eigenproof.provenance_cache.v0.1"
+
+# Code fingerprint (no secrets): this file and the Dockerfile, if present
+CODE_FILES = [
+    ("runner.py", Path(__file__)),
+    ("Dockerfile", Path("/app") / "Dockerfile"),
+]
+
+
+class Provenance(namedtuple("Provenance", ["git_commit", "image_digest", "code_files", "python", "platform"])):
+    """git_commit and image_digest may be None; code_files is ((path, sha256), ...)
+    for the CODE_FILES that exist. (A namedtuple: dataclasses costs ~10ms of import.)"""
+
+    __slots__ = ()
+
+
+_PROVENANCE: Provenance | None = None
+
+
+def _stat_key(p: Path) -> list[int] | None:
+    try:
+        st = p.stat()
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns, st.st_ino]
+
+
+def _git_head_files() -> list[Path]:
+    """Files whose change means `git rev-parse HEAD` may answer differently."""
+
+    cur = Path.cwd()
+    for d in [cur, *cur.parents]:
+        git_dir = d / ".git"
+        if git_dir.is_dir():
+            files = [git_dir / "HEAD", git_dir / "packed-refs"]
+            try:
+                head = (git_dir / "HEAD").read_text(encoding="utf-8").strip()
+            except OSError:
+                return files
+            if head.startswith("ref: "):
+                files.append(git_dir / head[len("ref: "):])
+            return files
+    return []
+
+
+def _provenance_cache_key() -> dict:
+    env = {k: os.environ.get(k) for k in ["GIT_COMMIT", "EIGEN_IMAGE_DIGEST", "IMAGE_DIGEST", "DOCKER_IMAGE_DIGEST"]}
+    files = [p for _, p in CODE_FILES]
+    if not env["GIT_COMMIT"]:
+        files += _git_head_files()
+    return {
+        "env": env,
+        "python": sys.version,
+        "executable": sys.executable,
+        "uname": list(os.uname()) if hasattr(os, "uname") else None,
+        "cwd": os.getcwd(),
+        "files": {str(p): _stat_key(p) for p in files},
+    }
+
+
+def _compute_provenance() -> Provenance:
+    import platform
+
+    code_files = tuple((rel, sha256_file(p)) for rel, p in CODE_FILES if p.exists())
+    return Provenance(
+        git_commit=git_commit_or_none(),
+        image_digest=docker_image_digest_or_none(),
+        code_files=code_files,
+        python=platform.python_version(),
+        platform=platform.platform(),
+    )
+
+
+def _load_provenance_cache(path: Path, key: dict) -> Provenance | None:
+    try:
+        j = json.loads(path.read_text(encoding="utf-8"))
+        if j.get("schema") != PROVENANCE_CACHE_SCHEMA or j.get("key") != key:
+            return None
+        snap = j["snapshot"]
+        return Provenance(
+            git_commit=snap["git_commit"],
+            image_digest=snap["image_digest"],
+            code_files=tuple((rel, sha) for rel, sha in snap["code_files"]),
+            python=snap["python"],
+            platform=snap["platform"],
+        )
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _store_provenance_cache(path: Path, key: dict, prov: Provenance) -> None:
+    payload = {"schema": PROVENANCE_CACHE_SCHEMA, "key": key, "snapshot": prov._asdict()}
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_text(json.dumps(payload, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError:
+        # The cache is an optimization only; never fail a run over it.
+        tmp.unlink(missing_ok=True)
+
+
+def provenance_snapshot(cache_path: Path | None = None) -> Provenance:
+    """Return commit, image digest, code hashes and platform info, computed once per process.
+
+    With `cache_path` (or EIGENPROOF_PROVENANCE_CACHE), the snapshot is also
+    persisted and reused across processes until the code files, git HEAD,
+    environment or interpreter change (keyed by size, mtime and inode).
+    """
+
+    global _PROVENANCE
+    if _PROVENANCE is not None:
+        return _PROVENANCE
+
+    if cache_path is None and os.environ.get("EIGENPROOF_PROVENANCE_CACHE"):
+        cache_path = Path(os.environ["EIGENPROOF_PROVENANCE_CACHE"])
+
+    prov = None
+    if cache_path is not None:
+        key = _provenance_cache_key()
+        prov = _load_provenance_cache(cache_path, key)
+        if prov is None:
+            prov = _compute_provenance()
+            _store_provenance_cache(cache_path, key, prov)
+    else:
+        prov = _compute_provenance()
+
+    _PROVENANCE = prov
+    return prov
+
+
+def _set_provenance(prov: Provenance) -> None:
+    """Process-pool initializer: reuse the parent's snapshot."""
+
+    global _PROVENANCE
+    _PROVENANCE = prov
+
 
-    dockerfile = (Path("/app") / "Dockerfile")
-    dockerfile_sha = sha256_file(dockerfile) if dockerfile.exists() else None
+def build_identity(outdir: Path, run_id: str, deterministic: bool = False, merkle: dict | None = None) -> dict:
+    prov = provenance_snapshot()
 
     ident = {
         "schema": "eigenproof.identity.v0.1",
@@ -91,14 +238,11 @@ def build_identity(outdir: Path, run_id: str, deterministic: bool = False) -> di
         "identity": {
             "project": "eigenproof-runner",
             "publisher": "Aoineco",
-            "image_digest": docker_image_digest_or_none(),
+            "image_digest": prov.image_digest,
         },
         "code": {
-            "git_commit": git_commit_or_none(),
-            "files": [
-                {"path": "runner.py", "sha256": runner_sha},
-                {"path": "Dockerfile", "sha256": dockerfile_sha},
-            ],
+            "git_commit": prov.git_commit,
+            "files": [{"path": rel, "sha256": sha} for rel, sha in prov.code_files],
         },
         "attestations": {
             "public_safe": True,
@@ -107,11 +251,14 @@ def build_identity(outdir: Path, run_id: str, deterministic: bool = False) -> di
         },
     }
 
-    # Remove null hashes cleanly
-    ident["code"]["files"] = [f for f in ident["code"]["files"] if f.get("sha256")]
+    # Remove null fields cleanly
     if not ident["identity"].get("image_digest"):
         ident["identity"].pop("image_digest", None)
 
+    # Manifest v0.3: the Merkle root of the payload this run attests to
+    if merkle is not None:
+        ident["merkle"] = merkle
+
     return ident
 
 
@@ -131,97 +278,2571 @@ def build_policy() -> dict:
     }
 
 
-def main() -> int:
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--input", required=True, help="Input JSON path")
-    ap.add_argument("--outdir", required=True, help="Output directory (mounted volume recommended)")
-    ap.add_argument("--deterministic", action="store_true", help="Use fixed timestamps/run_id for deterministic replay")
-    args = ap.parse_args()
+# ---------------------------------------------------------------------------
+# Streaming input: constant-memory handling of large job payloads
+# ---------------------------------------------------------------------------
 
-    inp = Path(args.input)
-    outdir = Path(args.outdir)
-    outdir.mkdir(parents=True, exist_ok=True)
+STREAM_CHUNK = 1024 * 1024
 
-    # Bundle paths
-    input_copy = outdir / "input.json"
-    output_json = outdir / "output.json"
-    manifest_json = outdir / "manifest.json"
-    identity_json = outdir / "identity.json"
-    policy_json = outdir / "policy.json"
-    sha256sum = outdir / "sha256sum.txt"
+# The only input fields build_output() reads (for every registered task kind)
+INPUT_FIELDS = {("job_id",), ("task", "kind"), ("task", "message"), ("task", "n"), ("task", "checkpoints")}
 
-    data = json.loads(inp.read_text(encoding="utf-8"))
 
-    # Deterministic core output hash; timestamps/run_id are runtime-variant unless --deterministic
-    msg = (((data.get("task") or {}).get("message")) or "").strip()
-    n = int((((data.get("task") or {}).get("n")) or 0))
+def _kernel_copy(src_fd: int, dst_fd: int, offset: int, count: int, mode: list[str], shift: int = 0) -> bool:
+    """Copy `count` bytes at `offset` (to `offset + shift` in dst) inside the
+    kernel; False if unsupported here."""
 
-    digest = hashlib.sha256((msg + "|" + str(n)).encode("utf-8")).hexdigest()
-    out = {
-        "schema": "eigenproof.output.v0.1",
-        "job_id": data.get("job_id"),
-        "ok": True,
-        "result": {
-            "input_message": msg,
-            "n": n,
-            "sha256": digest,
-        },
-        "generated_at": utc_now_iso(args.deterministic),
-    }
+    while count:
+        try:
+            if mode[0] == "copy_file_range":
+                n = os.copy_file_range(src_fd, dst_fd, count, offset, offset + shift)
+            else:
+                os.lseek(dst_fd, offset + shift, os.SEEK_SET)
+                n = os.sendfile(dst_fd, src_fd, offset, count)
+        except (AttributeError, OSError):
+            if mode[0] == "copy_file_range":
+                mode[0] = "sendfile"
+                continue
+            return False
+        if n == 0:
+            return False
+        offset += n
+        count -= n
+    return True
 
-    run_id = f"{data.get('job_id','run')}-" + ("deterministic" if args.deterministic else datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S"))
 
-    input_copy.write_text(json.dumps(data, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
-    output_json.write_text(json.dumps(out, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+def unlink_target(dst: Path) -> None:
+    """Remove `dst` before rewriting it. An existing bundle file may be a
+    hardlink into the read-only object store, which must never be written
+    through (root ignores the 0444 mode)."""
 
-    # Next-level identity wrapper
-    identity = build_identity(outdir, run_id, args.deterministic)
-    policy = build_policy()
-    identity_json.write_text(json.dumps(identity, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
-    policy_json.write_text(json.dumps(policy, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    dst.unlink(missing_ok=True)
+
+
+def copy_and_hash(src: Path, dst: Path, on_chunk=None) -> str:
+    """Copy src to dst with copy_file_range/sendfile and return its sha256.
+
+    Each chunk is read once for hashing (which also warms the page cache) and
+    then copied kernel-side; if neither syscall works on these filesystems the
+    hashed chunk is written directly.
+    """
+
+    unlink_target(dst)
+    with dst.open("wb") as fout:
+        digest, size = copy_into_fd(src, fout.fileno(), 0, on_chunk)
+        os.ftruncate(fout.fileno(), size)
+    return digest
+
+
+def copy_into_fd(src: Path, dst_fd: int, base: int, on_chunk=None) -> tuple[str, int]:
+    """copy_and_hash into an open file at offset `base`; returns (sha256, size)."""
+
+    h = hashlib.sha256()
+    buf = bytearray(STREAM_CHUNK)
+    view = memoryview(buf)
+    mode = ["copy_file_range"]
+    with src.open("rb", buffering=0) as fin:
+        src_fd = fin.fileno()
+        offset = 0
+        while n := fin.readinto(buf):
+            h.update(view[:n])
+            if on_chunk is not None:
+                on_chunk(view[:n])
+            if mode[0] == "write" or not _kernel_copy(src_fd, dst_fd, offset, n, mode, base):
+                mode[0] = "write"
+                os.pwrite(dst_fd, view[:n], base + offset)
+            offset += n
+    return h.hexdigest(), offset
+
+
+class _JsonFieldScanner:
+    """Pull selected fields out of a JSON object without materializing the rest.
+
+    Values on a wanted path are decoded with json.loads; everything else is
+    skipped with a bounded buffer, so memory stays flat for arbitrarily large
+    payloads. Skipped values are not fully validated.
+    """
+
+    _STRING_SPECIAL = re.compile(rb'["\\]')
+    # Non-structural bytes and complete strings, consumed in one C-level match
+    _SKIP_RUN = re.compile(rb'(?:[^"{}\[\]]++|"(?:[^"\\]++|\\.)*+")*+', re.DOTALL)
+    _SCALAR_END = re.compile(rb"[\s,}\]]")
+    _WS = b" \t\r\n"
+
+    def __init__(self, f, chunk_size: int = STREAM_CHUNK):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = b""
+        self.pos = 0
+        self.capture: list[bytes] | None = None
+
+    def _more(self) -> bool:
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _advance(self, n: int) -> None:
+        if self.capture is not None:
+            self.capture.append(self.buf[self.pos:self.pos + n])
+        self.pos += n
+
+    def _advance_rest(self) -> None:
+        self._advance(len(self.buf) - self.pos)
+        if not self._more():
+            raise ValueError("unexpected end of JSON input")
+
+    def peek(self) -> int:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in self._WS:
+                self._advance(1)
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._more():
+                raise ValueError("unexpected end of JSON input")
+
+    def _skip_string(self) -> None:
+        self._advance(1)  # opening quote
+        while True:
+            m = self._STRING_SPECIAL.search(self.buf, self.pos)
+            if m is None:
+                self._advance_rest()
+            elif m.group() == b'"':
+                self._advance(m.end() - self.pos)
+                return
+            elif m.start() + 1 < len(self.buf):
+                self._advance(m.start() + 2 - self.pos)  # escape + escaped byte
+            else:
+                self._advance(m.start() - self.pos)
+                if not self._more():
+                    raise ValueError("unexpected end of JSON input")
+
+    def _skip_container(self) -> None:
+        depth = 0
+        while True:
+            m = self._SKIP_RUN.match(self.buf, self.pos)
+            self._advance(m.end() - self.pos)
+            if self.pos >= len(self.buf):
+                if not self._more():
+                    raise ValueError("unexpected end of JSON input")
+                continue
+            c = self.buf[self.pos]
+            if c == ord('"'):
+                # A string that runs past the end of the buffer
+                self._skip_string()
+                continue
+            self._advance(1)
+            depth += 1 if c in b"{[" else -1
+            if depth == 0:
+                return
+
+    def _skip_scalar(self) -> None:
+        while True:
+            m = self._SCALAR_END.search(self.buf, self.pos)
+            if m is not None:
+                self._advance(m.start() - self.pos)
+                return
+            self._advance(len(self.buf) - self.pos)
+            if not self._more():
+                return
+
+    def skip_value(self) -> None:
+        c = self.peek()
+        if c == ord('"'):
+            self._skip_string()
+        elif c in b"{[":
+            self._skip_container()
+        else:
+            self._skip_scalar()
+
+    def read_value(self) -> object:
+        self.peek()
+        self.capture = []
+        try:
+            self.skip_value()
+            raw = b"".join(self.capture)
+        finally:
+            self.capture = None
+        return json.loads(raw)
+
+    def _expect(self, c: bytes) -> None:
+        if self.peek() != c[0]:
+            raise ValueError(f"expected {c.decode()!r} in JSON input")
+        self._advance(1)
+
+    def scan_object(self, wanted: set[tuple[str, ...]], path: tuple[str, ...] = ()) -> dict:
+        out: dict = {}
+        self._expect(b"{")
+        if self.peek() == ord("}"):
+            self._advance(1)
+            return out
+        while True:
+            key = self.read_value()
+            if not isinstance(key, str):
+                raise ValueError("object keys must be strings")
+            self._expect(b":")
+            full = path + (key,)
+            if full in wanted:
+                out[key] = self.read_value()
+            elif any(w[: len(full)] == full for w in wanted) and self.peek() == ord("{"):
+                out[key] = self.scan_object(wanted, full)
+            else:
+                self.skip_value()
+            if self.peek() == ord(","):
+                self._advance(1)
+                continue
+            self._expect(b"}")
+            return out
+
+
+def extract_input_fields(src: Path, wanted: set[tuple[str, ...]] = INPUT_FIELDS) -> dict:
+    """Return the subset of the input document on `wanted` key paths."""
+
+    with src.open("rb") as f:
+        return _JsonFieldScanner(f).scan_object(wanted)
+
+
+BUNDLE_FILES = ["input.json", "output.json", "identity.json", "policy.json", "manifest.json"]
+# Members whose manifest sha256 is also their object-store key
+STORED_FILES = BUNDLE_FILES[:-1]
+
+
+def json_bytes(obj: object) -> bytes:
+    """Serialize a bundle artifact exactly as it is written to disk."""
+
+    return (json.dumps(obj, ensure_ascii=False, indent=2) + "\n").encode("utf-8")
+
+
+# --json-format canonical: RFC 8785 (JCS) with NFC-normalized strings. The
+# manifest records this value under "canonicalization"; without it, artifacts
+# (and the manifest self-hash) use json_bytes.
+CANONICALIZATION = "rfc8785+nfc"
+JSON_FORMATS = {"pretty": None, "canonical": CANONICALIZATION}
+_MAX_SAFE_INT = 2**53 - 1
+
+
+def _es_number(x: float) -> str:
+    """ECMAScript Number.prototype.toString for a finite double (RFC 8785 3.2.2.3)."""
+
+    if x != x or x in (float("inf"), float("-inf")):
+        raise ValueError(f"{x!r} is not representable in canonical JSON")
+    if x == 0:
+        return "0"
+    if x < 0:
+        return "-" + _es_number(-x)
+    # repr() yields the shortest round-tripping digits, as ECMAScript requires
+    mantissa, _, exp = repr(x).partition("e")
+    whole, _, frac = mantissa.partition(".")
+    raw = whole + frac
+    stripped = raw.lstrip("0")
+    # x == 0.<stripped> * 10**n
+    n = len(whole) + int(exp or 0) - (len(raw) - len(stripped))
+    digits = stripped.rstrip("0")
+    k = len(digits)
+    if k <= n <= 21:
+        return digits + "0" * (n - k)
+    if 0 < n <= 21:
+        return digits[:n] + "." + digits[n:]
+    if -6 < n <= 0:
+        return "0." + "0" * -n + digits
+    e = n - 1
+    return digits[0] + ("." + digits[1:] if k > 1 else "") + "e" + ("+" if e > 0 else "-") + str(abs(e))
+
+
+def _canonical(obj: object, out: list[str], nfc) -> None:
+    if obj is None or obj is True or obj is False:
+        out.append(json.dumps(obj))
+    elif isinstance(obj, str):
+        out.append(json.dumps(nfc("NFC", obj), ensure_ascii=False))
+    elif isinstance(obj, int):
+        if abs(obj) > _MAX_SAFE_INT:
+            raise ValueError(f"integer {obj} is outside the I-JSON range and cannot be canonicalized")
+        out.append(str(obj))
+    elif isinstance(obj, float):
+        out.append(_es_number(obj))
+    elif isinstance(obj, (list, tuple)):
+        out.append("[")
+        for i, item in enumerate(obj):
+            if i:
+                out.append(",")
+            _canonical(item, out, nfc)
+        out.append("]")
+    elif isinstance(obj, dict):
+        items = {}
+        for key, value in obj.items():
+            if not isinstance(key, str):
+                raise TypeError(f"canonical JSON keys must be strings, not {type(key).__name__}")
+            norm = nfc("NFC", key)
+            if norm in items:
+                raise ValueError(f"duplicate key after NFC normalization: {norm!r}")
+            items[norm] = value
+        out.append("{")
+        # RFC 8785 orders members by the UTF-16 code units of their names
+        for i, key in enumerate(sorted(items, key=lambda k: k.encode("utf-16-be"))):
+            if i:
+                out.append(",")
+            out.append(json.dumps(key, ensure_ascii=False))
+            out.append(":")
+            _canonical(items[key], out, nfc)
+        out.append("}")
+    else:
+        raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+
+def canonical_json_bytes(obj: object) -> bytes:
+    """RFC 8785 serialization (sorted keys, no whitespace, ECMAScript numbers)
+    with every string and key NFC-normalized first; no trailing newline.
+
+    Raises ValueError for values I-JSON cannot carry: integers beyond
+    ±(2**53 - 1), NaN/Infinity, and keys that collide after normalization.
+    """
+
+    import unicodedata
+
+    out: list[str] = []
+    _canonical(obj, out, unicodedata.normalize)
+    return "".join(out).encode("utf-8")
+
+
+class CanonicalInputError(ValueError):
+    """A job input that --json-format canonical cannot represent."""
+
+
+def canonical_input(data: dict) -> dict:
+    """`data` in the form canonical input.json records it (NFC strings and keys).
+
+    Results are computed from this form so output.json agrees with input.json;
+    unrepresentable values are rejected here, before any bundle file is written.
+    """
+
+    try:
+        return json.loads(canonical_json_bytes(data))
+    except ValueError as e:
+        raise CanonicalInputError(f"input cannot be canonicalized: {e}") from e
+
+
+def json_serializer(canonicalization: str | None):
+    """Serializer for a manifest's "canonicalization" value (None: json_bytes)."""
+
+    if canonicalization is None:
+        return json_bytes
+    if canonicalization == CANONICALIZATION:
+        return canonical_json_bytes
+    raise ValueError(f"unsupported canonicalization {canonicalization!r}")
+
+
+# ---------------------------------------------------------------------------
+# Content-addressed object store shared by bundles (opt-in)
+# ---------------------------------------------------------------------------
+
+FICLONE = 0x40049409  # linux/fs.h: reflink one file onto another
+
+
+def _reflink_or_copy(src: Path, dst: Path) -> None:
+    try:
+        import fcntl
+
+        with src.open("rb") as fi, dst.open("wb") as fo:
+            fcntl.ioctl(fo.fileno(), FICLONE, fi.fileno())
+        return
+    except (ImportError, OSError):
+        pass
+    import shutil
+
+    shutil.copyfile(src, dst)
+
+
+class ObjectStore:
+    """Bundle members stored once under <root>/sha256/<aa>/<digest>.
+
+    Bundle directories hardlink (or reflink/copy, across filesystems) into the
+    store, so identical policy.json/identity.json bytes share one inode while
+    `sha256sum -c` inside each bundle keeps working. Objects are read-only.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.tmp = root / "tmp"
+        self.tmp.mkdir(parents=True, exist_ok=True)
+
+    def path(self, digest: str) -> Path:
+        return self.root / "sha256" / digest[:2] / digest
+
+    def _tmp_path(self) -> Path:
+        import threading
+
+        return self.tmp / f"{os.getpid()}-{threading.get_ident()}-{os.urandom(4).hex()}"
+
+    def _publish(self, tmp: Path, digest: str) -> None:
+        obj = self.path(digest)
+        os.chmod(tmp, 0o444)
+        if obj.exists():
+            tmp.unlink()
+            return
+        obj.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp, obj)  # same bytes if another writer won the race
+
+    def put_bytes(self, digest: str, data: bytes) -> None:
+        if not self.path(digest).exists():
+            tmp = self._tmp_path()
+            tmp.write_bytes(data)
+            self._publish(tmp, digest)
+
+    def put_file(self, digest: str, src: Path) -> None:
+        if not self.path(digest).exists():
+            import shutil
+
+            tmp = self._tmp_path()
+            shutil.copyfile(src, tmp)
+            self._publish(tmp, digest)
+
+    def put_stream(self, src: Path, on_chunk=None) -> str:
+        tmp = self._tmp_path()
+        digest = copy_and_hash(src, tmp, on_chunk)
+        self._publish(tmp, digest)
+        return digest
+
+    def link(self, digest: str, dst: Path, refill) -> None:
+        """Make `dst` a link to the object; `refill()` re-publishes it if a
+        concurrent gc removed it between publish and link."""
+
+        for _ in range(2):
+            dst.unlink(missing_ok=True)
+            try:
+                os.link(self.path(digest), dst)
+                return
+            except FileNotFoundError:
+                refill()
+            except OSError:
+                # Cross-device or link limit: fall back to reflink, then copy.
+                _reflink_or_copy(self.path(digest), dst)
+                return
+        os.link(self.path(digest), dst)
+
+
+# ---------------------------------------------------------------------------
+# Merkle trees (manifest v0.3): RFC 6962 hashing over fixed-size file chunks
+# ---------------------------------------------------------------------------
+
+MERKLE_ALGORITHM = "sha256-rfc6962"
+MERKLE_CHUNK_SIZE = 1024 * 1024
+# Payload covered by the tree; identity.json attests to it, so it records the root
+MERKLE_FILES = ["input.json", "output.json", "policy.json"]
+
+
+def merkle_leaf(data) -> bytes:
+    h = hashlib.sha256(b"\x00")
+    h.update(data)
+    return h.digest()
+
+
+def merkle_node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def _split(n: int) -> int:
+    """Largest power of two strictly less than n (n >= 2)."""
+
+    return 1 << ((n - 1).bit_length() - 1)
+
+
+def merkle_root(leaves: list[bytes]) -> bytes:
+    if not leaves:
+        return hashlib.sha256(b"").digest()
+    if len(leaves) == 1:
+        return leaves[0]
+    k = _split(len(leaves))
+    return merkle_node(merkle_root(leaves[:k]), merkle_root(leaves[k:]))
+
+
+def merkle_path(leaves: list[bytes], index: int) -> list[bytes]:
+    """Audit path for leaves[index], leaf-to-root order (RFC 6962 PATH)."""
+
+    if len(leaves) <= 1:
+        return []
+    k = _split(len(leaves))
+    if index < k:
+        return merkle_path(leaves[:k], index) + [merkle_root(leaves[k:])]
+    return merkle_path(leaves[k:], index - k) + [merkle_root(leaves[:k])]
+
+
+def merkle_root_from_path(leaf: bytes, index: int, count: int, path: list[bytes]) -> bytes | None:
+    """Recompute the root from an audit path (RFC 9162 2.1.3.2); None if malformed."""
+
+    if not 0 <= index < count:
+        return None
+    fn, sn, r = index, count - 1, leaf
+    for p in path:
+        if sn == 0:
+            return None
+        if fn & 1 or fn == sn:
+            r = merkle_node(p, r)
+            while not fn & 1 and fn:
+                fn >>= 1
+                sn >>= 1
+        else:
+            r = merkle_node(r, p)
+        fn >>= 1
+        sn >>= 1
+    return r if sn == 0 else None
+
+
+def merkle_file_leaf(path: str, file_root: bytes) -> bytes:
+    return merkle_leaf(path.encode("utf-8") + b"\x00" + file_root)
+
+
+class MerkleFile:
+    """Chunk leaves of one file, accumulated as its bytes are emitted."""
+
+    def __init__(self, chunk_size: int):
+        self.chunk_size = chunk_size
+        self.size = 0
+        self.leaves: list[bytes] = []
+        self._pending = bytearray()
+
+    def update(self, data) -> None:
+        cs = self.chunk_size
+        mv = memoryview(data)
+        self.size += len(mv)
+        i = 0
+        if self._pending:
+            i = min(len(mv), cs - len(self._pending))
+            self._pending += mv[:i]
+            if len(self._pending) < cs:
+                return
+            self.leaves.append(merkle_leaf(self._pending))
+            self._pending = bytearray()
+        while len(mv) - i >= cs:
+            self.leaves.append(merkle_leaf(mv[i:i + cs]))
+            i += cs
+        self._pending += mv[i:]
+
+    def finish(self) -> "MerkleFile":
+        if self._pending or not self.leaves:
+            self.leaves.append(merkle_leaf(self._pending))
+            self._pending = bytearray()
+        return self
+
+    def entry(self, path: str) -> dict:
+        return {
+            "path": path,
+            "size": self.size,
+            "root": merkle_root(self.leaves).hex(),
+            "leaves": [leaf.hex() for leaf in self.leaves],
+        }
+
+
+def merkle_bundle_root(files: list[dict]) -> str:
+    """Root over per-file entries: leaf = H(0x00 || path || 0x00 || file_root)."""
+
+    return merkle_root([merkle_file_leaf(f["path"], bytes.fromhex(f["root"])) for f in files]).hex()
+
+
+def manifest_self_sha256(manifest: dict) -> str:
+    """Hash of the manifest as serialized before it lists itself.
+
+    Accepts either that intermediate form or a finalized manifest, from which
+    `self_sha256` and the trailing manifest.json entry are stripped first.
+    """
+
+    files = manifest["bundle"]["files"]
+    if "self_sha256" in manifest or (files and files[-1].get("path") == "manifest.json"):
+        manifest = {k: v for k, v in manifest.items() if k != "self_sha256"}
+        manifest["bundle"] = dict(manifest["bundle"], files=[f for f in files if f.get("path") != "manifest.json"])
+    return sha256_bytes(json_serializer(manifest.get("canonicalization"))(manifest))
+
+
+class BundleWriter:
+    """Writes bundle members and hashes the exact bytes as they are emitted.
+
+    Digests are kept in memory, so the manifest self-hash and sha256sum.txt are
+    finalized without reading anything back from disk. With an ObjectStore,
+    members listed in the manifest are linked from the store instead; with a
+    PackWriter, every member is appended to the pack and `outdir` is unused.
+    """
+
+    def __init__(
+        self,
+        outdir: Path,
+        store: ObjectStore | None = None,
+        merkle_chunk_size: int | None = None,
+        timer: "PhaseTimer | None" = None,
+        pack: "PackWriter | None" = None,
+        canonicalization: str | None = None,
+    ):
+        self.outdir = outdir
+        self.store = store
+        self.pack = pack
+        self.dumps = json_serializer(canonicalization)
+        self.merkle_chunk_size = merkle_chunk_size
+        self.timer = timer
+        self.bytes_written = 0
+        # Result-cache outcome of this run; reported in the run summary and
+        # metrics.json, never in the bundle, so replays stay byte-identical.
+        self.result_cache: dict | None = None
+        self.digests: dict[str, str] = {}
+        self.merkle: dict[str, MerkleFile] = {}
+
+    def _merkle_file(self, rel: str) -> MerkleFile | None:
+        if self.merkle_chunk_size is None or rel not in MERKLE_FILES:
+            return None
+        self.merkle[rel] = MerkleFile(self.merkle_chunk_size)
+        return self.merkle[rel]
+
+    def merkle_entries(self) -> list[dict]:
+        return [self.merkle[rel].entry(rel) for rel in MERKLE_FILES]
+
+    def _stored(self, rel: str) -> bool:
+        return self.store is not None and rel in STORED_FILES
+
+    def _timed(self, name: str):
+        return self.timer.phase(name) if self.timer is not None else nullcontext()
+
+    def write_bytes(self, rel: str, data: bytes) -> str:
+        with self._timed("io.hash"):
+            digest = sha256_bytes(data)
+            mf = self._merkle_file(rel)
+            if mf is not None:
+                mf.update(data)
+                mf.finish()
+        with self._timed("io.write"):
+            if self.pack is not None:
+                self.pack.add_bytes(rel, data, digest)
+            elif self._stored(rel):
+                self.store.put_bytes(digest, data)
+                self.store.link(digest, self.outdir / rel, lambda: self.store.put_bytes(digest, data))
+            else:
+                unlink_target(self.outdir / rel)
+                (self.outdir / rel).write_bytes(data)
+        self.bytes_written += len(data)
+        self.digests[rel] = digest
+        return digest
+
+    def write_json(self, rel: str, obj: object) -> str:
+        return self.write_bytes(rel, self.dumps(obj))
+
+    def write_manifest(self, manifest: dict) -> dict:
+        """Add the manifest self-hash and write manifest.json once.
+
+        `self_sha256` is the hash of the manifest serialized *before* it lists
+        itself; that intermediate form is only hashed, never written.
+        """
+
+        manifest_sha = manifest_self_sha256(manifest)
+        manifest["bundle"]["files"].append({"path": "manifest.json", "sha256": manifest_sha})
+        manifest["self_sha256"] = manifest_sha
+        self.write_json("manifest.json", manifest)
+        return manifest
+
+    def write_sha256sum(self, rels: list[str] = BUNDLE_FILES) -> None:
+        lines = [f"{self.digests[rel]}  {rel}" for rel in rels]
+        self.write_bytes("sha256sum.txt", ("\n".join(lines) + "\n").encode("utf-8"))
+
+    def copy_stream(self, rel: str, src: Path) -> str:
+        """Copy `src` byte-for-byte into the bundle, hashing it as it streams."""
+
+        mf = self._merkle_file(rel)
+        on_chunk = mf.update if mf is not None else None
+        with self._timed("io.copy_hash"):
+            if self.pack is not None:
+                digest = self.pack.add_file(rel, src, on_chunk)
+            elif self._stored(rel):
+                digest = self.store.put_stream(src, on_chunk)
+                self.store.link(digest, self.outdir / rel, lambda: self.store.put_stream(src))
+            else:
+                digest = copy_and_hash(src, self.outdir / rel, on_chunk)
+            if mf is not None:
+                mf.finish()
+        self.bytes_written += src.stat().st_size
+        self.digests[rel] = digest
+        return digest
+
+    def copy_file(self, rel: str, src: Path, digest: str) -> str:
+        """Place a previously hashed file into the bundle without re-hashing it."""
+
+        with self._timed("io.write"):
+            if self.pack is not None:
+                self.pack.add_file(rel, src)
+            elif self._stored(rel):
+                self.store.put_file(digest, src)
+                self.store.link(digest, self.outdir / rel, lambda: self.store.put_file(digest, src))
+            else:
+                import shutil
+
+                unlink_target(self.outdir / rel)
+                shutil.copyfile(src, self.outdir / rel)
+        self.bytes_written += src.stat().st_size
+        mf = self._merkle_file(rel)
+        if mf is not None:
+            with src.open("rb") as f:
+                while chunk := f.read(STREAM_CHUNK):
+                    mf.update(chunk)
+            mf.finish()
+        self.digests[rel] = digest
+        return digest
+
+
+# ---------------------------------------------------------------------------
+# Atomic publish: stage the bundle in a sibling directory, then rename it
+# ---------------------------------------------------------------------------
+
+DURABILITY = ["none", "bundle", "batch"]
+GROUP_COMMIT_JOBS = 64  # --durability batch: bundles published per os.sync()
+_STAGING_TAGS = (".staging-", ".old-")
+
+
+def is_staging_dir(name: str) -> bool:
+    return name.startswith(".") and any(tag in name for tag in _STAGING_TAGS)
+
+
+def staging_dir(outdir: Path) -> Path:
+    """Fresh hidden sibling of `outdir` on the same filesystem, so publishing is a rename."""
+
+    outdir = outdir.absolute()
+    if os.path.ismount(outdir):
+        raise ValueError(f"{outdir} is a mount point and cannot be replaced by a rename; use a directory inside it")
+    outdir.parent.mkdir(parents=True, exist_ok=True)
+    stage = outdir.parent / f".{outdir.name}.staging-{os.getpid()}-{os.urandom(4).hex()}"
+    stage.mkdir()
+    return stage
+
+
+def _fsync_path(path: Path) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def fsync_tree(d: Path) -> None:
+    """fsync every file in a (flat) bundle directory and the directory itself."""
+
+    with os.scandir(d) as it:
+        for entry in it:
+            if entry.is_file(follow_symlinks=False):
+                _fsync_path(Path(entry.path))
+    _fsync_path(d)
+
+
+def _rename_into_place(stage: Path, outdir: Path) -> Path | None:
+    """Rename `stage` to `outdir`; an existing non-empty `outdir` is moved aside
+    first and returned so the caller can delete it once the new one is durable."""
+
+    try:
+        os.rename(stage, outdir)
+        return None
+    except OSError as e:
+        if not outdir.is_dir() or e.errno not in (errno.ENOTEMPTY, errno.EEXIST):
+            raise
+    old = outdir.parent / f".{outdir.name}.old-{os.getpid()}-{os.urandom(4).hex()}"
+    os.rename(outdir, old)
+    os.rename(stage, outdir)
+    return old
+
+
+def publish_bundles(staged: list[tuple[Path, Path]], durability: str = "none") -> None:
+    """Publish (staging dir, outdir) pairs, each with a single rename.
+
+    "bundle" fsyncs each staged bundle before its rename; "batch" issues one
+    os.sync() for the whole group instead. Either way the parent directories
+    are fsynced once after the renames, and replaced bundles are removed last.
+    """
+
+    import shutil
+
+    if durability == "bundle":
+        for stage, _ in staged:
+            fsync_tree(stage)
+    elif durability == "batch" and staged:
+        os.sync()
+
+    replaced = [_rename_into_place(stage, outdir) for stage, outdir in staged]
+    if durability != "none":
+        for parent in sorted({outdir.absolute().parent for _, outdir in staged}):
+            _fsync_path(parent)
+    for old in replaced:
+        if old is not None:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+# ---------------------------------------------------------------------------
+# Packed bundles: one file per job, or an append-only segment per batch
+# ---------------------------------------------------------------------------
+
+PACK_SUFFIX = ".eppack"
+PACK_SEGMENT = "bundles" + PACK_SUFFIX
+PACK_INDEX_SCHEMA = "eigenproof.pack.index.v0.1"
+PACK_MAGIC = b"EPPACK01"
+PACK_FOOTER_SIZE = 24  # magic, index length, record length (u64 little-endian)
+PACK_MEMBERS = BUNDLE_FILES + ["sha256sum.txt"]
+
+
+def pack_path(outdir: Path) -> Path:
+    return outdir.with_name(outdir.name + PACK_SUFFIX)
+
+
+def _pwrite_all(fd: int, data: bytes, offset: int) -> None:
+    view = memoryview(data)
+    while view:
+        n = os.pwrite(fd, view, offset)
+        view = view[n:]
+        offset += n
+
+
+class PackWriter:
+    """Appends one bundle as a pack record at the end of an open file.
+
+    A record is the member bytes back to back, a compact JSON index of
+    {path, offset, length, sha256} with offsets relative to the record start,
+    and a fixed footer (PACK_MAGIC, index length, record length). Records do
+    not depend on their position, so a segment is records concatenated and is
+    read backwards from its end (see read_pack_index).
+    """
+
+    def __init__(self, fd: int):
+        self.fd = fd
+        self.start = os.lseek(fd, 0, os.SEEK_END)
+        self.pos = self.start
+        self.members: list[dict] = []
+
+    def _member(self, rel: str, length: int, digest: str) -> None:
+        self.members.append({"path": rel, "offset": self.pos - self.start, "length": length, "sha256": digest})
+        self.pos += length
+
+    def add_bytes(self, rel: str, data: bytes, digest: str) -> None:
+        _pwrite_all(self.fd, data, self.pos)
+        self._member(rel, len(data), digest)
+
+    def add_file(self, rel: str, src: Path, on_chunk=None) -> str:
+        digest, size = copy_into_fd(src, self.fd, self.pos, on_chunk)
+        self._member(rel, size, digest)
+        return digest
+
+    def finish(self, name: str) -> int:
+        """Write the index and footer; returns the record length."""
+
+        index = {"schema": PACK_INDEX_SCHEMA, "name": name, "members": self.members}
+        index_bytes = json.dumps(index, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        length = self.pos - self.start + len(index_bytes) + PACK_FOOTER_SIZE
+        footer = PACK_MAGIC + len(index_bytes).to_bytes(8, "little") + length.to_bytes(8, "little")
+        _pwrite_all(self.fd, index_bytes + footer, self.pos)
+        self.pos = self.start + length
+        return length
+
+
+def _read_pack_record_index(f, path: Path, end: int) -> dict:
+    """Index of the record ending at `end`, with its absolute `start`."""
+
+    f.seek(max(0, end - PACK_FOOTER_SIZE))
+    footer = f.read(PACK_FOOTER_SIZE)
+    index_len = int.from_bytes(footer[8:16], "little")
+    length = int.from_bytes(footer[16:24], "little")
+    if len(footer) < PACK_FOOTER_SIZE or footer[:8] != PACK_MAGIC or not index_len + PACK_FOOTER_SIZE <= length <= end:
+        raise ValueError(f"{path}: no valid pack record ends at offset {end} (not a pack, or an interrupted append)")
+    f.seek(end - PACK_FOOTER_SIZE - index_len)
+    index = json.loads(f.read(index_len))
+    if index.get("schema") != PACK_INDEX_SCHEMA:
+        raise ValueError(f"{path}: unsupported pack index schema {index.get('schema')!r}")
+    index["start"] = end - length
+    return index
+
+
+def read_pack_index(path: Path) -> list[dict]:
+    """Index of every record in a pack file, in file order, with its absolute `start`."""
+
+    records = []
+    with path.open("rb") as f:
+        end = f.seek(0, os.SEEK_END)
+        while end > 0:
+            index = _read_pack_record_index(f, path, end)
+            records.append(index)
+            end = index["start"]
+    records.reverse()
+    return records
+
+
+def extract_pack_record(path: Path, record: dict, dest: Path) -> None:
+    """Write one record's members to `dest`, checking each against its sha256."""
+
+    dest.mkdir(parents=True, exist_ok=True)
+    with path.open("rb", buffering=0) as f:
+        for m in record["members"]:
+            if m["path"] not in PACK_MEMBERS:
+                raise ValueError(f"{path}: record {record['name']!r} has unexpected member {m['path']!r}")
+            h = hashlib.sha256()
+            offset, left = record["start"] + m["offset"], m["length"]
+            unlink_target(dest / m["path"])
+            with (dest / m["path"]).open("wb") as out:
+                while left:
+                    chunk = os.pread(f.fileno(), min(STREAM_CHUNK, left), offset)
+                    if not chunk:
+                        raise ValueError(f"{path}: record {record['name']!r} is truncated")
+                    h.update(chunk)
+                    out.write(chunk)
+                    offset += len(chunk)
+                    left -= len(chunk)
+            if h.hexdigest() != m["sha256"]:
+                raise ValueError(f"{path}: {record['name']}/{m['path']} does not match its indexed sha256")
+
+
+def append_pack_records(segment: Path, records: list[Path], durability: str = "none") -> list[int]:
+    """Append single-record pack files to `segment` in order; returns their offsets.
+
+    Only a segment whose last record is intact (or a new one) is appended to,
+    so an interrupted append is reported instead of being buried under newer
+    records. Just the tail is checked, keeping each group commit O(1) in the
+    segment size; `unpack` walks the whole index.
+    """
+
+    created = not segment.exists()
+    if not created:
+        with segment.open("rb") as f:
+            end = f.seek(0, os.SEEK_END)
+            if end:
+                _read_pack_record_index(f, segment, end)
+    offsets = []
+    fd = os.open(segment, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        end = os.lseek(fd, 0, os.SEEK_END)
+        for rec in records:
+            offsets.append(end)
+            end += copy_into_fd(rec, fd, end)[1]
+            if durability == "bundle":
+                os.fsync(fd)
+        if durability == "batch":
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+    if created and durability != "none":
+        _fsync_path(segment.parent)
+    return offsets
+
+
+def unpack_main(argv: list[str]) -> int:
+    import argparse
+
+    ap = argparse.ArgumentParser(prog="runner.py unpack", description="Extract packed bundles into <outdir>/<name>/ (same layout as a directory bundle)")
+    ap.add_argument("packs", nargs="+", type=Path, help="Pack files (<job_id>.eppack or a batch segment)")
+    ap.add_argument("--outdir", type=Path, help="Output root (required unless --list)")
+    ap.add_argument("--name", action="append", default=[], help="Only extract this record (repeatable)")
+    ap.add_argument("--list", action="store_true", help="Print the index of each record instead of extracting")
+    args = ap.parse_args(argv)
+    if not args.list and args.outdir is None:
+        ap.error("--outdir is required unless --list is given")
+
+    failed = 0
+    found: set[str] = set()
+    for pack in args.packs:
+        try:
+            # A segment may hold re-runs of a job; the last record wins.
+            latest = {r["name"]: r for r in read_pack_index(pack)}
+            for name, rec in latest.items():
+                if args.name and name not in args.name:
+                    continue
+                found.add(name)
+                if args.list:
+                    print(json.dumps({"pack": str(pack), **rec}, ensure_ascii=False))
+                    continue
+                dest = args.outdir / _job_dirname({"job_id": name}, str(pack))
+                extract_pack_record(pack, rec, dest)
+                print(json.dumps({"ok": True, "pack": str(pack), "name": name, "outdir": str(dest)}, ensure_ascii=False))
+        except (OSError, ValueError) as e:
+            failed += 1
+            print(json.dumps({"ok": False, "pack": str(pack), "error": f"{type(e).__name__}: {e}"}, ensure_ascii=False))
+    for name in sorted(set(args.name) - found):
+        failed += 1
+        print(json.dumps({"ok": False, "name": name, "error": "no such record"}, ensure_ascii=False))
+    return 1 if failed else 0
 
-    manifest = {
-        "schema": "eigenproof.manifest.v0.2",
-        "run_id": run_id,
-        "created_at": utc_now_iso(args.deterministic),
-        "runtime": {
-            "python": platform.python_version(),
-            "platform": platform.platform(),
-            "git_commit": git_commit_or_none(),
-            "policy_sha256": sha256_file(policy_json),
-            "docker_image_digest": docker_image_digest_or_none(),
-        },
-        "source": {
-            "git_commit": git_commit_or_none(),
-        },
-        "bundle": {
-            "files": [
-                {"path": "input.json", "sha256": sha256_file(input_copy)},
-                {"path": "output.json", "sha256": sha256_file(output_json)},
-                {"path": "identity.json", "sha256": sha256_file(identity_json)},
-                {"path": "policy.json", "sha256": sha256_file(policy_json)},
-            ]
-        },
-    }
 
-    manifest_json.write_text(json.dumps(manifest, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+# ---------------------------------------------------------------------------
+# Deterministic result cache (opt-in, content-addressed, LRU-bounded)
+# ---------------------------------------------------------------------------
 
-    manifest_sha = sha256_file(manifest_json)
-    manifest["bundle"]["files"].append({"path": "manifest.json", "sha256": manifest_sha})
-    manifest["self_sha256"] = manifest_sha
-    manifest_json.write_text(json.dumps(manifest, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+RESULT_CACHE_SCHEMA = "eigenproof.result_cache.v0.1"
+RESULT_CACHE_FILES = ["output.json", "identity.json"]
+
+
+def code_fingerprint(prov: Provenance) -> str:
+    """Hash of everything in identity.json that describes the code that ran."""
+
+    code = {"git_commit": prov.git_commit, "image_digest": prov.image_digest, "files": [list(f) for f in prov.code_files]}
+    return sha256_bytes(json.dumps(code, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+
+
+class ResultCache:
+    """Content-addressed store of output.json/identity.json keyed by
+    (input digest, policy hash, code fingerprint).
+
+    Only valid for --deterministic runs, where those three fully determine the
+    bytes. Entries are evicted least-recently-used once `max_entries` or
+    `max_bytes` is exceeded; hit/miss totals are kept in stats.json.
+    """
+
+    def __init__(self, root: Path, max_entries: int = 10_000, max_bytes: int | None = None):
+        self.root = root
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        (root / "entries").mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(input_sha: str, policy_sha: str, code_fp: str, variant: str = "") -> str:
+        """`variant` names options that change the cached bytes (e.g. manifest version)."""
+
+        return sha256_bytes(f"{input_sha}|{policy_sha}|{code_fp}|{variant}".encode("utf-8"))
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.root / "entries" / key[:2] / key
+
+    @contextmanager
+    def _locked_stats(self):
+        import fcntl
+
+        with (self.root / "lock").open("a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            stats_path = self.root / "stats.json"
+            try:
+                stats = json.loads(stats_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                stats = {"schema": RESULT_CACHE_SCHEMA, "hits": 0, "misses": 0, "entries": 0, "bytes": 0}
+            yield stats
+            tmp = stats_path.with_name(f".stats.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(stats, indent=2) + "\n", encoding="utf-8")
+            os.replace(tmp, stats_path)
+
+    def lookup(self, key: str) -> tuple[Path, dict[str, str]] | None:
+        """Return (entry_dir, digests) for a cached result, or None."""
+
+        d = self._entry_dir(key)
+        try:
+            meta = json.loads((d / "entry.json").read_text(encoding="utf-8"))
+            digests = {rel: meta["digests"][rel] for rel in RESULT_CACHE_FILES}
+            if not all(isinstance(v, str) for v in digests.values()):
+                return None  # a damaged entry is a miss
+            os.utime(d / "entry.json")  # LRU recency
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return d, digests
+
+    def store(self, key: str, files: dict[str, bytes]) -> bool:
+        """Publish an entry. Returns False if another writer (process or serve
+        thread) already published the same key, which the caller counts as a hit."""
+
+        import shutil
+        import tempfile
+
+        d = self._entry_dir(key)
+        if d.exists():
+            return False
+        d.parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(prefix=f".{key}.", suffix=".tmp", dir=d.parent))
+        try:
+            size = 0
+            for rel, data in files.items():
+                (tmp / rel).write_bytes(data)
+                size += len(data)
+            meta = {"schema": RESULT_CACHE_SCHEMA, "bytes": size, "digests": {rel: sha256_bytes(b) for rel, b in files.items()}}
+            (tmp / "entry.json").write_text(json.dumps(meta, indent=2) + "\n", encoding="utf-8")
+            os.rename(tmp, d)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            if d.exists():
+                return False  # lost the publish race
+            raise
+        with self._locked_stats() as stats:
+            stats["entries"] += 1
+            stats["bytes"] += size
+            if stats["entries"] > self.max_entries or (self.max_bytes is not None and stats["bytes"] > self.max_bytes):
+                self._evict(stats)
+        return True
+
+    def _evict(self, stats: dict) -> None:
+        import shutil
+
+        entries = []
+        for meta_path in (self.root / "entries").glob("*/*/entry.json"):
+            try:
+                st = meta_path.stat()
+                size = json.loads(meta_path.read_text(encoding="utf-8")).get("bytes", 0)
+            except (OSError, ValueError):
+                continue
+            entries.append((st.st_mtime_ns, meta_path.parent, size))
+        entries.sort()
+
+        count = len(entries)
+        total = sum(size for _, _, size in entries)
+        for _, d, size in entries:
+            if count <= self.max_entries and (self.max_bytes is None or total <= self.max_bytes):
+                break
+            shutil.rmtree(d, ignore_errors=True)
+            count -= 1
+            total -= size
+        stats["entries"] = count
+        stats["bytes"] = total
+
+    def record(self, hit: bool) -> dict:
+        """Count a lookup and return the running totals for the manifest."""
+
+        with self._locked_stats() as stats:
+            stats["hits" if hit else "misses"] += 1
+            return {"result": "hit" if hit else "miss", "hits": stats["hits"], "misses": stats["misses"]}
+
+
+_RESULT_CACHES: dict[tuple, ResultCache] = {}
+
+
+def _result_cache(opts: "RunOptions") -> ResultCache | None:
+    if opts.result_cache is None:
+        return None
+    k = (str(opts.result_cache), opts.result_cache_max_entries, opts.result_cache_max_bytes)
+    if k not in _RESULT_CACHES:
+        _RESULT_CACHES[k] = ResultCache(opts.result_cache, opts.result_cache_max_entries, opts.result_cache_max_bytes)
+    return _RESULT_CACHES[k]
+
+
+_OBJECT_STORES: dict[str, ObjectStore] = {}
+
+
+def _object_store(opts: "RunOptions") -> ObjectStore | None:
+    if opts.object_store is None:
+        return None
+    k = str(opts.object_store)
+    if k not in _OBJECT_STORES:
+        _OBJECT_STORES[k] = ObjectStore(opts.object_store)
+    return _OBJECT_STORES[k]
+
+
+# ---------------------------------------------------------------------------
+# Instrumentation: per-phase timings, metrics sinks, profiling
+# ---------------------------------------------------------------------------
+
+METRICS_SCHEMA = "eigenproof.metrics.v0.1"
+
+
+class PhaseTimer:
+    """Monotonic (perf_counter_ns) timings per phase; repeated phases accumulate.
+
+    Phases are sequential wall-clock sections of a run; `io.*` entries are
+    hashing/writing time accumulated inside them by the BundleWriter.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter_ns()
+        self.ns: dict[str, int] = {}
+
+    def add(self, name: str, ns: int) -> None:
+        self.ns[name] = self.ns.get(name, 0) + ns
+
+    @contextmanager
+    def phase(self, name: str):
+        t = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter_ns() - t)
+
+    def metrics(self, **fields) -> dict:
+        timings = {k: round(v / 1e6, 3) for k, v in self.ns.items()}
+        timings["total"] = round((time.perf_counter_ns() - self.started) / 1e6, 3)
+        return {"schema": METRICS_SCHEMA, **fields, "timings_ms": timings}
+
+
+class MetricsSinks:
+    """Per-job timings to a JSONL file and/or a Prometheus textfile.
+
+    Specs are `jsonl:PATH` (one line per job, appended) or `prom:PATH`
+    (cumulative per-phase seconds for this process, rewritten atomically).
+    """
+
+    def __init__(self, specs: list[str]):
+        self.jsonl: list[Path] = []
+        self.prom: list[Path] = []
+        for spec in specs:
+            kind, _, path = spec.partition(":")
+            if kind not in {"jsonl", "prom"} or not path:
+                raise ValueError(f"bad metrics sink {spec!r}; expected jsonl:PATH or prom:PATH")
+            (self.jsonl if kind == "jsonl" else self.prom).append(Path(path))
+        self.runs = 0
+        self.failures = 0
+        self.seconds: dict[str, float] = {}
+        self._flushed = 0.0
+
+    def record(self, summary: dict) -> None:
+        if not (self.jsonl or self.prom):
+            return
+        self.runs += 1
+        self.failures += 0 if summary.get("ok") else 1
+        timings = summary.get("timings_ms") or {}
+        for phase, ms in timings.items():
+            self.seconds[phase] = self.seconds.get(phase, 0.0) + ms / 1000
+        line = json.dumps({"job_id": summary.get("job_id"), "run_id": summary.get("run_id"), "ok": summary.get("ok"), "timings_ms": timings}, ensure_ascii=False)
+        for p in self.jsonl:
+            with p.open("a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        if self.prom and time.monotonic() - self._flushed >= 1.0:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.prom:
+            return
+        lines = [
+            "# HELP eigenproof_runs_total Bundles generated by this runner process.",
+            "# TYPE eigenproof_runs_total counter",
+            f"eigenproof_runs_total {self.runs}",
+            "# HELP eigenproof_run_failures_total Bundle generations that failed.",
+            "# TYPE eigenproof_run_failures_total counter",
+            f"eigenproof_run_failures_total {self.failures}",
+            "# HELP eigenproof_phase_seconds_total Time spent per run phase.",
+            "# TYPE eigenproof_phase_seconds_total counter",
+        ]
+        lines += [f'eigenproof_phase_seconds_total{{phase="{k}"}} {v:.6f}' for k, v in sorted(self.seconds.items())]
+        for p in self.prom:
+            tmp = p.with_name(f".{p.name}.{os.getpid()}.tmp")
+            tmp.write_text("\n".join(lines) + "\n", encoding="utf-8")
+            os.replace(tmp, p)
+        self._flushed = time.monotonic()
+
+
+def run_profiled(fn, path: str) -> int:
+    """Run `fn()` under cProfile and dump the stats to `path` (EIGENPROOF_PROFILE)."""
+
+    import cProfile
+
+    prof = cProfile.Profile()
+    try:
+        return prof.runcall(fn)
+    finally:
+        prof.dump_stats(path)
+
+
+# ---------------------------------------------------------------------------
+# Bundle generation
+# ---------------------------------------------------------------------------
+
+
+_RUN_OPTIONS = [
+    ("deterministic", False),
+    ("result_cache", None),  # Path | None
+    ("result_cache_max_entries", 10_000),
+    ("result_cache_max_bytes", None),  # int | None
+    ("object_store", None),  # Path | None
+    ("manifest_version", "0.2"),
+    ("merkle_chunk_size", MERKLE_CHUNK_SIZE),
+    ("metrics", False),
+    ("atomic", False),
+    ("durability", "none"),
+    ("pack", False),
+    ("json_format", "pretty"),
+]
+
+
+class RunOptions(namedtuple("RunOptions", [k for k, _ in _RUN_OPTIONS], defaults=[v for _, v in _RUN_OPTIONS])):
+    """Immutable per-run settings shared by the CLI, batch workers and serve mode."""
+
+    __slots__ = ()
+
+
+def add_run_options(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--deterministic", action="store_true", help="Use fixed timestamps/run_id for deterministic replay")
+    ap.add_argument("--provenance-cache", type=Path, help="Persist provenance metadata here across runs (env: EIGENPROOF_PROVENANCE_CACHE)")
+    ap.add_argument("--result-cache", type=Path, help="Reuse results of identical deterministic jobs from this directory (requires --deterministic)")
+    ap.add_argument("--result-cache-max-entries", type=int, default=10_000, help="LRU bound on result cache entries")
+    ap.add_argument("--result-cache-max-bytes", type=int, help="LRU bound on result cache size in bytes")
+    ap.add_argument("--object-store", type=Path, help="Deduplicate bundle members into this sha256 object store (e.g. <outroot>/.objects)")
+    ap.add_argument("--manifest-version", choices=["0.2", "0.3"], default="0.2", help="0.3 adds a Merkle tree over chunks of the bundle payload")
+    ap.add_argument("--merkle-chunk-size", type=int, default=MERKLE_CHUNK_SIZE, help="Chunk size in bytes for manifest v0.3 Merkle leaves")
+    ap.add_argument("--metrics", action="store_true", help="Write per-phase timings to <bundle>/metrics.json (not hashed)")
+    ap.add_argument("--metrics-sink", action="append", default=[], help="Also export timings: jsonl:PATH or prom:PATH (repeatable; implies --metrics)")
+    ap.add_argument("--atomic", action="store_true", help="Stage each bundle in a hidden sibling directory and publish it with one rename")
+    ap.add_argument("--durability", choices=DURABILITY, default="none", help="With --atomic: fsync each bundle, or group-commit a batch with one sync (default: none)")
+    ap.add_argument("--json-format", choices=sorted(JSON_FORMATS), default="pretty", help="canonical: RFC 8785 + NFC strings (compact, key order independent); recorded in the manifest")
+    ap.add_argument("--pack", action="store_true", help="Write each bundle as one indexed pack file (<job_id>.eppack; batch: one segment) instead of a directory")
+
+
+def run_options_from_args(ap: argparse.ArgumentParser, args: argparse.Namespace, group_commit: bool = False) -> RunOptions:
+    """`group_commit` is set by callers that publish staged bundles themselves
+    (batch); elsewhere --durability batch means one fsync per bundle."""
+
+    if args.result_cache is not None and not args.deterministic:
+        ap.error("--result-cache requires --deterministic")
+    if args.merkle_chunk_size <= 0:
+        ap.error("--merkle-chunk-size must be positive")
+    for spec in args.metrics_sink:
+        if spec.partition(":")[0] not in {"jsonl", "prom"} or not spec.partition(":")[2]:
+            ap.error(f"--metrics-sink {spec!r}: expected jsonl:PATH or prom:PATH")
+    if args.durability != "none" and not (args.atomic or args.pack):
+        ap.error("--durability requires --atomic or --pack")
+    if args.pack and args.object_store is not None:
+        ap.error("--pack and --object-store are mutually exclusive")
+    return RunOptions(
+        deterministic=args.deterministic,
+        result_cache=args.result_cache,
+        result_cache_max_entries=args.result_cache_max_entries,
+        result_cache_max_bytes=args.result_cache_max_bytes,
+        object_store=args.object_store,
+        manifest_version=args.manifest_version,
+        merkle_chunk_size=args.merkle_chunk_size,
+        metrics=args.metrics or bool(args.metrics_sink),
+        atomic=args.atomic,
+        durability="bundle" if args.durability == "batch" and not group_commit else args.durability,
+        pack=args.pack,
+        json_format=args.json_format,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Task kinds: output.json "result" per task.kind
+# ---------------------------------------------------------------------------
+
+DEFAULT_TASK_KIND = "hash_demo"
+HASH_CHAIN_CHECKPOINTS = 16
+# Upper bounds so one input cannot pin a worker (~1 min of hashing) or
+# bloat output.json.
+HASH_CHAIN_MAX_N = 10**8
+HASH_CHAIN_MAX_CHECKPOINTS = 4096
+
+
+class TaskInputError(ValueError):
+    """A task that no builder in TASK_KINDS can run."""
+
+
+def _task_int(task: dict, field: str, default: int) -> int:
+    try:
+        return int(task.get(field) or default)
+    except (TypeError, ValueError) as e:
+        raise TaskInputError(f"task.{field} must be an integer: {e}") from e
+
+
+def task_hash_demo(task: dict) -> dict:
+    msg = (task.get("message") or "").strip()
+    n = _task_int(task, "n", 0)
+
+    digest = hashlib.sha256((msg + "|" + str(n)).encode("utf-8")).hexdigest()
+    return {
+        "input_message": msg,
+        "n": n,
+        "sha256": digest,
+    }
+
+
+def sha256_iterate(digest: bytes, count: int) -> bytes:
+    sha256 = hashlib.sha256
+    for _ in range(count):
+        digest = sha256(digest).digest()
+    return digest
+
+
+def _hash_chain_params(task: dict) -> tuple[str, int, int]:
+    msg = (task.get("message") or "").strip()
+    n = _task_int(task, "n", 0)
+    count = _task_int(task, "checkpoints", HASH_CHAIN_CHECKPOINTS)
+    if not 0 <= n <= HASH_CHAIN_MAX_N:
+        raise TaskInputError(f"hash_chain needs 0 <= task.n <= {HASH_CHAIN_MAX_N}")
+    if not 1 <= count <= HASH_CHAIN_MAX_CHECKPOINTS:
+        raise TaskInputError(f"hash_chain needs 1 <= task.checkpoints <= {HASH_CHAIN_MAX_CHECKPOINTS}")
+    return msg, n, count
+
+
+def task_hash_chain(task: dict) -> dict:
+    """h0 = sha256(message), h_i = sha256(h_{i-1}); reports h_n plus evenly
+    spaced checkpoints so verification can be split into independent segments."""
+
+    msg, n, count = _hash_chain_params(task)
+
+    seed = hashlib.sha256(msg.encode("utf-8")).digest()
+    digest, done = seed, 0
+    checkpoints = []
+    for k in range(1, min(count, n) + 1):
+        i = n * k // min(count, n)
+        digest = sha256_iterate(digest, i - done)
+        done = i
+        checkpoints.append({"i": i, "sha256": digest.hex()})
+    return {
+        "kind": "hash_chain",
+        "input_message": msg,
+        "n": n,
+        "seed_sha256": seed.hex(),
+        "checkpoints": checkpoints,
+        "sha256": digest.hex(),
+    }
+
+
+# task.kind -> result builder; a missing kind means DEFAULT_TASK_KIND. Fields a
+# builder reads must be listed in INPUT_FIELDS for --stream-input, and each kind
+# needs an entry in _TASK_CHECKS so bad parameters fail before any write.
+TASK_KINDS = {
+    "hash_demo": task_hash_demo,
+    "hash_chain": task_hash_chain,
+}
+
+
+# task.kind -> a cheap check of the fields its builder reads (raises
+# TaskInputError); hash_demo is cheap enough to run as its own check.
+_TASK_CHECKS = {
+    "hash_demo": task_hash_demo,
+    "hash_chain": _hash_chain_params,
+}
+
+
+def task_kind(task: dict) -> str:
+    kind = task.get("kind") or DEFAULT_TASK_KIND
+    if kind not in TASK_KINDS:
+        raise TaskInputError(f"unknown task.kind {kind!r} (known: {', '.join(sorted(TASK_KINDS))})")
+    return kind
+
+
+def validate_task(data: dict) -> None:
+    """Raise TaskInputError for a task build_output would reject.
+
+    run_job calls this before any bundle file is written, so a bad task never
+    leaves a partial bundle or overwrites part of an existing one.
+    """
+
+    task = data.get("task") or {}
+    if not isinstance(task, dict):
+        raise TaskInputError("task must be an object")
+    _TASK_CHECKS[task_kind(task)](task)
+
+
+def build_output(data: dict, deterministic: bool = False) -> dict:
+    # Deterministic core output hash; timestamps/run_id are runtime-variant unless --deterministic
+    task = data.get("task") or {}
+
+    return {
+        "schema": "eigenproof.output.v0.1",
+        "job_id": data.get("job_id"),
+        "ok": True,
+        "result": TASK_KINDS[task_kind(task)](task),
+        "generated_at": utc_now_iso(deterministic),
+    }
+
+
+def _chain_segment(segment: tuple[str, int, int]) -> str:
+    start_hex, start_i, end_i = segment
+    return sha256_iterate(bytes.fromhex(start_hex), end_i - start_i).hex()
+
+
+_SHA256_HEX = re.compile(r"[0-9a-f]{64}")
+
+
+def _hash_chain_format_error(result: object, need_message: bool) -> str | None:
+    """Why `result` is not shaped like a task_hash_chain result, or None."""
+
+    if not isinstance(result, dict):
+        return "result is not an object"
+    if need_message and not isinstance(result.get("input_message"), str):
+        return "input_message is missing or not a string"
+    if not isinstance(result.get("n"), int):
+        return "n is missing or not an integer"
+    for key in ("seed_sha256", "sha256"):
+        if not isinstance(result.get(key), str) or not _SHA256_HEX.fullmatch(result[key]):
+            return f"{key} is missing or not a sha256 hex digest"
+    checkpoints = result.get("checkpoints")
+    if not isinstance(checkpoints, list):
+        return "checkpoints is missing or not a list"
+    for cp in checkpoints:
+        if not isinstance(cp, dict) or not isinstance(cp.get("i"), int) or not isinstance(cp.get("sha256"), str) or not _SHA256_HEX.fullmatch(cp["sha256"]):
+            return f"malformed checkpoint {cp!r}"
+    return None
+
+
+def check_hash_chain(result: dict, message: str | None = None, workers: int = 1) -> list[dict]:
+    """Problems with a hash_chain result (empty list = valid).
+
+    Each segment between consecutive checkpoints starts from the recorded
+    digest, so segments are independent and are re-computed in parallel.
+    """
+
+    error = _hash_chain_format_error(result, message is None)
+    if error is not None:
+        return [{"check": "hash_chain.format", "error": error}]
+
+    failures = []
+    msg = result["input_message"] if message is None else message.strip()
+    seed = hashlib.sha256(msg.encode("utf-8")).hexdigest()
+    if seed != result["seed_sha256"]:
+        failures.append({"check": "hash_chain.seed", "expected": result["seed_sha256"], "actual": seed})
+
+    checkpoints = result["checkpoints"]
+    indexes = [cp["i"] for cp in checkpoints]
+    if indexes != sorted(set(indexes)) or (indexes and (indexes[0] <= 0 or indexes[-1] != result["n"])) or (not indexes and result["n"] != 0):
+        failures.append({"check": "hash_chain.checkpoints", "error": f"checkpoint indexes must increase from 1 to n={result['n']}"})
+        return failures
+    final = checkpoints[-1]["sha256"] if checkpoints else result["seed_sha256"]
+    if result["sha256"] != final:
+        failures.append({"check": "hash_chain.sha256", "expected": final, "actual": result["sha256"]})
+
+    starts = [(result["seed_sha256"], 0)] + [(cp["sha256"], cp["i"]) for cp in checkpoints[:-1]]
+    segments = [(h, i, cp["i"]) for (h, i), cp in zip(starts, checkpoints)]
+    if workers > 1 and len(segments) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=min(workers, len(segments))) as pool:
+            digests = list(pool.map(_chain_segment, segments))
+    else:
+        digests = [_chain_segment(seg) for seg in segments]
+    for cp, got in zip(checkpoints, digests):
+        if got != cp["sha256"]:
+            failures.append({"check": "hash_chain.segment", "i": cp["i"], "expected": cp["sha256"], "actual": got})
+    return failures
+
+
+def verify_chain_main(argv: list[str]) -> int:
+    import argparse
+
+    ap = argparse.ArgumentParser(prog="runner.py verify-chain", description="Re-compute a hash_chain result, checkpoint segments in parallel")
+    ap.add_argument("bundle", type=Path, help="Bundle directory (or an output.json)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (default: CPU count)")
+    args = ap.parse_args(argv)
+
+    output_path = args.bundle if args.bundle.is_file() else args.bundle / "output.json"
+    try:
+        doc = json.loads(output_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        print(json.dumps({"ok": False, "output": str(output_path), "check": "output.json", "error": f"{type(e).__name__}: {e}"}, ensure_ascii=False))
+        return 1
+    result = doc.get("result") if isinstance(doc, dict) else None
+    if not isinstance(result, dict) or result.get("kind") != "hash_chain":
+        raise SystemExit(f"{output_path} is not a hash_chain result")
+    input_path = output_path.with_name("input.json")
+    message = None
+    if input_path.exists():
+        # The chain must start from the message in input.json, not just the one echoed in output.json
+        message = (extract_input_fields(input_path).get("task") or {}).get("message") or ""
+
+    failures = check_hash_chain(result, message, args.workers)
+    for fail in failures:
+        print(json.dumps({"ok": False, "output": str(output_path), **fail}, ensure_ascii=False))
+    checkpoints = result.get("checkpoints")
+    segments = len(checkpoints) if isinstance(checkpoints, list) else None
+    summary = {"ok": not failures, "n": result.get("n"), "segments": segments, "workers": args.workers, "sha256": result.get("sha256")}
+    print(json.dumps(summary), file=sys.stderr)
+    return 1 if failures else 0
+
+
+def run_job(
+    data: dict,
+    outdir: Path,
+    opts: RunOptions = RunOptions(),
+    input_path: Path | None = None,
+    timer: PhaseTimer | None = None,
+) -> dict:
+    """Generate one proof bundle for an already-parsed input document.
+
+    With `input_path`, input.json is a byte-for-byte copy of that file and
+    `data` only needs the fields in INPUT_FIELDS (see extract_input_fields).
+    `timer` lets the caller include its own phases (e.g. input parsing).
+    With `opts.atomic` the bundle is built in a staging directory and renamed
+    to `outdir`; under durability "batch" the rename is left to the caller
+    (see publish_bundles) and the summary carries the staging path.
+    With `opts.pack` the bundle is written as one pack record to
+    `<outdir>.eppack` instead (see PackWriter).
+    Returns the run summary printed by the CLI.
+    """
+
+    timer = timer or PhaseTimer()
+    if JSON_FORMATS[opts.json_format] is not None:
+        if input_path is not None:
+            raise ValueError("--stream-input copies input.json verbatim and cannot be combined with --json-format canonical")
+        data = canonical_input(data)
+    validate_task(data)
+    if opts.pack:
+        return _run_packed(data, outdir, opts, input_path, timer)
+    if not opts.atomic:
+        outdir.mkdir(parents=True, exist_ok=True)
+        return _run_dir(data, outdir, outdir, opts, input_path, timer)
+
+    import shutil
+
+    stage = staging_dir(outdir)
+    try:
+        return _run_dir(data, outdir, stage, opts, input_path, timer)
+    except BaseException:
+        shutil.rmtree(stage, ignore_errors=True)
+        raise
+
+
+def _run_dir(data: dict, outdir: Path, workdir: Path, opts: RunOptions, input_path: Path | None, timer: PhaseTimer) -> dict:
+    chunk_size = opts.merkle_chunk_size if opts.manifest_version == "0.3" else None
+    writer = BundleWriter(workdir, _object_store(opts), chunk_size, timer, canonicalization=JSON_FORMATS[opts.json_format])
+    run_id = _build_bundle(data, outdir, writer, opts, input_path, timer)
+
+    summary = {"ok": True, "outdir": str(outdir), "run_id": run_id}
+    if writer.result_cache is not None:
+        summary["result_cache"] = writer.result_cache
+    if workdir != outdir:
+        if opts.durability == "batch":
+            summary["staging"] = str(workdir)
+        else:
+            with timer.phase("publish"):
+                publish_bundles([(workdir, outdir)], opts.durability)
+            workdir = outdir
+    if opts.metrics:
+        _attach_metrics(summary, timer, data, writer, workdir)
+    return summary
+
+
+def _run_packed(data: dict, outdir: Path, opts: RunOptions, input_path: Path | None, timer: PhaseTimer) -> dict:
+    import shutil
+
+    target = pack_path(outdir)
+    stage = staging_dir(outdir) if opts.atomic else None
+    path = stage / target.name if stage is not None else target
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            pack = PackWriter(fd)
+            chunk_size = opts.merkle_chunk_size if opts.manifest_version == "0.3" else None
+            writer = BundleWriter(outdir, None, chunk_size, timer, pack, JSON_FORMATS[opts.json_format])
+            run_id = _build_bundle(data, outdir, writer, opts, input_path, timer)
+            with timer.phase("pack"):
+                pack.finish(outdir.name)
+                if opts.durability != "none":
+                    os.fsync(fd)
+        finally:
+            os.close(fd)
+        if stage is not None:
+            with timer.phase("publish"):
+                os.rename(path, target)
+                if opts.durability != "none":
+                    _fsync_path(target.parent)
+                stage.rmdir()
+    except BaseException:
+        if stage is not None:
+            shutil.rmtree(stage, ignore_errors=True)
+        raise
+
+    summary = {"ok": True, "pack": str(target), "run_id": run_id}
+    if writer.result_cache is not None:
+        summary["result_cache"] = writer.result_cache
+    if opts.metrics:
+        # No metrics.json: a pack holds exactly the bundle members.
+        _attach_metrics(summary, timer, data, writer, None)
+    return summary
+
+
+def _attach_metrics(summary: dict, timer: PhaseTimer, data: dict, writer: BundleWriter, metrics_dir: Path | None) -> None:
+    fields = {"run_id": summary["run_id"], "job_id": data.get("job_id"), "bytes_written": writer.bytes_written}
+    if writer.result_cache is not None:
+        fields["result_cache"] = writer.result_cache
+    metrics = timer.metrics(**fields)
+    if metrics_dir is not None:
+        # Not listed in the manifest or sha256sum.txt: timings must not affect bundle hashes.
+        (metrics_dir / "metrics.json").write_text(json.dumps(metrics, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    summary["timings_ms"] = metrics["timings_ms"]
+
+
+def _build_bundle(data: dict, outdir: Path, writer: BundleWriter, opts: RunOptions, input_path: Path | None, timer: PhaseTimer) -> str:
+    """Write every bundle member through `writer`; returns the run_id."""
+
+    deterministic = opts.deterministic
+    v03 = opts.manifest_version == "0.3"
+    with timer.phase("provenance"):
+        prov = provenance_snapshot()
+
+    run_id = f"{data.get('job_id','run')}-" + ("deterministic" if deterministic else time.strftime("%Y%m%d_%H%M%S", time.gmtime()))
+
+    with timer.phase("input"):
+        if input_path is not None:
+            input_sha = writer.copy_stream("input.json", input_path)
+        else:
+            input_sha = writer.write_json("input.json", data)
+    with timer.phase("policy"):
+        policy_bytes = writer.dumps(build_policy())
+        policy_sha = writer.write_bytes("policy.json", policy_bytes)
+
+    with timer.phase("result_cache"):
+        cache = _result_cache(opts) if deterministic else None
+        variant = f"manifest-{opts.manifest_version}" + (f"-chunk-{opts.merkle_chunk_size}" if v03 else "")
+        if opts.json_format != "pretty":
+            variant += f"-json-{opts.json_format}"
+        cache_key = cache.key(input_sha, policy_sha, code_fingerprint(prov), variant) if cache else None
+        cached = cache.lookup(cache_key) if cache else None
+        cache_hit = cached is not None
+        if cached is not None:
+            entry_dir, digests = cached
+            for rel in RESULT_CACHE_FILES:
+                writer.copy_file(rel, entry_dir / rel, digests[rel])
+
+    if cached is None:
+        with timer.phase("output"):
+            output_bytes = writer.dumps(build_output(data, deterministic))
+            writer.write_bytes("output.json", output_bytes)
+
+    merkle = None
+    if v03:
+        with timer.phase("merkle"):
+            files = writer.merkle_entries()
+            merkle = {"algorithm": MERKLE_ALGORITHM, "chunk_size": opts.merkle_chunk_size, "root": merkle_bundle_root(files), "files": files}
+
+    if cached is None:
+        # Next-level identity wrapper
+        with timer.phase("identity"):
+            ident_merkle = None
+            if merkle is not None:
+                ident_merkle = {k: merkle[k] for k in ["algorithm", "chunk_size", "root"]}
+                ident_merkle["files"] = list(MERKLE_FILES)
+            identity_bytes = writer.dumps(build_identity(outdir, run_id, deterministic, ident_merkle))
+            writer.write_bytes("identity.json", identity_bytes)
+        if cache:
+            with timer.phase("result_cache"):
+                if not cache.store(cache_key, {"output.json": output_bytes, "identity.json": identity_bytes}):
+                    cache_hit = True  # an identical concurrent job published first
+    if cache:
+        writer.result_cache = cache.record(cache_hit)
+
+    with timer.phase("manifest"):
+        manifest = {
+            "schema": f"eigenproof.manifest.v{opts.manifest_version}",
+            "run_id": run_id,
+            "created_at": utc_now_iso(deterministic),
+            "runtime": {
+                "python": prov.python,
+                "platform": prov.platform,
+                "git_commit": prov.git_commit,
+                "policy_sha256": policy_sha,
+                "docker_image_digest": prov.image_digest,
+            },
+            "source": {
+                "git_commit": prov.git_commit,
+            },
+            "bundle": {
+                "files": [{"path": rel, "sha256": writer.digests[rel]} for rel in BUNDLE_FILES[:-1]],
+            },
+        }
+        if JSON_FORMATS[opts.json_format] is not None:
+            manifest["canonicalization"] = JSON_FORMATS[opts.json_format]
+        if merkle is not None:
+            manifest["merkle"] = merkle
+
+        writer.write_manifest(manifest)
+
+        # sha256sum.txt (bundle)
+        writer.write_sha256sum()
+
+    return run_id
+
+
+# ---------------------------------------------------------------------------
+# Batch mode: many jobs per interpreter, fanned out over a process pool
+# ---------------------------------------------------------------------------
+
+
+def _job_dirname(data: dict, source: str) -> str:
+    job_id = data.get("job_id")
+    if not isinstance(job_id, str) or not job_id.strip():
+        raise ValueError(f"{source}: missing job_id")
+    if job_id in {".", ".."} or "/" in job_id or "\\" in job_id or "\x00" in job_id:
+        raise ValueError(f"{source}: job_id is not a safe directory name: {job_id!r}")
+    return job_id
+
+
+def iter_batch_inputs(src: Path):
+    """Yield (source_label, parsed_input) from a JSONL file or a directory of *.json files."""
+
+    if src.is_dir():
+        for p in sorted(src.glob("*.json")):
+            yield str(p), json.loads(p.read_text(encoding="utf-8"))
+        return
+
+    with src.open("r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            yield f"{src}:{lineno}", json.loads(line)
+
+
+def _batch_worker(job: tuple[str, dict, str, RunOptions]) -> dict:
+    source, data, outdir, opts = job
+    try:
+        summary = run_job(data, Path(outdir), opts)
+    except Exception as e:
+        return {"ok": False, "job_id": data.get("job_id"), "source": source, "error": f"{type(e).__name__}: {e}"}
+    return {"ok": summary["ok"], "job_id": data.get("job_id"), **summary}
+
+
+def batch_main(argv: list[str]) -> int:
+    import argparse
+
+    ap = argparse.ArgumentParser(prog="runner.py batch", description="Generate one proof bundle per job_id")
+    ap.add_argument("--input", required=True, help="JSONL file (one input per line) or directory of input JSON files")
+    ap.add_argument("--outdir", required=True, help="Output root; each bundle is written to <outdir>/<job_id>/ (--pack: appended to <outdir>/bundles.eppack)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (default: CPU count)")
+    add_run_options(ap)
+    args = ap.parse_args(argv)
+    opts = run_options_from_args(ap, args, group_commit=True)
+
+    src = Path(args.input)
+    if not src.exists():
+        raise SystemExit(f"Input not found: {src}")
+
+    inputs: list[tuple[str, dict, str]] = []
+    seen: dict[str, str] = {}
+    for source, data in iter_batch_inputs(src):
+        name = _job_dirname(data, source)
+        if name in seen:
+            raise SystemExit(f"duplicate job_id {name!r}: {seen[name]} and {source}")
+        seen[name] = source
+        inputs.append((source, data, name))
+
+    # Resolve provenance once; workers reuse the snapshot instead of each
+    # spawning `git rev-parse` and re-hashing the code files.
+    prov = provenance_snapshot(args.provenance_cache)
+    sinks = MetricsSinks(args.metrics_sink)
+
+    root = Path(args.outdir)
+    # --pack: workers write one-record packs into a staging directory and the
+    # parent appends them to the segment in input order. It is created only
+    # once the inputs are known to be valid; the finally below removes it.
+    segment = root / PACK_SEGMENT
+    job_root = staging_dir(segment) if opts.pack else root
+    job_opts = opts._replace(atomic=False, durability="none") if opts.pack else opts
+    jobs = [(source, data, str(job_root / name), job_opts) for source, data, name in inputs]
+
+    failed = 0
+    workers = max(1, min(args.workers, len(jobs) or 1))
+    if workers == 1:
+        results = map(_batch_worker, jobs)
+        pool = None
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_set_provenance, initargs=(prov,))
+        results = pool.map(_batch_worker, jobs, chunksize=max(1, len(jobs) // (workers * 4)))
+    # --durability batch: workers leave bundles staged; they are published here
+    # in input order, GROUP_COMMIT_JOBS at a time behind a single os.sync().
+    # Pack records are appended to the segment the same way.
+    group: list[dict] = []
+
+    def emit(summary: dict) -> None:
+        sinks.record(summary)
+        print(json.dumps(summary, ensure_ascii=False), flush=True)
+
+    def commit_group() -> None:
+        if opts.pack:
+            records = [Path(sm["pack"]) for sm in group]
+            for sm, rec, offset in zip(group, records, append_pack_records(segment, records, opts.durability)):
+                rec.unlink()
+                sm.update(pack=str(segment), offset=offset)
+        else:
+            publish_bundles([(Path(sm.pop("staging")), Path(sm["outdir"])) for sm in group], "batch")
+        for sm in group:
+            emit(sm)
+        group.clear()
+
+    try:
+        for summary in results:
+            failed += 0 if summary.get("ok") else 1
+            if "staging" not in summary and not (opts.pack and summary.get("ok")):
+                emit(summary)
+                continue
+            group.append(summary)
+            if len(group) >= GROUP_COMMIT_JOBS:
+                commit_group()
+        commit_group()
+    finally:
+        sinks.flush()
+        if pool is not None:
+            pool.shutdown()
+        if opts.pack:
+            import shutil
+
+            shutil.rmtree(job_root, ignore_errors=True)
+
+    return 1 if failed else 0
+
+
+# ---------------------------------------------------------------------------
+# Serve mode: resident runner over a Unix socket or localhost HTTP
+# ---------------------------------------------------------------------------
+
+
+class _Busy(Exception):
+    pass
+
+
+class _Conflict(Exception):
+    pass
+
+
+class RunnerServer:
+    """Accepts jobs concurrently and runs them on a thread pool.
+
+    At most `max_inflight` jobs run at once and at most `max_queue` more may
+    wait; anything beyond that is rejected immediately ("busy") so callers can
+    back off. A job whose job_id is already in flight is rejected ("conflict")
+    since both would write the same bundle. Request bodies larger than
+    `max_request_bytes` are refused. `drain()` stops accepting new jobs and
+    waits for in-flight ones.
+    """
+
+    def __init__(
+        self,
+        outroot: Path,
+        opts: RunOptions,
+        max_inflight: int,
+        max_queue: int,
+        sinks: MetricsSinks | None = None,
+        max_request_bytes: int = 16 << 20,
+    ):
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.outroot = outroot
+        self.opts = opts
+        self.sinks = sinks or MetricsSinks([])
+        self.max_pending = max_inflight + max_queue
+        self.max_request_bytes = max_request_bytes
+        self.pending = 0
+        self.inflight_ids: set[str] = set()
+        self.draining = False
+        self.idle = asyncio.Event()
+        self.idle.set()
+        self.executor = ThreadPoolExecutor(max_workers=max_inflight, thread_name_prefix="eigenproof-job")
+
+    def _run(self, name: str, data: dict) -> dict:
+        outdir = self.outroot / name
+        return {"ok": True, "job_id": data.get("job_id"), **run_job(data, outdir, self.opts)}
+
+    async def submit(self, payload: object) -> dict:
+        import asyncio
+
+        if self.draining:
+            raise _Busy("draining")
+        if self.pending >= self.max_pending:
+            raise _Busy("busy")
+        if not isinstance(payload, dict):
+            raise ValueError("job must be a JSON object")
+        data = payload.get("input", payload)
+        if not isinstance(data, dict):
+            raise ValueError("input must be a JSON object")
+        name = _job_dirname(data, "request")
+        if name in self.inflight_ids:
+            raise _Conflict(f"job_id {name!r} is already in flight")
+
+        self.pending += 1
+        self.inflight_ids.add(name)
+        self.idle.clear()
+        try:
+            summary = await asyncio.get_running_loop().run_in_executor(self.executor, self._run, name, data)
+            self.sinks.record(summary)
+            return summary
+        finally:
+            self.inflight_ids.discard(name)
+            self.pending -= 1
+            if not self.pending:
+                self.idle.set()
+
+    async def handle(self, raw: bytes) -> tuple[int, dict]:
+        try:
+            return 200, await self.submit(json.loads(raw))
+        except _Busy as e:
+            return 503, {"ok": False, "error": str(e)}
+        except _Conflict as e:
+            return 409, {"ok": False, "error": str(e)}
+        except ValueError as e:
+            return 400, {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        except Exception as e:
+            return 500, {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+    async def drain(self) -> None:
+        self.draining = True
+        await self.idle.wait()
+        self.executor.shutdown(wait=True)
+        self.sinks.flush()
+
+    # --- Unix socket: one JSON job per line, one JSON summary per line ---
+
+    async def serve_jsonl(self, reader, writer) -> None:
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:  # line longer than the stream limit
+                    body = {"ok": False, "error": f"request exceeds {self.max_request_bytes} bytes"}
+                    writer.write(json.dumps(body).encode("utf-8") + b"\n")
+                    await writer.drain()
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                _, body = await self.handle(line)
+                writer.write(json.dumps(body, ensure_ascii=False).encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    # --- Minimal HTTP/1.1: POST /run, GET /healthz ---
+
+    async def serve_http(self, reader, writer) -> None:
+        reasons = {
+            200: "OK",
+            400: "Bad Request",
+            404: "Not Found",
+            409: "Conflict",
+            413: "Payload Too Large",
+            503: "Service Unavailable",
+            500: "Internal Server Error",
+        }
+        try:
+            while request_line := await reader.readline():
+                parts = request_line.decode("latin-1").split()
+                headers = {}
+                while (h := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    k, _, v = h.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                # The body is left unread on a bad or oversized length, so the
+                # connection cannot be reused after the error response.
+                bad_length = length < 0 or length > self.max_request_bytes
+                body = await reader.readexactly(length) if length > 0 and not bad_length else b""
+
+                if length < 0:
+                    status, resp = 400, {"ok": False, "error": "invalid Content-Length"}
+                elif length > self.max_request_bytes:
+                    status, resp = 413, {"ok": False, "error": f"request exceeds {self.max_request_bytes} bytes"}
+                elif len(parts) < 2:
+                    status, resp = 400, {"ok": False, "error": "malformed request line"}
+                elif parts[0] == "POST" and parts[1] == "/run":
+                    status, resp = await self.handle(body)
+                elif parts[0] == "GET" and parts[1] == "/healthz":
+                    status, resp = 200, {"ok": not self.draining, "pending": self.pending}
+                else:
+                    status, resp = 404, {"ok": False, "error": "not found"}
+
+                payload = json.dumps(resp, ensure_ascii=False).encode("utf-8")
+                keep_alive = headers.get("connection", "").lower() != "close" and not self.draining and not bad_length
+                writer.write(
+                    f"HTTP/1.1 {status} {reasons.get(status, 'Error')}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+                    + payload
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError, EOFError):
+            pass
+        finally:
+            writer.close()
+
+
+async def _serve(args: argparse.Namespace, opts: RunOptions) -> None:
+    import asyncio
+    import signal
+
+    srv = RunnerServer(
+        Path(args.outdir), opts, args.max_inflight, args.max_queue, MetricsSinks(args.metrics_sink), args.max_request_bytes
+    )
+    if args.socket:
+        sock = Path(args.socket)
+        sock.unlink(missing_ok=True)
+        # +1 for the newline terminating the job line.
+        server = await asyncio.start_unix_server(srv.serve_jsonl, path=str(sock), limit=args.max_request_bytes + 1)
+        where = f"unix:{sock}"
+    else:
+        host, _, port = args.http.rpartition(":")
+        server = await asyncio.start_server(srv.serve_http, host=host or "127.0.0.1", port=int(port))
+        where = "http://" + ",".join("%s:%s" % s.getsockname()[:2] for s in server.sockets)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    print(json.dumps({"ok": True, "serving": where, "max_inflight": args.max_inflight, "max_queue": args.max_queue}), flush=True)
+    async with server:
+        await stop.wait()
+        # Graceful drain: stop accepting, let in-flight jobs finish.
+        server.close()
+        await srv.drain()
+    if args.socket:
+        Path(args.socket).unlink(missing_ok=True)
+    print(json.dumps({"ok": True, "drained": True}), flush=True)
+
+
+def serve_main(argv: list[str]) -> int:
+    import argparse
+    import asyncio
+    import ipaddress
+
+    ap = argparse.ArgumentParser(prog="runner.py serve", description="Keep the runner resident and accept jobs over a socket")
+    where = ap.add_mutually_exclusive_group(required=True)
+    where.add_argument("--socket", help="Unix socket path (newline-delimited JSON jobs)")
+    where.add_argument("--http", help="localhost HOST:PORT for HTTP (POST /run, GET /healthz)")
+    ap.add_argument("--outdir", required=True, help="Output root; each bundle is written to <outdir>/<job_id>/")
+    ap.add_argument("--max-inflight", type=int, default=os.cpu_count() or 1, help="Jobs generated concurrently")
+    ap.add_argument("--max-queue", type=int, default=64, help="Jobs allowed to wait before requests are rejected as busy")
+    ap.add_argument("--max-request-bytes", type=int, default=16 << 20, help="Largest accepted job body; larger requests are rejected (HTTP 413)")
+    add_run_options(ap)
+    args = ap.parse_args(argv)
+    opts = run_options_from_args(ap, args)
+
+    if args.http:
+        host = args.http.rpartition(":")[0].strip("[]") or "127.0.0.1"
+        if host != "localhost":
+            try:
+                loopback = ipaddress.ip_address(host).is_loopback
+            except ValueError:
+                loopback = False
+            if not loopback:
+                ap.error("--http must bind a loopback address")
+
+    # Pay provenance discovery once, before the first job arrives.
+    provenance_snapshot(args.provenance_cache)
+    asyncio.run(_serve(args, opts))
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# Object store garbage collection
+# ---------------------------------------------------------------------------
+
+
+def referenced_objects(roots: list[Path], skip: Path) -> set[str]:
+    """sha256 of every bundle file listed by a manifest.json under `roots`."""
+
+    refs: set[str] = set()
+    skip = skip.resolve()
+    for root in roots:
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if (Path(dirpath) / d).resolve() != skip]
+            if "manifest.json" not in filenames:
+                continue
+            try:
+                manifest = json.loads((Path(dirpath) / "manifest.json").read_text(encoding="utf-8"))
+                refs.update(f["sha256"] for f in manifest["bundle"]["files"] if f.get("sha256"))
+            except (OSError, ValueError, KeyError, TypeError):
+                continue
+    return refs
+
+
+def gc_main(argv: list[str]) -> int:
+    import argparse
+
+    ap = argparse.ArgumentParser(prog="runner.py gc", description="Remove object-store entries no bundle references")
+    ap.add_argument("--object-store", type=Path, required=True, help="Object store root")
+    ap.add_argument("--root", type=Path, action="append", required=True, help="Bundle output root to scan for manifests (repeatable)")
+    ap.add_argument("--grace-seconds", type=int, default=3600, help="Keep objects and temp files younger than this")
+    ap.add_argument("--dry-run", action="store_true", help="Report what would be removed without deleting")
+    args = ap.parse_args(argv)
+
+    store = ObjectStore(args.object_store)
+    refs = referenced_objects(args.root, store.root)
+    cutoff = time.time() - args.grace_seconds
+
+    kept = removed = freed = 0
+    for obj in sorted((store.root / "sha256").glob("*/*")):
+        try:
+            st = obj.stat()
+        except FileNotFoundError:
+            continue
+        # A hardlink from any bundle (even one outside --root) keeps nlink > 1.
+        if obj.name in refs or st.st_nlink > 1 or st.st_mtime > cutoff:
+            kept += 1
+            continue
+        removed += 1
+        freed += st.st_size
+        if not args.dry_run:
+            obj.unlink(missing_ok=True)
+
+    for tmp in store.tmp.iterdir():
+        try:
+            if tmp.stat().st_mtime <= cutoff and not args.dry_run:
+                tmp.unlink(missing_ok=True)
+        except FileNotFoundError:
+            continue
+
+    print(json.dumps({"ok": True, "kept": kept, "removed": removed, "bytes_freed": freed, "dry_run": args.dry_run}))
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# Verify: runner bundles and proof bundles, hashed in a thread pool
+# ---------------------------------------------------------------------------
+
+VERIFY_CACHE_SCHEMA = "eigenproof.verify_cache.v0.1"
+
+
+class VerifyCache:
+    """sha256 per absolute path, trusted while (dev, inode, mtime_ns, size) match."""
+
+    def __init__(self, path: Path | None):
+        self.path = path
+        self.entries: dict[str, list] = {}
+        self.dirty = False
+        if path is not None:
+            try:
+                j = json.loads(path.read_text(encoding="utf-8"))
+                if j.get("schema") == VERIFY_CACHE_SCHEMA:
+                    self.entries = j["entries"]
+            except (OSError, ValueError, KeyError):
+                pass
+
+    def sha256(self, p: Path) -> str:
+        st = p.stat()
+        key = [st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size]
+        k = str(p.resolve())
+        hit = self.entries.get(k)
+        if hit is not None and hit[:4] == key:
+            return hit[4]
+        digest = sha256_file(p)
+        self.entries[k] = key + [digest]
+        self.dirty = True
+        return digest
+
+    def save(self) -> None:
+        if self.path is None or not self.dirty:
+            return
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_text(json.dumps({"schema": VERIFY_CACHE_SCHEMA, "entries": self.entries}) + "\n", encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def find_bundles(paths: list[Path]) -> list[tuple[str, Path]]:
+    """(kind, dir) for every runner bundle (manifest.json) and proof bundle (sha256.json)."""
+
+    found = []
+    for root in paths:
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(d for d in dirnames if not is_staging_dir(d))
+            if "manifest.json" in filenames:
+                found.append(("runner", Path(dirpath)))
+            elif "sha256.json" in filenames:
+                found.append(("proof", Path(dirpath)))
+    return found
+
+
+def _check_hashes(d: Path, expected: dict[str, str], check: str, cache: VerifyCache) -> list[dict]:
+    failures = []
+    for rel, want in expected.items():
+        try:
+            got = cache.sha256(d / rel)
+        except OSError as e:
+            failures.append({"check": check, "path": rel, "error": f"{type(e).__name__}: {e.strerror or e}"})
+            continue
+        if got != want:
+            failures.append({"check": check, "path": rel, "expected": want, "actual": got})
+    return failures
+
+
+def verify_runner_bundle(d: Path, cache: VerifyCache) -> list[dict]:
+    try:
+        manifest = json.loads((d / "manifest.json").read_text(encoding="utf-8"))
+        listed = {f["path"]: f["sha256"] for f in manifest["bundle"]["files"]}
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        return [{"check": "manifest.parse", "path": "manifest.json", "error": f"{type(e).__name__}: {e}"}]
+
+    failures = []
+    self_sha = manifest.get("self_sha256")
+    try:
+        actual_self = manifest_self_sha256(manifest)
+    except (ValueError, TypeError) as e:
+        return [{"check": "manifest.canonicalization", "path": "manifest.json", "error": f"{type(e).__name__}: {e}"}]
+    if self_sha != actual_self:
+        failures.append({"check": "manifest.self_sha256", "path": "manifest.json", "expected": self_sha, "actual": actual_self})
+    if listed.get("manifest.json") != self_sha:
+        failures.append({"check": "manifest.files", "path": "manifest.json", "expected": self_sha, "actual": listed.get("manifest.json")})
+
+    failures += _check_hashes(d, {rel: sha for rel, sha in listed.items() if rel != "manifest.json"}, "manifest.files", cache)
+    if "merkle" in manifest:
+        failures += check_merkle_structure(manifest["merkle"])
+
+    try:
+        sums = {}
+        for line in (d / "sha256sum.txt").read_text(encoding="utf-8").splitlines():
+            sha, _, rel = line.partition("  ")
+            sums[rel] = sha
+    except OSError as e:
+        return failures + [{"check": "sha256sum.parse", "path": "sha256sum.txt", "error": f"{type(e).__name__}: {e.strerror or e}"}]
+
+    if set(sums) != set(listed):
+        failures.append({"check": "bundle.file_list", "expected": sorted(listed), "actual": sorted(sums)})
+    failures += _check_hashes(d, sums, "sha256sum", cache)
+    return failures
+
+
+def verify_proof_bundle(d: Path, cache: VerifyCache) -> list[dict]:
+    try:
+        hashes = json.loads((d / "sha256.json").read_text(encoding="utf-8"))
+        if not isinstance(hashes, dict):
+            raise ValueError("sha256.json must be an object")
+    except (OSError, ValueError) as e:
+        return [{"check": "sha256.parse", "path": "sha256.json", "error": f"{type(e).__name__}: {e}"}]
+    return _check_hashes(d, hashes, "sha256.json", cache)
+
+
+def check_merkle_structure(merkle: dict) -> list[dict]:
+    """Recompute file roots from their leaves and the bundle root from the files."""
+
+    failures = []
+    try:
+        cs = merkle["chunk_size"]
+        for f in merkle["files"]:
+            leaves = [bytes.fromhex(h) for h in f["leaves"]]
+            if len(leaves) != max(1, -(-f["size"] // cs)):
+                failures.append({"check": "merkle.leaf_count", "path": f["path"], "expected": max(1, -(-f["size"] // cs)), "actual": len(leaves)})
+            root = merkle_root(leaves).hex()
+            if root != f["root"]:
+                failures.append({"check": "merkle.file_root", "path": f["path"], "expected": f["root"], "actual": root})
+        root = merkle_bundle_root(merkle["files"])
+        if root != merkle["root"]:
+            failures.append({"check": "merkle.root", "expected": merkle["root"], "actual": root})
+    except (KeyError, TypeError, ValueError) as e:
+        failures.append({"check": "merkle.parse", "error": f"{type(e).__name__}: {e}"})
+    return failures
+
+
+def verify_main(argv: list[str]) -> int:
+    import argparse
+    from concurrent.futures import ThreadPoolExecutor
+
+    ap = argparse.ArgumentParser(prog="runner.py verify", description="Verify runner bundles and proof bundles; failures are printed as JSONL")
+    ap.add_argument("paths", nargs="+", type=Path, help="Bundle directories or roots to walk")
+    ap.add_argument("--workers", type=int, default=min(32, (os.cpu_count() or 1) * 2), help="Hashing threads")
+    ap.add_argument("--cache", type=Path, help="Persistent stat-keyed hash cache (skips unchanged files)")
+    ap.add_argument("--all", action="store_true", help="Also print a line for every bundle that verified OK")
+    args = ap.parse_args(argv)
+
+    cache = VerifyCache(args.cache)
+    bundles = find_bundles(args.paths)
+    checks = {"runner": verify_runner_bundle, "proof": verify_proof_bundle}
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        results = pool.map(lambda b: checks[b[0]](b[1], cache), bundles)
+        for (kind, d), failures in zip(bundles, results):
+            failed += 1 if failures else 0
+            for f in failures:
+                print(json.dumps({"ok": False, "kind": kind, "bundle": str(d), **f}, ensure_ascii=False))
+            if not failures and args.all:
+                print(json.dumps({"ok": True, "kind": kind, "bundle": str(d)}, ensure_ascii=False))
+
+    cache.save()
+    print(json.dumps({"ok": not failed, "bundles": len(bundles), "failed": failed}), file=sys.stderr)
+    return 1 if failed else 0
+
+
+# ---------------------------------------------------------------------------
+# Merkle inclusion proofs and partial (spot-check) verification
+# ---------------------------------------------------------------------------
+
+MERKLE_PROOF_SCHEMA = "eigenproof.merkle_proof.v0.1"
+
+
+def _load_merkle(bundle: Path) -> dict:
+    manifest = json.loads((bundle / "manifest.json").read_text(encoding="utf-8"))
+    if "merkle" not in manifest:
+        raise SystemExit(f"{bundle}: manifest has no Merkle tree (generate with --manifest-version 0.3)")
+    return manifest["merkle"]
+
+
+def _read_chunk(p: Path, index: int, chunk_size: int) -> bytes:
+    with p.open("rb") as f:
+        f.seek(index * chunk_size)
+        return f.read(chunk_size)
+
+
+def build_merkle_proof(merkle: dict, path: str, chunk: int) -> dict:
+    files = merkle["files"]
+    file_index = next((i for i, f in enumerate(files) if f["path"] == path), None)
+    if file_index is None:
+        raise SystemExit(f"{path} is not covered by the Merkle tree ({', '.join(f['path'] for f in files)})")
+    entry = files[file_index]
+    leaves = [bytes.fromhex(h) for h in entry["leaves"]]
+    if not 0 <= chunk < len(leaves):
+        raise SystemExit(f"{path} has {len(leaves)} chunks; --chunk {chunk} is out of range")
+    file_leaves = [merkle_file_leaf(f["path"], bytes.fromhex(f["root"])) for f in files]
+    return {
+        "schema": MERKLE_PROOF_SCHEMA,
+        "algorithm": merkle["algorithm"],
+        "chunk_size": merkle["chunk_size"],
+        "root": merkle["root"],
+        "path": path,
+        "file_index": file_index,
+        "file_count": len(files),
+        "file_root": entry["root"],
+        "file_audit_path": [h.hex() for h in merkle_path(file_leaves, file_index)],
+        "chunk_index": chunk,
+        "chunk_count": len(leaves),
+        "chunk_leaf": entry["leaves"][chunk],
+        "chunk_audit_path": [h.hex() for h in merkle_path(leaves, chunk)],
+    }
+
+
+def check_merkle_proof(proof: dict, data: bytes | None = None) -> list[str]:
+    """Problems with an inclusion proof (empty list = valid)."""
+
+    problems = []
+    leaf = bytes.fromhex(proof["chunk_leaf"])
+    if data is not None and merkle_leaf(data) != leaf:
+        problems.append("chunk data does not match chunk_leaf")
+    chunk_path = [bytes.fromhex(h) for h in proof["chunk_audit_path"]]
+    file_root = merkle_root_from_path(leaf, proof["chunk_index"], proof["chunk_count"], chunk_path)
+    if file_root is None or file_root.hex() != proof["file_root"]:
+        problems.append("chunk audit path does not lead to file_root")
+    file_path = [bytes.fromhex(h) for h in proof["file_audit_path"]]
+    file_leaf = merkle_file_leaf(proof["path"], bytes.fromhex(proof["file_root"]))
+    root = merkle_root_from_path(file_leaf, proof["file_index"], proof["file_count"], file_path)
+    if root is None or root.hex() != proof["root"]:
+        problems.append("file audit path does not lead to root")
+    return problems
+
+
+def prove_main(argv: list[str]) -> int:
+    import argparse
+    import base64
+
+    ap = argparse.ArgumentParser(prog="runner.py prove", description="Emit a Merkle inclusion proof for one chunk of a bundle file")
+    ap.add_argument("bundle", type=Path, help="Bundle directory with a v0.3 manifest")
+    ap.add_argument("--file", required=True, help="Bundle member, e.g. output.json")
+    ap.add_argument("--chunk", type=int, default=0, help="Chunk index within the file")
+    ap.add_argument("--include-data", action="store_true", help="Embed the chunk bytes (base64) in the proof")
+    args = ap.parse_args(argv)
+
+    merkle = _load_merkle(args.bundle)
+    proof = build_merkle_proof(merkle, args.file, args.chunk)
+    if args.include_data:
+        proof["chunk_data_b64"] = base64.b64encode(_read_chunk(args.bundle / args.file, args.chunk, merkle["chunk_size"])).decode("ascii")
+    print(json.dumps(proof, ensure_ascii=False, indent=2))
+    return 0
+
+
+def verify_proof_main(argv: list[str]) -> int:
+    import argparse
+    import base64
+
+    ap = argparse.ArgumentParser(prog="runner.py verify-proof", description="Check a Merkle inclusion proof against a root")
+    ap.add_argument("proof", type=Path, help="Proof JSON from `runner.py prove`")
+    ap.add_argument("--data", type=Path, help="Raw chunk bytes (default: chunk_data_b64 in the proof, if present)")
+    ap.add_argument("--root", help="Expected root, e.g. identity.json merkle.root")
+    args = ap.parse_args(argv)
+
+    proof = json.loads(args.proof.read_text(encoding="utf-8"))
+    data = None
+    if args.data is not None:
+        data = args.data.read_bytes()
+    elif "chunk_data_b64" in proof:
+        data = base64.b64decode(proof["chunk_data_b64"])
+
+    problems = check_merkle_proof(proof, data)
+    if args.root is not None and args.root != proof["root"]:
+        problems.append("proof root does not match --root")
+    print(json.dumps({"ok": not problems, "path": proof["path"], "chunk_index": proof["chunk_index"], "data_checked": data is not None, "problems": problems}))
+    return 1 if problems else 0
+
+
+def verify_chunks_main(argv: list[str]) -> int:
+    import argparse
+    import random
+
+    ap = argparse.ArgumentParser(prog="runner.py verify-chunks", description="Spot-check chunks of a bundle file against its v0.3 Merkle tree")
+    ap.add_argument("bundle", type=Path, help="Bundle directory with a v0.3 manifest")
+    ap.add_argument("--file", required=True, help="Bundle member, e.g. input.json")
+    sel = ap.add_mutually_exclusive_group(required=True)
+    sel.add_argument("--chunks", help="Comma-separated chunk indexes")
+    sel.add_argument("--sample", type=int, help="Check this many randomly chosen chunks")
+    ap.add_argument("--seed", type=int, help="Seed for --sample")
+    args = ap.parse_args(argv)
+
+    merkle = _load_merkle(args.bundle)
+    failures = check_merkle_structure(merkle)
+    try:
+        identity_root = json.loads((args.bundle / "identity.json").read_text(encoding="utf-8"))["merkle"]["root"]
+    except (OSError, ValueError, KeyError, TypeError):
+        identity_root = None
+    if identity_root != merkle["root"]:
+        failures.append({"check": "identity.merkle.root", "expected": merkle["root"], "actual": identity_root})
+
+    entry = next((f for f in merkle["files"] if f["path"] == args.file), None)
+    if entry is None:
+        raise SystemExit(f"{args.file} is not covered by the Merkle tree")
+    count = len(entry["leaves"])
+    if args.chunks is not None:
+        indexes = sorted({int(x) for x in args.chunks.split(",") if x.strip()})
+        if any(not 0 <= i < count for i in indexes):
+            raise SystemExit(f"{args.file} has {count} chunks")
+    else:
+        indexes = sorted(random.Random(args.seed).sample(range(count), min(args.sample, count)))
+
+    cs = merkle["chunk_size"]
+    with (args.bundle / args.file).open("rb") as f:
+        for i in indexes:
+            f.seek(i * cs)
+            got = merkle_leaf(f.read(cs)).hex()
+            if got != entry["leaves"][i]:
+                failures.append({"check": "merkle.chunk", "path": args.file, "chunk": i, "expected": entry["leaves"][i], "actual": got})
+
+    for fail in failures:
+        print(json.dumps({"ok": False, "bundle": str(args.bundle), **fail}, ensure_ascii=False))
+    print(json.dumps({"ok": not failures, "path": args.file, "chunks_checked": indexes, "chunk_count": count, "root": merkle["root"]}), file=sys.stderr)
+    return 1 if failures else 0
+
+
+SUBCOMMANDS = {
+    "batch": batch_main,
+    "serve": serve_main,
+    "gc": gc_main,
+    "verify": verify_main,
+    "prove": prove_main,
+    "verify-proof": verify_proof_main,
+    "verify-chunks": verify_chunks_main,
+    "unpack": unpack_main,
+    "verify-chain": verify_chain_main,
+}
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in SUBCOMMANDS:
+        return SUBCOMMANDS[argv[0]](argv[1:])
+
+    import argparse
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--input", required=True, help="Input JSON path")
+    ap.add_argument("--outdir", required=True, help="Output directory (mounted volume recommended)")
+    ap.add_argument("--stream-input", action="store_true", help="Copy the input file into the bundle verbatim and parse only the task fields (constant memory)")
+    add_run_options(ap)
+    args = ap.parse_args(argv)
+    opts = run_options_from_args(ap, args)
+    if args.stream_input and JSON_FORMATS[opts.json_format] is not None:
+        ap.error("--stream-input copies input.json verbatim and cannot be combined with --json-format canonical")
+
+    timer = PhaseTimer()
+    with timer.phase("provenance"):
+        provenance_snapshot(args.provenance_cache)
+    inp = Path(args.input)
+    with timer.phase("parse_input"):
+        data = extract_input_fields(inp) if args.stream_input else json.loads(inp.read_text(encoding="utf-8"))
+    outdir = Path(args.outdir)
+    if opts.pack:
+        outdir = outdir / _job_dirname(data, args.input)
+    try:
+        summary = run_job(data, outdir, opts, input_path=inp if args.stream_input else None, timer=timer)
+    except (CanonicalInputError, TaskInputError) as e:
+        raise SystemExit(f"{args.input}: {e}")
 
-    # sha256sum.txt (bundle)
-    rels = ["input.json", "output.json", "identity.json", "policy.json", "manifest.json"]
-    lines = []
-    for rel in rels:
-        p = outdir / rel
-        lines.append(f"{sha256_file(p)}  {rel}")
-    sha256sum.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    sinks = MetricsSinks(args.metrics_sink)
+    sinks.record({"job_id": data.get("job_id"), **summary})
+    sinks.flush()
 
-    print(json.dumps({"ok": True, "outdir": str(outdir), "run_id": run_id}, ensure_ascii=False))
+    print(json.dumps(summary, ensure_ascii=False))
     return 0
 
 
 if __name__ == "__main__":
+    if os.environ.get("EIGENPROOF_PROFILE"):
+        raise SystemExit(run_profiled(main, os.environ["EIGENPROOF_PROFILE"]))
     raise SystemExit(main())
@@ -0,0 +1,56 @@
+import json
+
+from aoi_core.acp.approval_index import _upsert, approval_row, connect, index_approval, query_approvals, rebuild_index
+
+
+def approval(approval_id: str, created_at: str = "2026-10-01T12:00:00+00:00") -> dict:
+    return {
+        "id": approval_id,
+        "created_at": created_at,
+        "status": "pending",
+        "risk_level": "low",
+        "proof_plan": {"sha256": {"gate_report.json": "ab" * 32}},
+    }
+
+
+def write_approvals(approvals_dir, *ids):
+    approvals_dir.mkdir(parents=True, exist_ok=True)
+    for i in ids:
+        (approvals_dir / f"{i}.json").write_text(json.dumps(approval(i)), encoding="utf-8")
+
+
+def ids(index):
+    return sorted(row["id"] for row in query_approvals(index))
+
+
+def test_rebuild_replaces_rows_with_the_files(tmp_path):
+    index, approvals_dir = tmp_path / "index.sqlite3", tmp_path / "approvals"
+    index_approval(index, approval("stale"), None)
+    write_approvals(approvals_dir, "a1", "a2")
+    (approvals_dir / "broken.json").write_text("{", encoding="utf-8")
+
+    count, errors = rebuild_index(index, approvals_dir, tmp_path / "proofs")
+    assert count == 2 and len(errors) == 1
+    assert ids(index) == ["a1", "a2"]
+    assert next(query_approvals(index, sha256="AB" * 32))["sha256"] == {"gate_report.json": "ab" * 32}
+
+
+def test_writes_through_a_connection_opened_before_the_rebuild_survive(tmp_path):
+    index, approvals_dir = tmp_path / "index.sqlite3", tmp_path / "approvals"
+    write_approvals(approvals_dir, "a1")
+    held = connect(index)  # e.g. a pre-push hook that started before the rebuild
+    try:
+        rebuild_index(index, approvals_dir, tmp_path / "proofs")
+        with held:
+            _upsert(held, approval_row(approval("late"), None), {})
+    finally:
+        held.close()
+    assert ids(index) == ["a1", "late"]
+
+
+def test_rebuild_recovers_a_file_that_is_not_a_database(tmp_path):
+    index, approvals_dir = tmp_path / "index.sqlite3", tmp_path / "approvals"
+    index.write_bytes(b"not sqlite" * 100)
+    write_approvals(approvals_dir, "a1")
+    assert rebuild_index(index, approvals_dir, tmp_path / "proofs") == (1, [])
+    assert ids(index) == ["a1"]
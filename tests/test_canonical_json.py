@@ -0,0 +1,142 @@
+import json
+import struct
+import unicodedata
+
+import pytest
+
+import runner
+
+# RFC 8785 Appendix B: IEEE 754 bit patterns and their canonical form.
+RFC8785_NUMBERS = [
+    ("0000000000000000", "0"),
+    ("8000000000000000", "0"),
+    ("0000000000000001", "5e-324"),
+    ("8000000000000001", "-5e-324"),
+    ("7fefffffffffffff", "1.7976931348623157e+308"),
+    ("ffefffffffffffff", "-1.7976931348623157e+308"),
+    ("4340000000000000", "9007199254740992"),
+    ("c340000000000000", "-9007199254740992"),
+    ("4430000000000000", "295147905179352830000"),
+    ("44b52d02c7e14af5", "9.999999999999997e+22"),
+    ("44b52d02c7e14af6", "1e+23"),
+    ("44b52d02c7e14af7", "1.0000000000000001e+23"),
+    ("444b1ae4d6e2ef4e", "999999999999999700000"),
+    ("444b1ae4d6e2ef4f", "999999999999999900000"),
+    ("444b1ae4d6e2ef50", "1e+21"),
+    ("3eb0c6f7a0b5ed8c", "9.999999999999997e-7"),
+    ("3eb0c6f7a0b5ed8d", "0.000001"),
+    ("41b3de4355555553", "333333333.3333332"),
+    ("41b3de4355555554", "333333333.33333325"),
+    ("41b3de4355555555", "333333333.3333333"),
+    ("41b3de4355555556", "333333333.3333334"),
+    ("41b3de4355555557", "333333333.33333343"),
+    ("becbf647612f3696", "-0.0000033333333333333333"),
+    ("43143ff3c1cb0959", "1424953923781206.2"),
+]
+
+
+def double(bits: str) -> float:
+    return struct.unpack(">d", bytes.fromhex(bits))[0]
+
+
+@pytest.mark.parametrize("bits,expected", RFC8785_NUMBERS)
+def test_numbers_match_rfc8785_appendix_b(bits, expected):
+    assert runner._es_number(double(bits)) == expected
+    assert runner.canonical_json_bytes(double(bits)) == expected.encode("ascii")
+
+
+@pytest.mark.parametrize("bits", ["7fffffffffffffff", "7ff0000000000000", "fff0000000000000"])
+def test_nan_and_infinity_are_rejected(bits):
+    with pytest.raises(ValueError):
+        runner.canonical_json_bytes([double(bits)])
+
+
+def test_rfc8785_section_3_2_2_example():
+    raw = r"""{
+      "numbers": [333333333.33333329, 1E30, 4.50, 2e-3, 0.000000000000000000000000001],
+      "string": "\u20ac$\u000F\u000aA'\u0042\u0022\u005c\\\"\/",
+      "literals": [null, true, false]
+    }"""
+    expected = r"""{"literals":[null,true,false],"numbers":[333333333.3333333,1e+30,4.5,0.002,1e-27],"string":"€$\u000f\nA'B\"\\\\\"/"}"""
+    assert runner.canonical_json_bytes(json.loads(raw)) == expected.encode("utf-8")
+
+
+def test_rfc8785_section_3_2_3_sorting_example():
+    raw = r"""{
+      "\u20ac": "Euro Sign",
+      "\r": "Carriage Return",
+      "\ufb33": "Hebrew Letter Dalet With Dagesh",
+      "1": "One",
+      "\ud83d\ude00": "Emoji: Grinning Face",
+      "\u0080": "Control",
+      "\u00f6": "Latin Small Letter O With Diaeresis"
+    }"""
+    keys = list(json.loads(runner.canonical_json_bytes(json.loads(raw))))
+    # The RFC order, except that U+FB33 is a composition exclusion: NFC
+    # rewrites it to U+05D3 U+05BC, which sorts before the Euro sign.
+    assert keys == ["\r", "1", "\u0080", "\u00f6", "\u05d3\u05bc", "\u20ac", "\U0001f600"]
+
+
+def test_keys_sort_by_utf16_code_units():
+    # U+FF61 < U+10000 as code points, but U+10000 is the surrogate pair D800 DC00.
+    assert runner.canonical_json_bytes({"\uff61": 1, "\U00010000": 2}) == '{"\U00010000":2,"\uff61":1}'.encode("utf-8")
+
+
+def test_output_has_no_whitespace_or_trailing_newline():
+    out = runner.canonical_json_bytes({"b": [1, {"c": None}], "a": "x y"})
+    assert out == b'{"a":"x y","b":[1,{"c":null}]}'
+
+
+def test_integers_outside_the_safe_range_are_rejected():
+    limit = 2**53 - 1
+    assert runner.canonical_json_bytes([limit, -limit]) == f"[{limit},-{limit}]".encode("ascii")
+    for n in (limit + 1, -limit - 1, 10**30):
+        with pytest.raises(ValueError, match="I-JSON"):
+            runner.canonical_json_bytes({"n": n})
+
+
+def test_strings_and_keys_are_nfc_normalized():
+    nfd = unicodedata.normalize("NFD", "café")
+    assert nfd != "café"
+    assert runner.canonical_json_bytes({nfd: nfd}) == '{"café":"café"}'.encode("utf-8")
+
+
+def test_keys_colliding_after_nfc_are_rejected():
+    with pytest.raises(ValueError, match="duplicate key"):
+        runner.canonical_json_bytes({"café": 1, unicodedata.normalize("NFD", "café"): 2})
+
+
+def test_non_string_keys_are_rejected():
+    with pytest.raises(TypeError):
+        runner.canonical_json_bytes({1: "x"})
+
+
+def test_canonical_input_normalizes_and_validates():
+    data = {"job_id": "j", "task": {"message": unicodedata.normalize("NFD", "café"), "n": 3}}
+    assert runner.canonical_input(data)["task"]["message"] == "café"
+    with pytest.raises(runner.CanonicalInputError):
+        runner.canonical_input({"job_id": "j", "task": {"n": 2**53}})
+
+
+def test_canonical_bundle_agrees_with_its_input(tmp_path):
+    data = {"job_id": "nfd", "task": {"message": unicodedata.normalize("NFD", "café"), "n": 7}}
+    outdir = tmp_path / "b"
+    runner.run_job(data, outdir, runner.RunOptions(deterministic=True, json_format="canonical"))
+
+    stored = json.loads((outdir / "input.json").read_bytes())
+    result = json.loads((outdir / "output.json").read_bytes())["result"]
+    assert stored["task"]["message"] == result["input_message"] == "café"
+    assert result == runner.task_hash_demo(stored["task"])
+
+    manifest = json.loads((outdir / "manifest.json").read_bytes())
+    assert manifest["canonicalization"] == runner.CANONICALIZATION
+    assert (outdir / "manifest.json").read_bytes() == runner.canonical_json_bytes(manifest)
+    assert runner.manifest_self_sha256(manifest) == manifest["self_sha256"]
+
+
+def test_canonical_format_refuses_a_verbatim_input_copy(tmp_path):
+    src = tmp_path / "in.json"
+    src.write_text('{"job_id": "s", "task": {"message": "m"}}', encoding="utf-8")
+    opts = runner.RunOptions(json_format="canonical")
+    with pytest.raises(ValueError, match="--stream-input"):
+        runner.run_job(runner.extract_input_fields(src), tmp_path / "out", opts, input_path=src)
@@ -0,0 +1,126 @@
+import shutil
+import subprocess
+
+import pytest
+
+from aoi_core.acp.clawshield_gate import parse_gitignore, walk_repo_files
+
+ROOT_GITIGNORE = r"""
+# comment
+*.log
+!keep.log
+/build/
+**/sub/*.tmp
+doc/**/f.md
+logs/**
+!logs/keep/
+x/**/w.txt
+/foo.c
+a\[1\].txt
+\#hash
+\!bang
+[v]1.?/
+abc/**/ghi.txt
+"""
+
+SRC_GITIGNORE = """\
+*.md
+!keep.md
+/local.txt
+"""
+
+FILES = [
+    "a.py", "b.log", "keep.log", "build/x.py", "build/y/z.py", "src/build/q.py", "src/a.tmp", "src/sub/a.tmp",
+    "doc/f.md", "doc/deep/f.md", "doc/deeper/still/f.md", "logs/1.txt", "logs/keep/2.txt", "x/w.txt", "x/y/z/w.txt",
+    "foo.c", "lib/foo.c", "a[1].txt", "a1.txt", "#hash", "!bang", "src/keep.md", "src/drop.md", "src/local.txt",
+    "src/sub/local.txt", "we ird/f.txt", "v1.2/file.txt", "v1.20/file.txt", "abc/def/ghi.txt", "abc/ghi.txt",
+]
+
+
+def make_repo(root):
+    for rel in FILES:
+        p = root / rel
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text("x", encoding="utf-8")
+    (root / ".gitignore").write_text(ROOT_GITIGNORE, encoding="utf-8")
+    (root / "src" / ".gitignore").write_text(SRC_GITIGNORE, encoding="utf-8")
+
+
+def walked(root) -> set[str]:
+    return {rel for rel, _ in walk_repo_files(root, extensions=None, exclude=(".git",))}
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+def test_walker_agrees_with_git(tmp_path):
+    subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+    make_repo(tmp_path)
+    out = subprocess.run(
+        ["git", "-c", "core.quotePath=false", "ls-files", "--others", "--exclude-standard", "-z"],
+        cwd=tmp_path, capture_output=True, check=True,
+    ).stdout.decode("utf-8")
+    assert walked(tmp_path) == set(out.split("\0")) - {""}
+
+
+def test_walker_expected_files(tmp_path):
+    # `**/` also matches zero directories, and `logs/**` still ignores the
+    # files of the re-included logs/keep/.
+    make_repo(tmp_path)
+    assert walked(tmp_path) == {
+        ".gitignore", "a.py", "keep.log", "src/.gitignore", "src/build/q.py", "src/a.tmp", "src/keep.md",
+        "src/sub/local.txt", "lib/foo.c", "a1.txt", "we ird/f.txt", "v1.20/file.txt",
+    }
+
+
+def rule_hits(text: str, rel: str, is_dir: bool = False, base: str = "") -> list[bool]:
+    name = rel.rsplit("/", 1)[-1]
+    return [rule.matches(rel, name, is_dir) for rule in parse_gitignore(text, base)]
+
+
+def test_parse_skips_comments_and_blank_lines():
+    rules = parse_gitignore("# c\n\n   \n*.pyc\n/\n")
+    assert len(rules) == 1
+    assert not rules[0].anchored and not rules[0].negate and not rules[0].dir_only
+
+
+def test_unanchored_patterns_match_the_name_at_any_depth():
+    assert rule_hits("*.pyc", "a/b/c.pyc") == [True]
+    assert rule_hits("*.pyc", "a/b/c.py") == [False]
+    assert rule_hits("cache", "a/cache", is_dir=True) == [True]
+
+
+def test_slash_anchors_to_the_gitignore_directory():
+    assert rule_hits("/out", "out") == [True]
+    assert rule_hits("/out", "a/out") == [False]
+    assert rule_hits("a/out", "a/out") == [True]
+    assert rule_hits("/local", "src/local", base="src") == [True]
+    assert rule_hits("/local", "local", base="src") == [False]
+    assert rule_hits("/local", "srcx/local", base="src") == [False]
+
+
+def test_directory_only_patterns():
+    assert rule_hits("tmp/", "tmp", is_dir=True) == [True]
+    assert rule_hits("tmp/", "tmp", is_dir=False) == [False]
+
+
+def test_globs_do_not_cross_slashes():
+    assert rule_hits("a/*.c", "a/b.c") == [True]
+    assert rule_hits("a/*.c", "a/x/b.c") == [False]
+    assert rule_hits("a/?.c", "a/b.c") == [True]
+    assert rule_hits("a/?.c", "a//.c") == [False]
+    assert rule_hits("a/**/b.c", "a/b.c") == [True]
+    assert rule_hits("a/**/b.c", "a/x/y/b.c") == [True]
+    assert rule_hits("a/**", "a/x/y") == [True]
+
+
+def test_character_classes_and_escapes():
+    assert rule_hits("[!a]b", "cb") == [True]
+    assert rule_hits("[!a]b", "ab") == [False]
+    assert rule_hits("[a-c]x", "bx") == [True]
+    assert rule_hits(r"\*lit", "*lit") == [True]
+    assert rule_hits(r"\*lit", "xlit") == [False]
+    assert rule_hits(r"\!x", "!x") == [True]
+
+
+def test_negation_is_recorded():
+    rules = parse_gitignore("*.log\n!keep.log\n")
+    assert [r.negate for r in rules] == [False, True]
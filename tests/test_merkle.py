@@ -0,0 +1,109 @@
+import json
+
+import pytest
+
+import runner
+
+# RFC 6962 reference inputs and tree heads, as used by the Certificate
+# Transparency implementations' Merkle tree tests.
+CT_LEAVES = [
+    bytes.fromhex(h)
+    for h in ["", "00", "10", "2021", "3031", "40414243", "5051525354555657", "606162636465666768696a6b6c6d6e6f"]
+]
+CT_ROOTS = [
+    "6e340b9cffb37a989ca544e6bb780a2c78901d3fb33738768511a30617afa01d",
+    "fac54203e7cc696cf0dfcb42c92a1d9dbaf70ad9e621f4bd8d98662f00e3c125",
+    "aeb6bcfe274b70a14fb067a5e5578264db0fa9b51af5e0ba159158f329e06e77",
+    "d37ee418976dd95753c1c73862b9398fa2a2cf9b4ff0fdfe8b30cd95209614b7",
+    "4e3bbb1f7b478dcfe71fb631631519a3bca12c9aefca1612bfce4c13a86264d4",
+    "76e67dadbcdf1e10e1b74ddc608abd2f98dfb16fbce75277b5232a127f2087ef",
+    "ddb89be403809e325750d3d263cd78929c2942b7942a34b77e122c9594a74c8c",
+    "5dc9da79a70659a9ad559cb701ded9a2ab9d823aad2f4960cfe370eff4604328",
+]
+
+
+def leaves(n: int) -> list[bytes]:
+    return [runner.merkle_leaf(i.to_bytes(4, "big")) for i in range(n)]
+
+
+@pytest.mark.parametrize("n", range(1, len(CT_LEAVES) + 1))
+def test_root_matches_rfc6962_reference_vectors(n):
+    tree = [runner.merkle_leaf(d) for d in CT_LEAVES[:n]]
+    assert runner.merkle_root(tree).hex() == CT_ROOTS[n - 1]
+
+
+def test_empty_tree_root():
+    assert runner.merkle_root([]).hex() == "e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855"
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 4, 5, 7, 8, 9, 16, 17, 33])
+def test_every_audit_path_leads_to_the_root(n):
+    tree = leaves(n)
+    root = runner.merkle_root(tree)
+    for i in range(n):
+        path = runner.merkle_path(tree, i)
+        assert runner.merkle_root_from_path(tree[i], i, n, path) == root
+
+
+@pytest.mark.parametrize("n", [2, 5, 8, 13])
+def test_tampered_audit_paths_are_rejected(n):
+    tree = leaves(n)
+    root = runner.merkle_root(tree)
+    other = runner.merkle_leaf(b"not in the tree")
+    for i in range(n):
+        path = runner.merkle_path(tree, i)
+        assert runner.merkle_root_from_path(other, i, n, path) != root
+        assert runner.merkle_root_from_path(tree[i], (i + 1) % n, n, path) != root
+        assert runner.merkle_root_from_path(tree[i], i, n, path + [other]) is None
+        if path:
+            assert runner.merkle_root_from_path(tree[i], i, n, path[:-1]) != root
+            flipped = [path[0][:-1] + bytes([path[0][-1] ^ 1])] + path[1:]
+            assert runner.merkle_root_from_path(tree[i], i, n, flipped) != root
+
+
+@pytest.mark.parametrize("index,count", [(-1, 4), (4, 4), (0, 0)])
+def test_out_of_range_index_is_malformed(index, count):
+    assert runner.merkle_root_from_path(runner.merkle_leaf(b""), index, count, []) is None
+
+
+def test_merkle_file_leaves_do_not_depend_on_write_boundaries():
+    data = bytes(range(256)) * 10
+    whole = runner.MerkleFile(100)
+    whole.update(data)
+    pieces = runner.MerkleFile(100)
+    for i in range(0, len(data), 37):
+        pieces.update(data[i:i + 37])
+    assert whole.finish().leaves == pieces.finish().leaves
+    assert whole.leaves == [runner.merkle_leaf(data[i:i + 100]) for i in range(0, len(data), 100)]
+    assert runner.MerkleFile(100).finish().leaves == [runner.merkle_leaf(b"")]
+
+
+@pytest.fixture(scope="module")
+def bundle(tmp_path_factory):
+    outdir = tmp_path_factory.mktemp("bundle") / "b"
+    data = {"job_id": "merkle", "task": {"message": "m" * 1000, "n": 3}}
+    opts = runner.RunOptions(deterministic=True, manifest_version="0.3", merkle_chunk_size=64)
+    runner.run_job(data, outdir, opts)
+    return outdir
+
+
+def test_inclusion_proofs_for_every_chunk_of_a_bundle(bundle):
+    merkle = runner._load_merkle(bundle)
+    identity_root = json.loads((bundle / "identity.json").read_text(encoding="utf-8"))["merkle"]["root"]
+    assert merkle["root"] == identity_root
+    for entry in merkle["files"]:
+        for chunk in range(len(entry["leaves"])):
+            proof = runner.build_merkle_proof(merkle, entry["path"], chunk)
+            data = runner._read_chunk(bundle / entry["path"], chunk, merkle["chunk_size"])
+            assert runner.check_merkle_proof(proof, data) == []
+
+
+def test_inclusion_proof_detects_tampering(bundle):
+    merkle = runner._load_merkle(bundle)
+    proof = runner.build_merkle_proof(merkle, "input.json", 1)
+    data = runner._read_chunk(bundle / "input.json", 1, merkle["chunk_size"])
+
+    assert runner.check_merkle_proof(proof, data[:-1] + b"X") == ["chunk data does not match chunk_leaf"]
+    assert runner.check_merkle_proof(dict(proof, path="output.json")) == ["file audit path does not lead to root"]
+    assert runner.check_merkle_proof(dict(proof, chunk_index=0)) == ["chunk audit path does not lead to file_root"]
+    assert "file audit path does not lead to root" in runner.check_merkle_proof(dict(proof, root="00" * 32))
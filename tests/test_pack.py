@@ -0,0 +1,111 @@
+import hashlib
+import json
+from pathlib import Path
+
+import pytest
+
+import runner
+
+
+def job(job_id: str, message: str = "hello") -> dict:
+    return {"job_id": job_id, "task": {"message": message, "n": 2}}
+
+
+def packed(root: Path, job_id: str, message: str = "hello", **opts) -> Path:
+    summary = runner.run_job(job(job_id, message), root / job_id, runner.RunOptions(deterministic=True, pack=True, **opts))
+    return Path(summary["pack"])
+
+
+def test_pack_round_trips_to_the_directory_bundle(tmp_path):
+    pack = packed(tmp_path / "p", "j1")
+    plain = tmp_path / "d" / "j1"
+    runner.run_job(job("j1"), plain, runner.RunOptions(deterministic=True))
+
+    (record,) = runner.read_pack_index(pack)
+    assert record["name"] == "j1"
+    assert record["start"] == 0
+    assert sorted(m["path"] for m in record["members"]) == sorted(runner.PACK_MEMBERS)
+
+    runner.extract_pack_record(pack, record, tmp_path / "x")
+    for rel in runner.PACK_MEMBERS:
+        data = (tmp_path / "x" / rel).read_bytes()
+        member = next(m for m in record["members"] if m["path"] == rel)
+        assert hashlib.sha256(data).hexdigest() == member["sha256"]
+        assert data == (plain / rel).read_bytes()
+
+
+def test_segment_is_records_concatenated(tmp_path):
+    records = [packed(tmp_path / "p", name, message=name * 50) for name in ["a", "b", "c"]]
+    segment = tmp_path / runner.PACK_SEGMENT
+    offsets = runner.append_pack_records(segment, records[:2])
+    offsets += runner.append_pack_records(segment, records[2:])
+
+    index = runner.read_pack_index(segment)
+    assert [r["name"] for r in index] == ["a", "b", "c"]
+    assert [r["start"] for r in index] == offsets
+    assert segment.read_bytes() == b"".join(r.read_bytes() for r in records)
+    for rec in index:
+        runner.extract_pack_record(segment, rec, tmp_path / "x" / rec["name"])
+        output = json.loads((tmp_path / "x" / rec["name"] / "output.json").read_text(encoding="utf-8"))
+        assert output["job_id"] == rec["name"]
+
+
+def test_append_refuses_a_segment_with_an_interrupted_tail(tmp_path):
+    record = packed(tmp_path / "p", "a")
+    segment = tmp_path / runner.PACK_SEGMENT
+    runner.append_pack_records(segment, [record])
+    with segment.open("ab") as f:
+        f.write(record.read_bytes()[:100])  # a torn append
+    size = segment.stat().st_size
+
+    with pytest.raises(ValueError, match="interrupted append"):
+        runner.append_pack_records(segment, [record])
+    assert segment.stat().st_size == size
+    with pytest.raises(ValueError):
+        runner.read_pack_index(segment)
+
+
+@pytest.mark.parametrize("data", [b"", b"not a pack at all", runner.PACK_MAGIC + b"\xff" * 16])
+def test_read_pack_index_rejects_non_packs(tmp_path, data):
+    p = tmp_path / "x.eppack"
+    p.write_bytes(data)
+    if not data:
+        assert runner.read_pack_index(p) == []
+        return
+    with pytest.raises(ValueError):
+        runner.read_pack_index(p)
+
+
+def test_extract_detects_corrupted_member_bytes(tmp_path):
+    pack = packed(tmp_path / "p", "j1")
+    (record,) = runner.read_pack_index(pack)
+    member = next(m for m in record["members"] if m["path"] == "output.json")
+    raw = bytearray(pack.read_bytes())
+    raw[member["offset"]] ^= 0x01
+    pack.write_bytes(bytes(raw))
+
+    with pytest.raises(ValueError, match="does not match its indexed sha256"):
+        runner.extract_pack_record(pack, record, tmp_path / "x")
+
+
+def test_unpack_cli_keeps_the_last_record_per_name(tmp_path, capsys):
+    first = packed(tmp_path / "p1", "a", json_format="pretty")
+    second = packed(tmp_path / "p2", "a", json_format="canonical")
+    segment = tmp_path / runner.PACK_SEGMENT
+    runner.append_pack_records(segment, [first, second])
+
+    assert runner.unpack_main([str(segment), "--outdir", str(tmp_path / "out")]) == 0
+    manifest = json.loads((tmp_path / "out" / "a" / "manifest.json").read_text(encoding="utf-8"))
+    assert manifest["canonicalization"] == runner.CANONICALIZATION
+    assert runner.unpack_main([str(segment), "--outdir", str(tmp_path / "out"), "--name", "missing"]) == 1
+
+
+def test_batch_pack_with_duplicate_job_ids_leaves_no_staging(tmp_path):
+    src = tmp_path / "jobs.jsonl"
+    src.write_text("".join(json.dumps(job(name)) + "\n" for name in ["a", "b", "a"]), encoding="utf-8")
+    out = tmp_path / "out"
+    out.mkdir()
+
+    with pytest.raises(SystemExit, match="duplicate job_id"):
+        runner.batch_main(["--input", str(src), "--outdir", str(out), "--pack", "--workers", "1"])
+    assert list(out.iterdir()) == []
@@ -0,0 +1,28 @@
+import runner
+
+
+def job(job_id: str = "rc") -> dict:
+    return {"job_id": job_id, "task": {"message": "hello", "n": 3}}
+
+
+def test_cached_replay_is_byte_identical(tmp_path):
+    opts = runner.RunOptions(deterministic=True, result_cache=tmp_path / "cache")
+    miss = runner.run_job(job(), tmp_path / "a" / "out", opts)
+    hit = runner.run_job(job(), tmp_path / "b" / "out", opts)
+
+    assert miss["result_cache"]["result"] == "miss"
+    assert hit["result_cache"]["result"] == "hit"
+    for rel in runner.BUNDLE_FILES:
+        assert (tmp_path / "a" / "out" / rel).read_bytes() == (tmp_path / "b" / "out" / rel).read_bytes(), rel
+
+
+def test_malformed_entry_is_a_miss(tmp_path):
+    cache = runner.ResultCache(tmp_path / "cache")
+    key = "ab" * 32
+    cache.store(key, {rel: b"{}" for rel in runner.RESULT_CACHE_FILES})
+    assert cache.lookup(key) is not None
+
+    entry = cache._entry_dir(key) / "entry.json"
+    for meta in ('{"digests": []}', '{"digests": {"output.json": "x"}}', '{"digests": {"output.json": 1, "identity.json": 2}}', "[]"):
+        entry.write_text(meta, encoding="utf-8")
+        assert cache.lookup(key) is None, meta
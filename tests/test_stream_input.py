@@ -0,0 +1,111 @@
+import hashlib
+import io
+import json
+import random
+
+import pytest
+
+import runner
+
+
+def project(doc: dict, wanted: set[tuple[str, ...]]) -> dict:
+    """What the scanner should return: `doc` restricted to `wanted` paths."""
+
+    out: dict = {}
+    for path in wanted:
+        node, dst = doc, out
+        for i, key in enumerate(path):
+            if not isinstance(node, dict) or key not in node:
+                break
+            node = node[key]
+            if i == len(path) - 1:
+                dst[key] = node
+            elif isinstance(node, dict):
+                dst = dst.setdefault(key, {})
+            else:
+                break
+    return out
+
+
+def scan(raw: bytes, wanted=runner.INPUT_FIELDS, chunk_size: int = runner.STREAM_CHUNK) -> dict:
+    return runner._JsonFieldScanner(io.BytesIO(raw), chunk_size).scan_object(wanted)
+
+
+AWKWARD = {
+    "payload": ['"}]{[', "\\", "\\\"", {"nested": [[], {}, [1, [2, [3]]]]}, None, True, -1.5e-7],
+    "job_id": "jéb \"1\"",
+    "blob": "x" * 5000,
+    "task": {
+        "extra": {"message": "not this one", "n": 99},
+        "message": "café \\ \"quoted\" ☃ 😀",
+        "n": 12345678901,
+        "kind": "hash_chain",
+        "checkpoints": 4,
+    },
+    "tail": [{"task": {"message": "decoy"}}],
+}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, runner.STREAM_CHUNK])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_scanner_matches_full_parse_across_chunk_boundaries(chunk_size, indent):
+    raw = json.dumps(AWKWARD, indent=indent, ensure_ascii=False).encode("utf-8")
+    assert scan(raw, chunk_size=chunk_size) == project(AWKWARD, runner.INPUT_FIELDS)
+
+
+def test_scanner_on_random_documents():
+    rng = random.Random(6)
+
+    def value(depth: int):
+        kind = rng.randrange(7 if depth < 4 else 4)
+        if kind == 0:
+            return rng.choice([None, True, False])
+        if kind == 1:
+            return rng.choice([0, -3, 2**40, 1.25, -0.0, 6.02e23])
+        if kind in (2, 3):
+            return "".join(rng.choice('ab"\\{}[],: é\n') for _ in range(rng.randrange(12)))
+        if kind in (4, 5):
+            return {rng.choice(["task", "job_id", "n", "message", "k"]): value(depth + 1) for _ in range(rng.randrange(4))}
+        return [value(depth + 1) for _ in range(rng.randrange(4))]
+
+    for _ in range(300):
+        doc = {"junk": value(0), "job_id": value(2), "task": value(1), "more": value(0)}
+        raw = json.dumps(doc, ensure_ascii=rng.random() < 0.5).encode("utf-8")
+        assert scan(raw, chunk_size=rng.choice([1, 5, 4096])) == project(doc, runner.INPUT_FIELDS)
+
+
+def test_scanner_skips_unwanted_objects_without_descending():
+    raw = b'{"task": {"kind": "hash_demo"}, "other": {"task": {"kind": "x"}}}'
+    assert scan(raw) == {"task": {"kind": "hash_demo"}}
+
+
+@pytest.mark.parametrize("raw", [b'{"task": {"message": "abc', b'{"job_id": "a", "task": [1, 2', b'{"job_id"', b"[1, 2]"])
+def test_scanner_rejects_truncated_or_non_object_input(raw):
+    with pytest.raises(ValueError):
+        scan(raw, chunk_size=3)
+
+
+def test_copy_and_hash_is_byte_exact(tmp_path):
+    data = random.Random(7).randbytes(3 * 1024 * 1024 + 17)
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    src.write_bytes(data)
+    dst.write_bytes(b"previous, longer contents" * 300_000)
+
+    seen = bytearray()
+    digest = runner.copy_and_hash(src, dst, on_chunk=seen.extend)
+
+    assert digest == hashlib.sha256(data).hexdigest()
+    assert dst.read_bytes() == data
+    assert bytes(seen) == data
+
+
+def test_copy_and_hash_does_not_write_through_hardlinks(tmp_path):
+    src, dst, other = tmp_path / "src", tmp_path / "dst", tmp_path / "shared"
+    src.write_bytes(b"new")
+    other.write_bytes(b"shared object")
+    dst.hardlink_to(other)
+
+    runner.copy_and_hash(src, dst)
+
+    assert dst.read_bytes() == b"new"
+    assert other.read_bytes() == b"shared object"
@@ -0,0 +1,51 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import runner
+
+BAD_TASKS = [
+    {"kind": "nope", "message": "m"},
+    {"kind": "hash_chain", "n": -1},
+    {"kind": "hash_chain", "n": runner.HASH_CHAIN_MAX_N + 1},
+    {"kind": "hash_chain", "n": 10, "checkpoints": runner.HASH_CHAIN_MAX_CHECKPOINTS + 1},
+    {"kind": "hash_chain", "n": 10, "checkpoints": -3},
+    {"message": "m", "n": "ten"},
+]
+
+
+@pytest.mark.parametrize("task", BAD_TASKS)
+def test_bad_task_is_rejected_before_any_write(tmp_path, task):
+    outdir = tmp_path / "out"
+    with pytest.raises(runner.TaskInputError):
+        runner.run_job({"job_id": "bad", "task": task}, outdir, runner.RunOptions(deterministic=True))
+    assert not outdir.exists()
+
+
+def test_bad_task_leaves_an_existing_bundle_untouched(tmp_path):
+    outdir = tmp_path / "out"
+    runner.run_job({"job_id": "j", "task": {"message": "m"}}, outdir, runner.RunOptions(deterministic=True))
+    before = {p.name: p.read_bytes() for p in outdir.iterdir()}
+
+    with pytest.raises(runner.TaskInputError):
+        runner.run_job({"job_id": "j", "task": {"kind": "nope"}}, outdir, runner.RunOptions(deterministic=True))
+    assert {p.name: p.read_bytes() for p in outdir.iterdir()} == before
+
+
+def test_cli_reports_a_bad_task_without_a_traceback(tmp_path):
+    src = tmp_path / "in.json"
+    src.write_text(json.dumps({"job_id": "j", "task": {"kind": "hash_chain", "n": 10**9, "checkpoints": 10**9}}), encoding="utf-8")
+    runner_py = Path(runner.__file__)
+    proc = subprocess.run(
+        [sys.executable, str(runner_py), "--input", str(src), "--outdir", str(tmp_path / "out")],
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert proc.returncode == 1
+    assert "Traceback" not in proc.stderr
+    assert "task.n" in proc.stderr
+    assert not (tmp_path / "out").exists()